@@ -0,0 +1,137 @@
+"""
+Streaming metric accumulators.
+
+An accumulator observes a run through ``update(t, u)`` and reports its
+metrics with ``result()``, so metrics are computed while the run happens
+instead of re-reading the stored timeseries. It can be fed in two ways:
+
+  - every time step, through the solvers' ``accumulators=`` hook
+    (HeatEquationSolver1D.iter_steps/iter_snapshots/solve and
+    EnsembleHeatSolver1D.solve); trajectory metrics such as PeakOverTime,
+    EnergyDecay and TimeToThreshold need this to be exact;
+  - every saved snapshot, through accumulate() as the snapshots are written
+    (simulations.sweep.save_run_artifacts). The last snapshot is always the
+    final state, so FinalStateMetrics does not need every step.
+
+Arrays passed to ``update`` may be the solver's working buffer; an
+accumulator must copy whatever it keeps.
+
+Only NumPy is required, so the solver can use these without pandas.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+def final_state_metrics(u_final: np.ndarray, dx: float, dt: float, alpha: float) -> Dict[str, float]:
+    """
+    The metrics.json metrics of a final temperature profile.
+
+    Shared by FinalStateMetrics and analysis.metrics.compute_run_metrics so
+    streaming and file-based metrics are computed identically.
+    """
+    u_final = np.asarray(u_final, dtype=float)
+    return {
+        "max_temperature": float(np.max(u_final)),
+        "min_temperature": float(np.min(u_final)),
+        "mean_temperature": float(np.mean(u_final)),
+        # Energy-like metric: integral of u^2
+        "energy_like_metric": float(np.sum(u_final**2) * dx),
+        # r = alpha * dt / dx^2
+        "stability_ratio": float(alpha * dt / (dx**2)),
+    }
+
+
+class FinalStateMetrics:
+    """Stats of the last snapshot: the metrics stored in metrics.json."""
+
+    def __init__(self, dx: float, dt: float, alpha: float):
+        self.dx = dx
+        self.dt = dt
+        self.alpha = alpha
+        self._last: Optional[np.ndarray] = None
+
+    def update(self, t: float, u: np.ndarray):
+        if self._last is None:
+            self._last = np.array(u, dtype=float)
+        else:
+            self._last[:] = u
+
+    def result(self) -> Dict[str, float]:
+        if self._last is None:
+            raise ValueError("No snapshots were recorded")
+        return final_state_metrics(self._last, self.dx, self.dt, self.alpha)
+
+
+class PeakOverTime:
+    """Highest temperature over the run and the first time it occurred."""
+
+    def __init__(self):
+        self.peak = -np.inf
+        self.peak_time = None
+
+    def update(self, t: float, u: np.ndarray):
+        current = float(np.max(u))
+        if current > self.peak:
+            self.peak = current
+            self.peak_time = float(t)
+
+    def result(self) -> Dict[str, float]:
+        return {"peak_temperature": self.peak, "peak_time": self.peak_time}
+
+
+class EnergyDecay:
+    """Energy-like metric (integral of u^2) at the start and its final/initial ratio."""
+
+    def __init__(self, dx: float):
+        self.dx = dx
+        self.initial = None
+        self.final = None
+
+    def update(self, t: float, u: np.ndarray):
+        energy = float(np.dot(u, u) * self.dx)
+        if self.initial is None:
+            self.initial = energy
+        self.final = energy
+
+    def result(self) -> Dict[str, float]:
+        ratio = self.final / self.initial if self.initial else None
+        return {"initial_energy": self.initial, "energy_decay_ratio": ratio}
+
+
+class TimeToThreshold:
+    """First time at which the peak temperature falls to threshold (None if it never does)."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.time = None
+
+    def update(self, t: float, u: np.ndarray):
+        if self.time is None and float(np.max(u)) <= self.threshold:
+            self.time = float(t)
+
+    def result(self) -> Dict[str, float]:
+        return {"time_to_threshold": self.time}
+
+
+def accumulate(snapshots: Iterable[Tuple[float, np.ndarray]], accumulators) -> Iterator[Tuple[float, np.ndarray]]:
+    """Pass snapshots through unchanged, updating every accumulator on the way."""
+    for t, u in snapshots:
+        for acc in accumulators:
+            acc.update(t, u)
+        yield t, u
+
+
+def collect_results(accumulators) -> Dict[str, float]:
+    """Merge the results of several accumulators into one dict."""
+    metrics: Dict[str, float] = {}
+    for acc in accumulators:
+        metrics.update(acc.result())
+    return metrics
+
+
+def trajectory_accumulators(dx: float, threshold: float = 0.5) -> List:
+    """PeakOverTime, EnergyDecay and TimeToThreshold for one run (fed every time step)."""
+    return [PeakOverTime(), EnergyDecay(dx), TimeToThreshold(threshold)]
@@ -0,0 +1,105 @@
+"""
+Profile differences between runs.
+
+Runs may use different grids and save intervals, so candidates are first
+resampled onto the baseline's snapshot times and grid positions (linear in
+both time and space, over the time range each candidate covers). The differences
+of all candidates are then computed in one vectorized pass over the stacked
+(n_candidates, n_times, nx) array.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _linear_weights(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lower indices, upper indices and upper weights to interpolate src samples at dst."""
+    if len(src) == 1:
+        zeros = np.zeros(len(dst), dtype=int)
+        return zeros, zeros, np.zeros(len(dst))
+    hi = np.clip(np.searchsorted(src, dst, side="right"), 1, len(src) - 1)
+    lo = hi - 1
+    weight = np.clip((dst - src[lo]) / (src[hi] - src[lo]), 0.0, 1.0)
+    return lo, hi, weight
+
+
+def resample_field(times: np.ndarray, x: np.ndarray, values: np.ndarray,
+                   new_times: np.ndarray, new_x: np.ndarray) -> np.ndarray:
+    """Bilinear resampling of a (len(times), len(x)) field onto new_times x new_x."""
+    values = np.asarray(values, dtype=float)
+    if np.array_equal(times, new_times) and np.array_equal(x, new_x):
+        return values
+    t_lo, t_hi, t_w = _linear_weights(np.asarray(times, dtype=float), np.asarray(new_times, dtype=float))
+    rows = values[t_lo] * (1.0 - t_w)[:, None] + values[t_hi] * t_w[:, None]
+    x_lo, x_hi, x_w = _linear_weights(np.asarray(x, dtype=float), np.asarray(new_x, dtype=float))
+    return rows[:, x_lo] * (1.0 - x_w) + rows[:, x_hi] * x_w
+
+
+def _span_tolerance(values: np.ndarray) -> float:
+    return 1e-9 * max(1.0, float(abs(values[-1] - values[0])))
+
+
+def profile_differences(baseline: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                        candidates: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+                        ) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """
+    L2 and L-infinity norms of (candidate - baseline) per baseline snapshot.
+
+    Each candidate is compared over the baseline snapshots inside its own
+    time range, so a short candidate doesn't clip the others. A candidate
+    whose grid does not cover the baseline's (e.g. a different L) is not
+    extrapolated; it gets an error instead.
+
+    Args:
+        baseline: (times, x, values) of the baseline run.
+        candidates: (times, x, values) of each candidate run.
+
+    Returns:
+        One (diff, error) per candidate. diff has times, l2 (discrete,
+        sqrt(sum(d^2) * dx)) and linf lists over the compared snapshots,
+        plus their maxima.
+    """
+    b_times, b_x, b_values = (np.asarray(a, dtype=float) for a in baseline)
+    results: List[Tuple[Optional[Dict], Optional[str]]] = [(None, None)] * len(candidates)
+    x_tol = _span_tolerance(b_x)
+    t_tol = _span_tolerance(b_times)
+
+    compared, masks, fields = [], [], []
+    for i, (c_times, c_x, c_values) in enumerate(candidates):
+        c_times = np.asarray(c_times, dtype=float)
+        c_x = np.asarray(c_x, dtype=float)
+        if c_x[0] > b_x[0] + x_tol or c_x[-1] < b_x[-1] - x_tol:
+            results[i] = (None, f"Grid spans [{c_x[0]:g}, {c_x[-1]:g}] but the baseline spans "
+                                f"[{b_x[0]:g}, {b_x[-1]:g}] (different L?)")
+            continue
+        keep = (b_times >= c_times[0] - t_tol) & (b_times <= c_times[-1] + t_tol)
+        if not keep.any():
+            results[i] = (None, f"No baseline snapshots within the run's time range "
+                                f"[{c_times[0]:g}, {c_times[-1]:g}]")
+            continue
+        compared.append(i)
+        masks.append(keep)
+        # Resampled onto every baseline time so all candidates stack; rows
+        # outside the candidate's range are dropped by its mask below
+        fields.append(resample_field(c_times, c_x, c_values, b_times, b_x))
+
+    if not compared:
+        return results
+
+    diff = np.stack(fields) - b_values[None, :, :]
+    dx = float(b_x[1] - b_x[0]) if len(b_x) > 1 else 1.0
+    l2 = np.sqrt(np.einsum("ntx,ntx->nt", diff, diff) * dx)
+    linf = np.abs(diff).max(axis=2) if diff.shape[2] else np.zeros(diff.shape[:2])
+
+    for j, (i, keep) in enumerate(zip(compared, masks)):
+        c_l2, c_linf = l2[j][keep], linf[j][keep]
+        results[i] = ({
+            "times": b_times[keep].tolist(),
+            "l2": c_l2.tolist(),
+            "linf": c_linf.tolist(),
+            "max_l2": float(c_l2.max()),
+            "max_linf": float(c_linf.max()),
+        }, None)
+    return results
@@ -2,6 +2,7 @@ import os
 import sys
 import glob
 import json
+import argparse
 import pandas as pd
 
 # Add project root
@@ -9,54 +10,109 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
 from analysis.metrics import compute_run_metrics, load_timeseries
+from analysis.timeseries import find_timeseries
+
+def _recompute_run(r_dir):
+    """
+    Recompute metrics for a run from its stored timeseries and metadata.
+    Returns the metrics dict, or None if the run cannot be processed.
+    """
+    ts_path = find_timeseries(r_dir)
+    meta_path = os.path.join(r_dir, 'metadata.json')
+
+    if ts_path is None or not os.path.exists(meta_path):
+        print(f"Skipping {os.path.basename(r_dir)}: missing timeseries or metadata")
+        return None
+
+    # Load Data
+    df = load_timeseries(ts_path)
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+
+    # Extract Physics Params
+    # Use 'actual_dt' if available (computed), else 'dt' from params
+    dt = meta.get('actual_dt', meta.get('dt'))
+    if dt is None:
+        print(f"Warning: No dt found for {os.path.basename(r_dir)}")
+        return None
+
+    L = meta.get('L', 1.0)
+    nx = meta.get('nx', 50)
+    dx = L / (nx - 1)
+    alpha = meta.get('alpha', 0.1)
+
+    # Compute Metrics
+    return compute_run_metrics(df, dx, dt, alpha)
 
 def process_all_runs(results_dir):
     """Scan results directory and regenerate metrics.json for all runs."""
     run_dirs = glob.glob(os.path.join(results_dir, 'run_*'))
     print(f"Found {len(run_dirs)} runs in {results_dir}")
-    
+
     for r_dir in run_dirs:
         if not os.path.isdir(r_dir):
             continue
-            
-        csv_path = os.path.join(r_dir, 'timeseries.csv')
-        meta_path = os.path.join(r_dir, 'metadata.json')
+
         metrics_path = os.path.join(r_dir, 'metrics.json')
-        
-        if not os.path.exists(csv_path) or not os.path.exists(meta_path):
-            print(f"Skipping {os.path.basename(r_dir)}: missing csv or metadata")
-            continue
-            
         try:
-            # Load Data
-            df = load_timeseries(csv_path)
-            with open(meta_path, 'r') as f:
-                meta = json.load(f)
-            
-            # Extract Physics Params
-            # Use 'actual_dt' if available (computed), else 'dt' from params
-            dt = meta.get('actual_dt', meta.get('dt'))
-            if dt is None: 
-                print(f"Warning: No dt found for {os.path.basename(r_dir)}")
+            metrics = _recompute_run(r_dir)
+            if metrics is None:
                 continue
-                
-            L = meta.get('L', 1.0)
-            nx = meta.get('nx', 50)
-            dx = L / (nx - 1)
-            alpha = meta.get('alpha', 0.1)
-            
-            # Compute Metrics
-            metrics = compute_run_metrics(df, dx, dt, alpha)
-            
+
             # Save
             with open(metrics_path, 'w') as f:
                 json.dump(metrics, f, indent=2)
-                
+
             print(f"Generated metrics for {os.path.basename(r_dir)}")
-            
+
         except Exception as e:
             print(f"Failed to process {os.path.basename(r_dir)}: {e}")
 
+def verify_all_runs(results_dir):
+    """
+    Recompute metrics from stored artifacts and compare them with the
+    metrics.json written during the sweep (accumulated while streaming).
+    Values must match exactly.
+
+    Returns:
+        list: Names of runs whose stored metrics differ or are missing.
+    """
+    run_dirs = sorted(glob.glob(os.path.join(results_dir, 'run_*')))
+    print(f"Verifying {len(run_dirs)} runs in {results_dir}")
+
+    mismatched = []
+    for r_dir in run_dirs:
+        if not os.path.isdir(r_dir):
+            continue
+        name = os.path.basename(r_dir)
+        metrics_path = os.path.join(r_dir, 'metrics.json')
+        try:
+            recomputed = _recompute_run(r_dir)
+            if recomputed is None:
+                continue
+            with open(metrics_path, 'r') as f:
+                stored = json.load(f)
+        except Exception as e:
+            print(f"Failed to verify {name}: {e}")
+            mismatched.append(name)
+            continue
+
+        diffs = {k: (stored.get(k), v) for k, v in recomputed.items() if stored.get(k) != v}
+        if diffs:
+            print(f"MISMATCH {name}: " + ", ".join(f"{k} stored={s} recomputed={r}" for k, (s, r) in diffs.items()))
+            mismatched.append(name)
+
+    print(f"{len(mismatched)} mismatched runs")
+    return mismatched
+
 if __name__ == "__main__":
-    results_dir = os.path.join(project_root, 'results')
+    parser = argparse.ArgumentParser(description='Regenerate (or verify) metrics.json from stored run artifacts.')
+    parser.add_argument('--results', type=str, default=None, help='Runs folder (default: results/)')
+    parser.add_argument('--verify', action='store_true',
+                        help='Compare recomputed metrics with the stored metrics.json instead of overwriting it')
+    args = parser.parse_args()
+
+    results_dir = args.results or os.path.join(project_root, 'results')
+    if args.verify:
+        sys.exit(1 if verify_all_runs(results_dir) else 0)
     process_all_runs(results_dir)
@@ -0,0 +1,160 @@
+"""
+DuckDB views over run artifacts, queried in place.
+
+connect() returns an in-memory DuckDB connection whose views read the run
+folders directly (no ingest step):
+
+  runs, metrics, run_parameters, parameters
+      Same columns as the SQLite tables in sql/db_schema.sql, built from every
+      run_*/metadata.json and run_*/metrics.json.
+  param_rollup_stats
+      Per-value aggregates (alpha, nx, dt) computed on the fly, so the
+      queries written against the SQLite rollups also run here.
+  timeseries
+      Every run_*/timeseries.parquet (wide time, p0..pN columns, unioned by
+      name) with its run_id; only created when Parquet timeseries exist.
+
+The queries in sql/ run unchanged. DuckDB is optional: install it with
+`pip install duckdb`.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from analysis.timeseries import TIMESERIES_FILES
+from scripts.rollups import ROLLUP_PARAMS
+
+
+# Artifact keys read into typed columns (other keys are ignored)
+METADATA_COLUMNS = {
+    "run_id": "VARCHAR",
+    "alpha": "DOUBLE",
+    "nx": "BIGINT",
+    "dt": "DOUBLE",
+    "actual_dt": "DOUBLE",
+    "L": "DOUBLE",
+    "t_max": "DOUBLE",
+    "save_interval": "BIGINT",
+    "scheme": "VARCHAR",
+    "steps": "BIGINT",
+    "created_at": "VARCHAR",
+    "git_commit_hash": "VARCHAR",
+    "platform": "VARCHAR",
+    "python_version": "VARCHAR",
+}
+METRICS_COLUMNS = {
+    "max_temperature": "DOUBLE",
+    "min_temperature": "DOUBLE",
+    "mean_temperature": "DOUBLE",
+    "energy_like_metric": "DOUBLE",
+    "stability_ratio": "DOUBLE",
+}
+PARAMETER_NAMES = ("alpha", "nx", "dt", "L", "t_max", "save_interval", "scheme")
+
+# Run folder name from an artifact path (either separator)
+_RUN_ID_FROM_PATH = r"regexp_extract(filename, '([^/\\]+)[/\\][^/\\]+$', 1)"
+
+
+def _columns_struct(columns):
+    return "{" + ", ".join(f"'{name}': '{dtype}'" for name, dtype in columns.items()) + "}"
+
+
+def _sql_path(path: Path) -> str:
+    return str(path).replace("'", "''")
+
+
+def _view_statements(root: Path):
+    metadata_glob = _sql_path(root / "run_*" / "metadata.json")
+    metrics_glob = _sql_path(root / "run_*" / "metrics.json")
+
+    yield f"""
+        CREATE OR REPLACE VIEW run_metadata AS
+        SELECT * EXCLUDE (filename, run_id), COALESCE(run_id, {_RUN_ID_FROM_PATH}) AS run_id
+        FROM read_json('{metadata_glob}', columns={_columns_struct(METADATA_COLUMNS)}, filename=true)
+    """
+    yield f"""
+        CREATE OR REPLACE VIEW metrics AS
+        SELECT {_RUN_ID_FROM_PATH} AS run_id, {', '.join(METRICS_COLUMNS)}
+        FROM read_json('{metrics_glob}', columns={_columns_struct(METRICS_COLUMNS)}, filename=true)
+    """
+    yield """
+        CREATE OR REPLACE VIEW runs AS
+        SELECT run_id, created_at AS timestamp, 'SUCCESS' AS status, 0.0 AS duration_ms,
+               git_commit_hash, platform, python_version
+        FROM run_metadata
+    """
+    yield """
+        CREATE OR REPLACE VIEW run_parameters AS
+        SELECT run_id, alpha, nx, dt, actual_dt, L, t_max, save_interval,
+               COALESCE(scheme, 'explicit') AS scheme
+        FROM run_metadata
+    """
+    casts = ", ".join(f"CAST({name} AS VARCHAR) AS {name}" for name in PARAMETER_NAMES)
+    yield f"""
+        CREATE OR REPLACE VIEW parameters AS
+        SELECT run_id, param_name, param_value
+        FROM (SELECT run_id, {casts} FROM run_parameters)
+        UNPIVOT INCLUDE NULLS (param_value FOR param_name IN ({', '.join(PARAMETER_NAMES)}))
+    """
+    rollups = " UNION ALL ".join(
+        f"""
+        SELECT '{name}' AS param_name, rp.{column} AS param_value, COUNT(*) AS run_count,
+               AVG(m.max_temperature) AS avg_max_temp, MIN(m.max_temperature) AS min_max_temp,
+               MAX(m.max_temperature) AS max_max_temp, AVG(m.stability_ratio) AS avg_stability,
+               SUM(CASE WHEN m.stability_ratio > 0.5 THEN 1 ELSE 0 END) AS unstable_runs
+        FROM run_parameters rp JOIN metrics m ON m.run_id = rp.run_id
+        WHERE rp.{column} IS NOT NULL
+        GROUP BY rp.{column}
+        """
+        for name, column in ROLLUP_PARAMS
+    )
+    yield f"CREATE OR REPLACE VIEW param_rollup_stats AS {rollups}"
+
+    if any(root.glob(f"run_*/{TIMESERIES_FILES['parquet']}")):
+        parquet_glob = _sql_path(root / "run_*" / TIMESERIES_FILES["parquet"])
+        yield f"""
+            CREATE OR REPLACE VIEW timeseries AS
+            SELECT {_RUN_ID_FROM_PATH} AS run_id, * EXCLUDE (filename)
+            FROM read_parquet('{parquet_glob}', filename=true, union_by_name=true)
+        """
+
+
+def connect(results_root: str | Path = "results/runs", threads: Optional[int] = None):
+    """
+    Open an in-memory DuckDB connection with views over the run artifacts
+    under results_root. Views re-read the files on every query, so new runs
+    show up without reconnecting (the timeseries view only if Parquet files
+    existed at connect time).
+
+    Raises:
+        ImportError: If duckdb is not installed.
+        FileNotFoundError: If results_root does not exist or has no run
+            folders with metadata.json and metrics.json.
+    """
+    if duckdb is None:
+        raise ImportError("duckdb is required for the DuckDB backend (pip install duckdb)")
+    root = Path(results_root).resolve()
+    if not root.exists():
+        raise FileNotFoundError(f"Results root not found: {root}")
+    # read_json fails on a glob that matches nothing, so check before creating the views
+    for name in ("metadata.json", "metrics.json"):
+        if not any(root.glob(f"run_*/{name}")):
+            raise FileNotFoundError(f"No run_*/{name} under {root}; run a sweep first")
+
+    conn = duckdb.connect(":memory:")
+    if threads:
+        conn.execute(f"SET threads = {int(threads)}")
+    for statement in _view_statements(root):
+        conn.execute(statement)
+    return conn
+
+
+def run_sql_file(conn, path: str | Path):
+    """Execute a .sql file (e.g. from sql/) and return the result as a DataFrame."""
+    return conn.execute(Path(path).read_text(encoding="utf-8")).df()
@@ -1,11 +1,17 @@
 import pandas as pd
-import numpy as np
 import json
 import os
 
-def load_timeseries(csv_path):
-    """Load timeseries data from CSV."""
-    return pd.read_csv(csv_path)
+from analysis.timeseries import format_of, read_timeseries, to_frame
+from analysis.accumulators import final_state_metrics
+
+def load_timeseries(path):
+    """Load timeseries data (csv, parquet or npy) as a wide DataFrame."""
+    if format_of(path) == 'csv':
+        # round_trip parsing returns exactly the values that were written
+        return pd.read_csv(path, float_precision='round_trip')
+    times, values = read_timeseries(path)
+    return to_frame(times, values)
 
 def compute_run_metrics(df, dx, dt, alpha):
     """
@@ -30,23 +36,5 @@ def compute_run_metrics(df, dx, dt, alpha):
     
     u_final = final_row[p_cols].values.astype(float)
     
-    # 1. Basic Stats
-    max_temp = float(np.max(u_final))
-    min_temp = float(np.min(u_final))
-    mean_temp = float(np.mean(u_final))
-    
-    # 2. Energy-like metric: sum(u^2 * dx)
-    # Integral of u^2
-    energy_like_metric = float(np.sum(u_final**2) * dx)
-    
-    # 3. Stability Ratio
-    # r = alpha * dt / dx^2
-    stability_ratio = float(alpha * dt / (dx**2))
-    
-    return {
-        "max_temperature": max_temp,
-        "min_temperature": min_temp,
-        "mean_temperature": mean_temp,
-        "energy_like_metric": energy_like_metric,
-        "stability_ratio": stability_ratio
-    }
+    # Same computation the sweep applies while streaming (FinalStateMetrics)
+    return final_state_metrics(u_final, dx, dt, alpha)
@@ -0,0 +1,266 @@
+"""
+Run timeseries storage.
+
+Formats:
+  - csv:     timeseries.csv, wide text table (time, p0..pN). Default.
+  - parquet: timeseries.parquet, same wide columns in a binary columnar file.
+  - npy:     timeseries.npy holding the (n_saved, nx) float64 values plus a
+             timeseries_times.npy sidecar with the (n_saved,) times.
+
+A run folder holds exactly one of them; readers detect which.
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+TIMESERIES_FILES = {
+    "csv": "timeseries.csv",
+    "parquet": "timeseries.parquet",
+    "npy": "timeseries.npy",
+}
+NPY_TIMES_FILE = "timeseries_times.npy"
+DEFAULT_FORMAT = "csv"
+
+# Preferred order when a run folder (unexpectedly) holds several formats
+_READ_ORDER = ("npy", "parquet", "csv")
+
+
+def _check_format(fmt: str) -> str:
+    if fmt not in TIMESERIES_FILES:
+        raise ValueError(f"Unknown timeseries format '{fmt}'. Available: {sorted(TIMESERIES_FILES)}")
+    if fmt == "parquet" and pq is None:
+        raise ImportError("pyarrow is required for the parquet timeseries format")
+    return fmt
+
+
+def _spatial_columns(nx: int):
+    return [f"p{i}" for i in range(nx)]
+
+
+def format_of(path: str | Path) -> str:
+    """Timeseries format of a file, from its name."""
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix not in TIMESERIES_FILES:
+        raise ValueError(f"Not a timeseries file: {path}")
+    return suffix
+
+
+def find_timeseries(run_dir: str | Path) -> Optional[Path]:
+    """Path of the timeseries file in a run folder, or None if there is none."""
+    run_path = Path(run_dir)
+    for fmt in _READ_ORDER:
+        candidate = run_path / TIMESERIES_FILES[fmt]
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def write_timeseries(
+    run_dir: str | Path,
+    snapshots: Iterable[Tuple[float, np.ndarray]],
+    fmt: str = DEFAULT_FORMAT,
+) -> Path:
+    """
+    Write snapshots to the run folder in the given format.
+
+    CSV is streamed row by row; the binary formats are written in one go.
+    Timeseries files of other formats in the folder are removed so readers
+    never pick up stale data.
+
+    Returns:
+        Path of the written file.
+    """
+    _check_format(fmt)
+    run_path = Path(run_dir)
+    path = run_path / TIMESERIES_FILES[fmt]
+
+    if fmt == "csv":
+        with path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            header_written = False
+            for t, u in snapshots:
+                if not header_written:
+                    writer.writerow(["time"] + _spatial_columns(len(u)))
+                    header_written = True
+                writer.writerow([float(t)] + np.asarray(u, dtype=float).tolist())
+    else:
+        times = []
+        rows = []
+        for t, u in snapshots:
+            times.append(float(t))
+            rows.append(np.array(u, dtype=float))
+        values = np.vstack(rows) if rows else np.empty((0, 0))
+        times_arr = np.asarray(times, dtype=float)
+
+        if fmt == "npy":
+            np.save(path, values)
+            np.save(run_path / NPY_TIMES_FILE, times_arr)
+        else:
+            columns = {"time": times_arr}
+            for i, name in enumerate(_spatial_columns(values.shape[1])):
+                columns[name] = values[:, i]
+            pq.write_table(pa.table(columns), path)
+
+    for other, name in TIMESERIES_FILES.items():
+        if other != fmt:
+            (run_path / name).unlink(missing_ok=True)
+    if fmt != "npy":
+        (run_path / NPY_TIMES_FILE).unlink(missing_ok=True)
+
+    return path
+
+
+def read_timeseries(path: str | Path, mmap: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read a timeseries file (or the one found in a run folder).
+
+    Args:
+        path: Timeseries file or run folder.
+        mmap: Memory-map binary formats instead of loading them.
+
+    Returns:
+        (times, values) with shapes (n_saved,) and (n_saved, nx).
+    """
+    path = Path(path)
+    if path.is_dir():
+        found = find_timeseries(path)
+        if found is None:
+            raise FileNotFoundError(f"No timeseries file in {path}")
+        path = found
+
+    fmt = format_of(path)
+    if fmt == "npy":
+        mode = "r" if mmap else None
+        values = np.load(path, mmap_mode=mode)
+        times = np.load(path.parent / NPY_TIMES_FILE, mmap_mode=mode)
+        return times, values
+
+    if fmt == "parquet":
+        _check_format(fmt)
+        table = pq.read_table(path, memory_map=mmap)
+        names = [c for c in table.column_names if c.startswith("p")]
+        names.sort(key=lambda c: int(c[1:]))
+        times = table.column("time").to_numpy()
+        values = np.column_stack([table.column(c).to_numpy() for c in names]) if names else np.empty((len(times), 0))
+        return times, values
+
+    with path.open("r", encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    p_idx = [i for i, c in enumerate(header) if c.startswith("p")]
+    p_idx.sort(key=lambda i: int(header[i][1:]))
+    return data[:, header.index("time")], data[:, p_idx]
+
+
+def read_window(
+    path: str | Path,
+    t_min: Optional[float] = None,
+    t_max: Optional[float] = None,
+    x_start: Optional[int] = None,
+    x_stop: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read the snapshots with t_min <= time <= t_max and the grid points
+    x_start:x_stop (slice semantics) of a timeseries.
+
+    npy files are memory-mapped and returned as views, so only the pages of
+    the window are read once the result is used; parquet reads only the
+    window's columns; csv has to be parsed whole.
+
+    Returns:
+        (times, values) of the window.
+    """
+    path = Path(path)
+    if path.is_dir():
+        found = find_timeseries(path)
+        if found is None:
+            raise FileNotFoundError(f"No timeseries file in {path}")
+        path = found
+
+    columns = slice(x_start, x_stop)
+    if format_of(path) == "parquet":
+        _check_format("parquet")
+        nx = sum(1 for name in pq.read_schema(path).names if name.startswith("p"))
+        names = ["time"] + _spatial_columns(nx)[columns]
+        table = pq.read_table(path, columns=names, memory_map=True)
+        times = table.column("time").to_numpy()
+        values = (np.column_stack([table.column(c).to_numpy() for c in names[1:]])
+                  if len(names) > 1 else np.empty((len(times), 0)))
+    else:
+        times, values = read_timeseries(path, mmap=True)
+        values = values[:, columns]
+
+    # Snapshot times are increasing, so the time window is a contiguous row range
+    lo = 0 if t_min is None else int(np.searchsorted(times, t_min, side="left"))
+    hi = len(times) if t_max is None else int(np.searchsorted(times, t_max, side="right"))
+    return times[lo:hi], values[lo:hi]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of n_out points of the series (x, y) chosen by
+    Largest-Triangle-Three-Buckets: the first and last points plus, per
+    bucket, the point spanning the largest triangle with the previously
+    chosen point and the next bucket's mean. Keeps peaks and fast changes
+    that a uniform stride would drop.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 1)])
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n_out - 2 buckets over the interior points 1..n-2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def to_frame(times: np.ndarray, values: np.ndarray):
+    """Wide DataFrame (time, p0..pN), the layout of timeseries.csv."""
+    import pandas as pd
+
+    df = pd.DataFrame(np.asarray(values), columns=_spatial_columns(values.shape[1]))
+    df.insert(0, "time", np.asarray(times))
+    return df
+
+
+def convert_run(run_dir: str | Path, fmt: str) -> Optional[Path]:
+    """
+    Rewrite a run's timeseries in another format.
+
+    Returns:
+        Path of the new file, or None if the run has no timeseries or is
+        already in the requested format.
+    """
+    _check_format(fmt)
+    source = find_timeseries(run_dir)
+    if source is None or format_of(source) == fmt:
+        return None
+    times, values = read_timeseries(source)
+    return write_timeseries(run_dir, zip(times, values), fmt=fmt)
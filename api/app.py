@@ -1,31 +1,127 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 import logging
 import time
 import uuid
+from urllib.parse import parse_qs
+import numpy as np
+from contextlib import asynccontextmanager
 
-from api.db import list_runs_summary
-from api.storage import get_run_metrics, get_run_insights
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+from api.db import (list_runs_summary, count_runs, get_param_rollups, close_all_connections,
+                    encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+from api.storage import (get_run_metrics, get_run_insights, get_run_timeseries, encode_timeseries,
+                         get_runs_batch, compare_runs, MAX_BATCH_RUNS, BATCH_SECTIONS,
+                         get_metrics_version, get_insights_version, get_timeseries_version,
+                         payload_cache_stats)
+from api.jobs import get_job_manager, shutdown_job_manager, configured_workers
+from api.responses import json_response, not_modified, validator_headers
+from observability.metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("api")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Simulation job workers (api/jobs.py), if a POST /jobs started them
+    shutdown_job_manager()
+    # Cached read-only SQLite connections (api/db.py)
+    close_all_connections()
+
 app = FastAPI(
     title="Engineering Simulation Platform",
     description="API for accessing validated simulation artifacts and AI insights.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Compress responses (brotli if brotli-asgi is installed, else gzip), except
+# the binary timeseries encodings: float32 data barely compresses.
+COMPRESSION_MIN_SIZE = 1000
+UNCOMPRESSED_FORMATS = ("arrow", "f32")
+
+
+class CompressionMiddleware:
+    """
+    Runs requests through compressor, except those asking for a format in
+    UNCOMPRESSED_FORMATS, which go straight to the app. Deciding on the
+    request works the same for gzip and brotli and needs no content-type
+    exclusion support from either.
+    """
+
+    def __init__(self, app, compressor, **options):
+        self.app = app
+        self.compressed = compressor(app, **options)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            formats = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("format", ())
+            if any(f in UNCOMPRESSED_FORMATS for f in formats):
+                await self.app(scope, receive, send)
+                return
+        await self.compressed(scope, receive, send)
+
+
+if BrotliMiddleware is not None:
+    app.add_middleware(CompressionMiddleware, compressor=BrotliMiddleware,
+                       minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(CompressionMiddleware, compressor=GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Request metrics, exported at /metrics. Routes are labelled by their
+# template (/runs/{run_id}/metrics), not the raw path, to bound cardinality.
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route"))
+REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requests by route and status code", ("method", "route", "status"))
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests being processed")
+
+def _payload_cache_samples(field):
+    return [({"cache": name}, getattr(info, field)) for name, info in payload_cache_stats().items()]
+
+REGISTRY.register_collector("payload_cache_hits_total", "counter", "Storage payload cache hits",
+                            lambda: _payload_cache_samples("hits"))
+REGISTRY.register_collector("payload_cache_misses_total", "counter", "Storage payload cache misses",
+                            lambda: _payload_cache_samples("misses"))
+REGISTRY.register_collector("payload_cache_entries", "gauge", "Storage payload cache size",
+                            lambda: _payload_cache_samples("currsize"))
+
+def _record_request(request: Request, status: str, elapsed: float):
+    """Per-request metrics work of the middleware: the route label, latency and status count."""
+    scope = request.scope
+    route = scope.get("route")
+    route = route.path if route is not None else "unmatched"
+    REQUEST_LATENCY.observe(elapsed, scope["method"], route)
+    REQUESTS.inc(scope["method"], route, status)
+
 # Middleware for observability
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     request_id = str(uuid.uuid4())
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    process_time = (time.time() - start_time) * 1000
+    start_time = time.perf_counter()
+    IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _record_request(request, "500", time.perf_counter() - start_time)
+        raise
+    finally:
+        IN_FLIGHT.dec()
+
+    elapsed = time.perf_counter() - start_time
+    _record_request(request, str(response.status_code), elapsed)
+    process_time = elapsed * 1000
     
     logger.info(
         f"Request: {request.method} {request.url.path} | "
@@ -38,19 +134,150 @@ async def add_process_time_header(request: Request, call_next):
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Request and cache metrics in the Prometheus text format."""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/health")
 def health_check():
     return {"status": "ok", "service": "simulation-platform"}
 
 @app.get("/runs")
-def list_runs():
-    """List all available runs from the database."""
-    runs = list_runs_summary()
-    return {"runs": runs, "count": len(runs)}
+def list_runs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    sort: str = Query("timestamp", pattern="^(timestamp|run_id|max_temperature|stability_ratio)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    status: Optional[str] = None,
+    alpha_min: Optional[float] = None,
+    alpha_max: Optional[float] = None,
+    nx_min: Optional[int] = None,
+    nx_max: Optional[int] = None,
+    dt_min: Optional[float] = None,
+    dt_max: Optional[float] = None,
+    stability_min: Optional[float] = None,
+    stability_max: Optional[float] = None,
+):
+    """
+    List runs one page at a time. Pass the returned next_cursor as `after`
+    (with the same sort, order and filters) to get the following page.
+    """
+    try:
+        cursor = decode_cursor(after, sort) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filters = {
+        "status": status,
+        "alpha": (alpha_min, alpha_max),
+        "nx": (nx_min, nx_max),
+        "dt": (dt_min, dt_max),
+        "stability_ratio": (stability_min, stability_max),
+    }
+    filters = {name: value for name, value in filters.items() if value not in (None, (None, None))}
+
+    runs = list_runs_summary(limit=limit, after=cursor, sort=sort, descending=(order == "desc"), filters=filters)
+    total, total_capped = count_runs(sort, filters)
+    next_cursor = encode_cursor(sort, runs[-1]) if len(runs) == limit else None
+    return json_response({
+        "runs": runs,
+        "count": len(runs),
+        "total": total,
+        "total_capped": total_capped,
+        "next_cursor": next_cursor,
+    })
+
+@app.get("/rollups")
+def list_rollups(param: Optional[str] = None):
+    """Aggregated metrics per parameter value (alpha, nx, dt), optionally for one parameter."""
+    rollups = get_param_rollups(param)
+    return json_response({"rollups": rollups, "count": len(rollups)})
+
+class BatchRequest(BaseModel):
+    run_ids: List[str]
+    include: List[str] = list(BATCH_SECTIONS)
+
+@app.post("/runs/batch")
+def get_runs_batch_endpoint(request: BatchRequest):
+    """Metrics and insights for many runs in one round-trip (per-run errors inline)."""
+    if len(request.run_ids) > MAX_BATCH_RUNS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_RUNS} run IDs per batch")
+    unknown = sorted(set(request.include) - set(BATCH_SECTIONS))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown sections {unknown} (use {list(BATCH_SECTIONS)})")
+    return json_response({"runs": get_runs_batch(request.run_ids, include=request.include)})
+
+@app.get("/compare")
+def compare(baseline: str, candidate: List[str] = Query(...)):
+    """
+    Compare one or more candidates (repeat `candidate`) with a baseline:
+    metric deltas and per-snapshot profile L2/L-inf differences.
+    """
+    if len(candidate) > MAX_BATCH_RUNS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_RUNS} candidates per comparison")
+    result, error = compare_runs(baseline, candidate)
+    if error:
+        if "not found" in error.lower():
+            raise HTTPException(status_code=404, detail=error)
+        else:
+            raise HTTPException(status_code=422, detail=error)
+    return json_response(result)
+
+class JobRequest(BaseModel):
+    sweep: Dict[str, List[Any]]
+    execution: Dict[str, Any] = {}
+
+def _job_manager(create: bool = True):
+    if configured_workers() <= 0:
+        raise HTTPException(status_code=503, detail="Simulation jobs are disabled (JOB_WORKERS=0)")
+    return get_job_manager(create)
+
+@app.post("/jobs", status_code=202)
+def submit_job(request: JobRequest):
+    """
+    Start a sweep (same shape as configs/sweep.yaml) on the job worker pool,
+    which the first job starts. Poll GET /jobs/{job_id}; finished runs are
+    ingested automatically.
+    """
+    job, error = _job_manager().submit(request.model_dump())
+    if error:
+        if "unavailable" in error.lower():
+            raise HTTPException(status_code=503, detail=error)
+        else:
+            raise HTTPException(status_code=422, detail=error)
+    return json_response(job, status_code=202)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status and progress of a job."""
+    manager = _job_manager(create=False)
+    job = manager.get(job_id) if manager else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return json_response(job)
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Cancel a job's runs that have not started (running ones finish and are ingested)."""
+    manager = _job_manager(create=False)
+    if manager is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    job, error = manager.cancel(job_id)
+    if error:
+        if "not found" in error.lower():
+            raise HTTPException(status_code=404, detail=error)
+        else:
+            raise HTTPException(status_code=409, detail=error)
+    return json_response(job)
 
 @app.get("/runs/{run_id}/metrics")
-def get_metrics(run_id: str):
-    """Get validated metrics for a specific run."""
+def get_metrics(run_id: str, request: Request):
+    """Get validated metrics for a specific run (conditional on ETag/Last-Modified)."""
+    version = get_metrics_version(run_id)
+    cached = not_modified(request, version)
+    if cached is not None:
+        return cached
     payload, error = get_run_metrics(run_id)
     
     if error:
@@ -60,11 +287,63 @@ def get_metrics(run_id: str):
         else:
             raise HTTPException(status_code=422, detail=error)
             
-    return payload
+    return json_response(payload, headers=validator_headers(version))
+
+@app.get("/runs/{run_id}/timeseries")
+def get_timeseries(
+    run_id: str,
+    request: Request,
+    t_min: Optional[float] = None,
+    t_max: Optional[float] = None,
+    x_start: Optional[int] = Query(None, ge=0),
+    x_stop: Optional[int] = Query(None, ge=0),
+    stride: int = Query(1, ge=1),
+    x_stride: int = Query(1, ge=1),
+    max_snapshots: Optional[int] = Query(None, ge=2),
+    format: str = Query("json", pattern="^(json|arrow|f32)$"),
+):
+    """
+    Temperature field of a run: snapshots with t_min <= time <= t_max, grid
+    points x_start:x_stop, thinned by stride/x_stride and, with
+    max_snapshots, LTTB-downsampled to that many snapshots. format=json,
+    arrow (IPC stream) or f32 (raw float32, shape in X-Timeseries-Shape).
+    """
+    version = get_timeseries_version(run_id)
+    cached = not_modified(request, version)
+    if cached is not None:
+        return cached
+    data, error = get_run_timeseries(run_id, t_min=t_min, t_max=t_max, x_start=x_start, x_stop=x_stop,
+                                     stride=stride, x_stride=x_stride, max_snapshots=max_snapshots)
+    if error:
+        if "not found" in error.lower():
+            raise HTTPException(status_code=404, detail=error)
+        else:
+            raise HTTPException(status_code=422, detail=error)
+
+    headers = validator_headers(version)
+    if format == "json":
+        return json_response({
+            "run_id": run_id,
+            # orjson serializes C-contiguous arrays only (windows are strided views)
+            "times": np.ascontiguousarray(data["times"]),
+            "x": np.ascontiguousarray(data["x"]),
+            "values": np.ascontiguousarray(data["values"]),
+        }, headers=headers)
+    try:
+        body, media_type = encode_timeseries(data, format)
+    except ImportError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    n, m = data["values"].shape
+    headers["X-Timeseries-Shape"] = f"{n},{m}"
+    return Response(content=body, media_type=media_type, headers=headers)
 
 @app.get("/runs/{run_id}/insights")
-def get_insights(run_id: str):
-    """Get validated AI insights."""
+def get_insights(run_id: str, request: Request):
+    """Get validated AI insights (conditional on ETag/Last-Modified)."""
+    version = get_insights_version(run_id)
+    cached = not_modified(request, version)
+    if cached is not None:
+        return cached
     data, md, error = get_run_insights(run_id)
     
     if error:
@@ -73,10 +352,10 @@ def get_insights(run_id: str):
         else:
             raise HTTPException(status_code=422, detail=error)
             
-    return {
+    return json_response({
         "json": data,
         "markdown": md
-    }
+    }, headers=validator_headers(version))
 
 if __name__ == "__main__":
     import uvicorn
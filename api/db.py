@@ -1,55 +1,373 @@
 import sqlite3
 import os
 import sys
+import json
+import time
+import base64
+import threading
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 
 # Add project root
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DB_PATH = os.path.join(project_root, 'results', 'analytics.db')
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+# Queries behind the API endpoints (also timed by scripts/benchmark_sql.py)
+LIST_RUNS_COLUMNS = "r.run_id, r.timestamp, r.status, m.max_temperature, m.stability_ratio"
+RUN_DETAILS_SQL = "SELECT * FROM runs WHERE run_id = ?"
+PARAM_ROLLUPS_SQL = "SELECT * FROM param_rollup_stats"
+
+# Connections are cached per thread (FastAPI runs sync endpoints in a thread
+# pool), so each worker reuses its connection and its prepared statements.
+STATEMENT_CACHE_SIZE = 64
+# How often (seconds) a cached connection checks that DB_PATH is still the
+# file it opened, e.g. after the database was deleted and re-ingested
+HEALTH_CHECK_INTERVAL = 5.0
+
+_local = threading.local()
+_open_connections = set()
+_open_connections_lock = threading.Lock()
+
+
+def _file_identity(db_path):
+    st = os.stat(db_path)
+    return st.st_dev, st.st_ino
+
+
+def _open_connection(db_path):
+    """
+    Read-only connection: mode=ro URI plus query_only. The ingest scripts put
+    the database in WAL mode, so these readers never block (or get blocked
+    by) a running ingest.
+    """
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
     return conn
 
-def list_runs_summary() -> List[Dict[str, Any]]:
+
+def close_db_connection():
+    """Close this thread's cached connection, if any."""
+    conn = getattr(_local, "conn", None)
+    _local.conn = None
+    if conn is not None:
+        with _open_connections_lock:
+            _open_connections.discard(conn)
+        conn.close()
+
+
+def close_all_connections():
+    """Close every cached connection (application shutdown)."""
+    with _open_connections_lock:
+        conns = list(_open_connections)
+        _open_connections.clear()
+    for conn in conns:
+        conn.close()
+
+
+def get_db_connection():
     """
-    Returns a lightweight summary of all runs for the list view.
+    This thread's read-only connection to DB_PATH, opened on first use and
+    reopened when DB_PATH changes or the file behind it was replaced.
+
+    Raises:
+        FileNotFoundError: If the database does not exist (yet).
     """
-    if not os.path.exists(DB_PATH):
-        return []
+    conn = getattr(_local, "conn", None)
+    now = time.monotonic()
+    if conn is not None and _local.path == DB_PATH:
+        if now - _local.checked_at < HEALTH_CHECK_INTERVAL:
+            return conn
+        try:
+            healthy = _file_identity(DB_PATH) == _local.identity
+        except OSError:
+            healthy = False
+        if healthy:
+            _local.checked_at = now
+            return conn
+
+    close_db_connection()
+    identity = _file_identity(DB_PATH)
+    conn = _open_connection(DB_PATH)
+    _local.conn = conn
+    _local.path = DB_PATH
+    _local.identity = identity
+    _local.checked_at = now
+    with _open_connections_lock:
+        _open_connections.add(conn)
+    return conn
+
+
+def _query(sql, args=(), one=False):
+    """
+    Run a read query on this thread's connection. If the connection has gone
+    bad, it is dropped and the query retried once on a fresh one.
+    """
+    for attempt in range(2):
+        try:
+            cursor = get_db_connection().execute(sql, args)
+            return cursor.fetchone() if one else cursor.fetchall()
+        except sqlite3.Error:
+            close_db_connection()
+            if attempt:
+                raise
+
+# GET /runs listing. Sorting is limited to columns with a (column, run_id)
+# index (sql/db_schema.sql) so every page is an index range scan; metric
+# sorts drive the query from metrics.
+SORT_COLUMNS = {
+    "timestamp": ("r.timestamp", "r.run_id"),
+    "run_id": ("r.run_id", "r.run_id"),
+    "max_temperature": ("m.max_temperature", "m.run_id"),
+    "stability_ratio": ("m.stability_ratio", "m.run_id"),
+}
+# Range filter name -> column (dt filters on the step actually used)
+RANGE_FILTERS = {
+    "alpha": "rp.alpha",
+    "nx": "rp.nx",
+    "dt": "rp.actual_dt",
+    "stability_ratio": "m.stability_ratio",
+}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Filtered totals stop counting here (the unfiltered total is always exact)
+TOTAL_COUNT_CAP = 1000
+
+
+def encode_cursor(sort: str, row: Dict[str, Any]) -> str:
+    """
+    Opaque keyset cursor pointing just past row in the given sort order. The
+    key is (value IS NULL, value, run_id): runs without a sort value come
+    after all others, in run_id order.
+    """
+    column = SORT_COLUMNS[sort][0].split(".")[1]
+    value = row[column]
+    raw = json.dumps([sort, value is None, value, row["run_id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
 
-    query = """
-    SELECT r.run_id, r.timestamp, r.status, m.max_temperature, m.stability_ratio
-    FROM runs r
-    LEFT JOIN metrics m ON r.run_id = m.run_id
-    ORDER BY r.timestamp DESC
+
+def decode_cursor(cursor: str, sort: str):
+    """
+    (sort value, run_id) of a cursor from encode_cursor; the value is None
+    when the cursor points into the runs without one.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort.
     """
-    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in rows]
+        cursor_sort, is_null, value, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor was issued for sort '{cursor_sort}', not '{sort}'")
+    if is_null != (value is None):
+        raise ValueError("Malformed cursor")
+    return value, run_id
+
+
+def _list_runs_from_where(sort: str, filters: Optional[Dict[str, Any]], ordered: bool = False,
+                          nulls: Optional[bool] = False):
+    """
+    FROM clause, WHERE clauses and arguments shared by the page and count
+    queries. ordered=True pins the join order so rows are visited in sort
+    order (CROSS JOIN), for filters too broad to be worth an index lookup.
+
+    For sorts other than run_id the listing has two parts: runs with a sort
+    value (nulls=False, walked over the (column, run_id) index) and runs
+    without one (nulls=True, including runs with no metrics row). nulls=None
+    selects every run (for counts).
+    """
+    column, _ = SORT_COLUMNS[sort]
+    join = "CROSS JOIN" if ordered else "JOIN"
+    if column.startswith("m.") and nulls is False:
+        from_sql = f"FROM metrics m {join} runs r ON r.run_id = m.run_id"
+    else:
+        from_sql = "FROM runs r LEFT JOIN metrics m ON m.run_id = r.run_id"
+    if sort == "run_id" or nulls is None:
+        clauses = []
+    else:
+        clauses = [f"{column} IS NULL" if nulls else f"{column} IS NOT NULL"]
+    args = []
+
+    filters = filters or {}
+    if filters.get("status"):
+        clauses.append("r.status = ?")
+        args.append(filters["status"])
+    for name, range_column in RANGE_FILTERS.items():
+        low, high = filters.get(name) or (None, None)
+        if low is not None:
+            clauses.append(f"{range_column} >= ?")
+            args.append(low)
+        if high is not None:
+            clauses.append(f"{range_column} <= ?")
+            args.append(high)
+    if any("rp." in clause for clause in clauses):
+        from_sql += f" {join} run_parameters rp ON rp.run_id = r.run_id"
+    return from_sql, clauses, args
+
+
+def _parameter_filter_estimate(filters):
+    """
+    (fraction, runs): estimated fraction of runs matching the run_parameters
+    range filters and the number of runs, from the per-value run counts in
+    param_rollups (filters assumed independent). None when the rollups are
+    empty.
+    """
+    fraction = 1.0
+    runs = 0.0
+    for name, range_column in RANGE_FILTERS.items():
+        low, high = (filters or {}).get(name) or (None, None)
+        if not range_column.startswith("rp.") or (low is None and high is None):
+            continue
+        # Rollups are named after their run_parameters column (dt filters on actual_dt)
+        rollup_name = range_column[len("rp."):]
+        row = _query(
+            "SELECT TOTAL(run_count), TOTAL(CASE WHEN param_value >= ? AND param_value <= ? THEN run_count END) "
+            "FROM param_rollups WHERE param_name = ?",
+            (low if low is not None else float("-inf"), high if high is not None else float("inf"), rollup_name),
+            one=True,
+        )
+        if not row[0]:
+            return None
+        fraction *= row[1] / row[0]
+        runs = max(runs, row[0])
+    return fraction, runs
+
+
+def _has_filters(filters) -> bool:
+    return any(value not in (None, "", (None, None)) for value in (filters or {}).values())
+
+
+def build_list_runs_query(limit: Optional[int] = None, after=None, sort: str = "timestamp",
+                          descending: bool = True, filters: Optional[Dict[str, Any]] = None,
+                          ordered: bool = False, null_tail: bool = False):
+    """
+    (sql, args) for one keyset page of the run listing: a single index walk
+    from the cursor, WHERE (column, run_id) > (?, ?) (< when descending).
+
+    Runs without a value for the sort column are listed last (by run_id) in
+    either direction, by their own query: null_tail=True or a cursor
+    pointing into them selects it. list_runs_summary continues a page with
+    them once the runs with a value run out.
+
+    Args:
+        after: (sort value, run_id) of the last row of the previous page; a
+            None sort value points into the runs without one.
+        filters: Optional status plus (min, max) ranges keyed by RANGE_FILTERS
+            names; either bound may be None.
+        ordered: Walk the sort index and filter on the way instead of
+            letting SQLite start from a parameter index.
+
+    Raises:
+        ValueError: If sort is not one of SORT_COLUMNS.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unsupported sort '{sort}' (use one of {', '.join(SORT_COLUMNS)})")
+    column, key = SORT_COLUMNS[sort]
+    nulls = sort != "run_id" and (null_tail or (after is not None and after[0] is None))
+    if nulls or sort == "run_id":
+        column = key = "r.run_id"
+    if nulls and after is not None and after[0] is not None:
+        after = None  # The tail starts after every run with a value
+    from_sql, clauses, args = _list_runs_from_where(sort, filters, ordered, nulls)
+    op = "<" if descending else ">"
+    if after is not None and column == key:
+        clauses.append(f"{key} {op} ?")
+        args.append(after[1])
+    elif after is not None:
+        clauses.append(f"({column}, {key}) {op} (?, ?)")
+        args.extend(after)
+
+    direction = "DESC" if descending else "ASC"
+    sql = f"SELECT {LIST_RUNS_COLUMNS} {from_sql}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {column} {direction}" + (f", {key} {direction}" if column != key else "")
+    if limit is not None:
+        sql += " LIMIT ?"
+        args.append(int(limit))
+    return sql, tuple(args)
+
+
+def list_runs_summary(limit: Optional[int] = None, after=None, sort: str = "timestamp",
+                      descending: bool = True, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Returns a lightweight summary of runs for the list view, one keyset page
+    at a time (all matching runs when limit is None).
+
+    With parameter filters, a page is cheapest found by walking the sort
+    index when matches are common (about limit / fraction rows visited) and
+    by the parameter index when they are rare (fraction * runs rows sorted);
+    the fraction is estimated from param_rollups.
+    """
+    try:
+        ordered = False
+        if limit is not None and any(name in (filters or {}) for name, column in RANGE_FILTERS.items()
+                                     if column.startswith("rp.")):
+            estimate = _parameter_filter_estimate(filters)
+            ordered = estimate is not None and estimate[0] ** 2 * estimate[1] > limit
+        rows = [dict(row) for row in _query(*build_list_runs_query(limit, after, sort, descending, filters, ordered))]
+        # The page ran out of runs with a sort value: continue with those without
+        if sort != "run_id" and (after is None or after[0] is not None) and (limit is None or len(rows) < limit):
+            remaining = None if limit is None else limit - len(rows)
+            rows += [dict(row) for row in _query(*build_list_runs_query(
+                remaining, None, sort, descending, filters, ordered, null_tail=True))]
+        return rows
+    except FileNotFoundError:
+        return []
     except Exception as e:
         print(f"DB Error: {e}")
         return []
 
+def count_runs(sort: str = "timestamp", filters: Optional[Dict[str, Any]] = None, cap: int = TOTAL_COUNT_CAP):
+    """
+    Number of runs the listing would return, as (total, capped). Without
+    filters every run is listed and the count is exact; filtered counts stop
+    at cap, in which case capped is True.
+    """
+    try:
+        if not _has_filters(filters):
+            return _query("SELECT COUNT(*) FROM runs", one=True)[0], False
+        from_sql, clauses, args = _list_runs_from_where(sort, filters, nulls=None)
+        inner = f"SELECT 1 {from_sql}"
+        if clauses:
+            inner += " WHERE " + " AND ".join(clauses)
+        row = _query(f"SELECT COUNT(*) FROM ({inner} LIMIT ?)", tuple(args) + (cap + 1,), one=True)
+        return min(row[0], cap), row[0] > cap
+    except FileNotFoundError:
+        return 0, False
+    except Exception as e:
+        print(f"DB Error: {e}")
+        return 0, False
+
 def get_run_details(run_id: str) -> Optional[Dict[str, Any]]:
     """
     Get generic run metadata.
     """
-    if not os.path.exists(DB_PATH):
-        return None
-
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
-        row = cursor.fetchone()
-        conn.close()
+        row = _query(RUN_DETAILS_SQL, (run_id,), one=True)
         return dict(row) if row else None
     except Exception:
         return None
+
+def get_param_rollups(param_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Per-parameter-value aggregates from the incrementally maintained
+    param_rollups table (one row per distinct value, no scan over runs).
+    """
+    query = PARAM_ROLLUPS_SQL
+    args = ()
+    if param_name:
+        query += " WHERE param_name = ?"
+        args = (param_name,)
+    query += " ORDER BY param_name, param_value"
+
+    try:
+        return [dict(row) for row in _query(query, args)]
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        print(f"DB Error: {e}")
+        return []
@@ -0,0 +1,343 @@
+"""
+Asynchronous simulation jobs for the API.
+
+A job is a sweep spec in the shape of configs/sweep.yaml ({"sweep": {...},
+"execution": {...}}) expanded over configs/base.yaml exactly like
+simulations/sweep.py. Its runs are planned with plan_tasks and each task is
+submitted to a persistent process pool whose workers have already imported
+numpy, pandas and the solver (and hashed the solver sources for the run
+cache), so a job starts without paying interpreter startup or imports.
+
+Completed runs, and runs a job found in the run cache, are ingested into
+the analytics DB by a single background thread (SQLite allows one writer)
+and added to the run registry, so a finished job's runs are immediately
+served by /runs and /runs/{run_id}/*.
+Cancelling a job cancels its tasks that have not started; tasks already
+running on a worker finish and are ingested (the job is "cancelling" until
+then). If a worker dies the pool is broken; the next submission replaces it.
+
+Jobs are opt-in (JOB_WORKERS, default 0): the API stays read-only unless
+they are enabled, and even then the manager, its pool and the DB schema are
+only set up by the first POST /jobs.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+from observability.logging import get_logger, log_event
+from scripts.ingest_data import DB_PATH, init_db, ingest_run, refresh_rollups
+from simulations.sweep import (load_config, build_param_combinations, plan_tasks, find_cached_run,
+                               _run_chunk, DEFAULT_TIMESERIES_FORMAT)
+from analysis.timeseries import TIMESERIES_FILES
+
+logger = get_logger(__name__)
+
+BASE_CONFIG_PATH = os.path.join(project_root, 'configs', 'base.yaml')
+DEFAULT_JOB_WORKERS = 0
+MAX_JOB_RUNS = 1000
+MAX_RETAINED_JOBS = 1000
+# Execution options a job may set (workers is the pool's)
+JOB_EXECUTION_OPTIONS = ("ensemble", "backend", "share_prefixes", "timeseries_format")
+
+TERMINAL_STATES = ("completed", "failed", "cancelled")
+
+
+def _warm_worker():
+    """Pool initializer: import the solver stack and hash its sources once per worker."""
+    import pandas  # noqa: F401  (used by analysis and parquet timeseries)
+    from simulations.sweep import code_fingerprint
+    code_fingerprint()
+
+
+def _ping():
+    return os.getpid()
+
+
+def build_job_params(spec: Dict) -> Tuple[Optional[List[Dict]], Optional[Dict], Optional[str]]:
+    """
+    Parameter combinations and execution options of a sweep spec.
+
+    Returns:
+        (params_list, execution, error): error is a message if the spec is invalid.
+    """
+    sweep = spec.get("sweep")
+    if not isinstance(sweep, dict) or not sweep:
+        return None, None, "Spec needs a non-empty 'sweep' mapping of parameter -> list of values"
+    for name, values in sweep.items():
+        if not isinstance(values, list) or not values:
+            return None, None, f"Sweep axis '{name}' must be a non-empty list"
+    n_runs = 1
+    for values in sweep.values():
+        n_runs *= len(values)
+    if n_runs > MAX_JOB_RUNS:
+        return None, None, f"Sweep has {n_runs} combinations (at most {MAX_JOB_RUNS} per job)"
+
+    execution = spec.get("execution") or {}
+    unknown = sorted(set(execution) - set(JOB_EXECUTION_OPTIONS))
+    if unknown:
+        return None, None, f"Unknown execution options {unknown} (use {list(JOB_EXECUTION_OPTIONS)})"
+    timeseries_format = execution.get("timeseries_format", DEFAULT_TIMESERIES_FORMAT)
+    if timeseries_format not in TIMESERIES_FILES:
+        return None, None, f"Unknown timeseries format '{timeseries_format}'. Available: {sorted(TIMESERIES_FILES)}"
+
+    base_params = load_config(BASE_CONFIG_PATH)['simulation']
+    return build_param_combinations(base_params, sweep), execution, None
+
+
+class Job:
+    """Status and progress of one submitted sweep."""
+
+    def __init__(self, job_id: str, n_runs: int):
+        self.job_id = job_id
+        self.status = "running"
+        self.total_runs = n_runs
+        self.cached_runs = 0
+        self.completed_runs = 0
+        self.failed_runs = 0
+        self.cancelled_runs = 0
+        self.ingested_runs = 0
+        self.run_ids: List[str] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.futures = []
+        self.pending_tasks = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self) -> Dict:
+        finished = self.cached_runs + self.completed_runs + self.failed_runs + self.cancelled_runs
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": finished / self.total_runs if self.total_runs else 1.0,
+            "total_runs": self.total_runs,
+            "cached_runs": self.cached_runs,
+            "completed_runs": self.completed_runs,
+            "failed_runs": self.failed_runs,
+            "cancelled_runs": self.cancelled_runs,
+            "ingested_runs": self.ingested_runs,
+            "run_ids": list(self.run_ids),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs jobs on a persistent, pre-warmed process pool and ingests their results."""
+
+    def __init__(self, workers: int = DEFAULT_JOB_WORKERS, output_dir: Optional[str] = None,
+                 db_path: str = DB_PATH):
+        from api.registry import configured_roots
+        self.workers = workers
+        self.output_dir = str(output_dir or configured_roots()[0])
+        self.db_path = db_path
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Reentrant: a future that is already done runs its callback in submit()
+        self._lock = threading.RLock()
+        self._pool = self._new_pool()
+        self._ingest = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-ingest")
+        os.makedirs(self.output_dir, exist_ok=True)
+        init_db(db_path)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: forking the threaded API process is unsafe
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_warm_worker)
+
+    def _submit_task(self, *args):
+        """Submit to the pool, replacing it once if a dead worker broke it."""
+        try:
+            return self._pool.submit(*args)
+        except BrokenProcessPool:
+            log_event(logger, "job_pool_replaced", "Worker pool was broken (a worker died); starting a new one")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            return self._pool.submit(*args)
+
+    def warm_up(self):
+        """Start every worker now (and wait for its imports) instead of on the first job."""
+        for future in [self._submit_task(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, spec: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Start a job for a sweep spec. Returns (job status, error); the error
+        says "unavailable" if the worker pool cannot be started.
+        """
+        params_list, execution, error = build_job_params(spec)
+        if error:
+            return None, error
+
+        job = Job(uuid.uuid4().hex[:12], len(params_list))
+        timeseries_format = execution.get("timeseries_format", DEFAULT_TIMESERIES_FORMAT)
+        pending, cached_dirs = [], []
+        for params in params_list:
+            cached = find_cached_run(params, self.output_dir, timeseries_format)
+            if cached:
+                job.cached_runs += 1
+                job.run_ids.append(os.path.basename(cached))
+                cached_dirs.append(cached)
+            else:
+                pending.append(params)
+
+        tasks = plan_tasks(pending, ensemble=bool(execution.get("ensemble", False)), workers=self.workers,
+                           share_prefixes=execution.get("share_prefixes", True))
+        run_options = {'backend': execution.get("backend"), 'correlation_id': job.job_id,
+                       'timeseries_format': timeseries_format}
+        log_event(logger, "job_submitted", f"Job {job.job_id}: {len(pending)} runs to compute in {len(tasks)} tasks",
+                  job_id=job.job_id, runs=len(params_list), cache_hits=job.cached_runs, tasks=len(tasks))
+
+        with self._lock:
+            submitted = []
+            try:
+                for kind, indices in tasks:
+                    task_params = [pending[i] for i in indices]
+                    submitted.append((self._submit_task(_run_chunk, [(kind, task_params)], self.output_dir,
+                                                        run_options), len(task_params)))
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                for future, _ in submitted:
+                    future.cancel()
+                log_event(logger, "job_submit_failed", "Could not submit job to the worker pool", error=str(e))
+                return None, f"Simulation workers unavailable: {e}"
+
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+            job.pending_tasks = len(submitted)
+            job.futures = [future for future, _ in submitted]
+            # Cache hits may come from another DB or predate it: ingest them too,
+            # queued ahead of the tasks' ingests (the job finishes after the last)
+            if cached_dirs or not submitted:
+                self._ingest.submit(self._ingest_runs, job, cached_dirs, not submitted)
+            for future, n_runs in submitted:
+                future.add_done_callback(lambda f, n=n_runs: self._task_done(job, f, n))
+        return job.to_dict(), None
+
+    def _task_done(self, job: Job, future, n_runs: int):
+        """Pool callback: record a task's outcome and queue its runs for ingest."""
+        run_dirs = []
+        with self._lock:
+            if future.cancelled():
+                job.cancelled_runs += n_runs
+            else:
+                try:
+                    run_dirs = [d for d in future.result()[0] if d]
+                except Exception as e:
+                    log_event(logger, "job_task_failed", f"Job {job.job_id} task FAILED", job_id=job.job_id,
+                              error=str(e))
+                job.completed_runs += len(run_dirs)
+                job.failed_runs += n_runs - len(run_dirs)
+                job.run_ids.extend(os.path.basename(d) for d in run_dirs)
+            job.pending_tasks -= 1
+            last = job.pending_tasks == 0
+        # One writer thread: ingests are serialized and the job finishes after its last one
+        self._ingest.submit(self._ingest_runs, job, run_dirs, last)
+
+    def _ingest_runs(self, job: Job, run_dirs: List[str], last: bool):
+        ingested = 0
+        try:
+            from api.registry import get_registry
+            get_registry().update(run_dirs)
+            ingested = sum(1 for run_dir in run_dirs if ingest_run(run_dir, self.db_path, refresh=False))
+            if last:
+                refresh_rollups(self.db_path)
+        except Exception as e:
+            # e.g. "database is locked" while a CLI ingest holds the write lock
+            log_event(logger, "job_ingest_failed", f"Job {job.job_id} ingest FAILED", job_id=job.job_id,
+                      error=str(e))
+            with self._lock:
+                job.error = f"Ingest failed: {e}"
+        finally:
+            with self._lock:
+                job.ingested_runs += ingested
+                if last:
+                    self._finish(job)
+
+    def _finish(self, job: Job):
+        if job.cancelled_runs:
+            job.status = "cancelled"
+        elif job.total_runs and job.failed_runs == job.total_runs:
+            job.status = "failed"
+        else:
+            job.status = "completed"
+        job.finished_at = time.time()
+        log_event(logger, "job_finished", f"Job {job.job_id} {job.status}", job_id=job.job_id, **{
+            k: v for k, v in job.to_dict().items() if k.endswith("_runs")})
+
+    def _evict_finished(self):
+        while len(self._jobs) > MAX_RETAINED_JOBS:
+            oldest = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest]
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Status of a job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def cancel(self, job_id: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Cancel a job's tasks that have not started. Returns (job status, error)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, f"Job {job_id} not found"
+            if job.done:
+                return None, f"Job {job_id} already {job.status}"
+            # Not terminal yet: started tasks still run and are ingested, and
+            # _finish decides whether anything was actually cancelled
+            job.status = "cancelling"
+            futures = list(job.futures)
+        # Outside the lock: cancel() runs the done callbacks synchronously
+        for future in futures:
+            future.cancel()
+        log_event(logger, "job_cancel_requested", f"Job {job_id} cancelling", job_id=job_id)
+        return self.get(job_id), None
+
+    def shutdown(self):
+        """Cancel queued tasks and stop the workers and the ingest thread."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._ingest.shutdown(wait=True)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def configured_workers() -> int:
+    """Worker processes for jobs from JOB_WORKERS (0, the default, disables the jobs API)."""
+    return int(os.environ.get("JOB_WORKERS", DEFAULT_JOB_WORKERS))
+
+
+def get_job_manager(create: bool = True) -> Optional[JobManager]:
+    """
+    The process-wide job manager; None if JOB_WORKERS=0, or if it was not
+    created yet and create is False (status lookups don't start workers).
+    """
+    global _manager
+    if _manager is None and create and configured_workers() > 0:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager(configured_workers())
+    return _manager
+
+
+def shutdown_job_manager():
+    """Stop the process-wide job manager's pool, if it was started."""
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.shutdown()
+            _manager = None
@@ -0,0 +1,146 @@
+"""
+Run ID -> run folder registry for the API.
+
+Every endpoint resolves run IDs through one in-memory index instead of
+probing each results folder per request. The index is seeded from the
+ingest ledger (sql/db_schema.sql) and rebuilt by scanning the configured
+result roots. Jobs (api/jobs.py) add the runs they ingest with update(); a
+lookup that misses asks the ledger for the run (an indexed point query), so
+runs ingested by the CLI in another process are found on their first
+request, and otherwise triggers a rescan (at most once per RESCAN_INTERVAL)
+for runs written but not ingested yet.
+
+Roots and the ledger's run_dir are compared in the same normalized form
+(ledger_root in scripts/ingest_data.py: symlinks resolved).
+
+Roots come from RESULTS_ROOTS (os.pathsep-separated, relative paths are
+taken from the project root) and are searched in order: a run ID present in
+several roots resolves to the first.
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from scripts.ingest_data import ledger_root
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_RESULTS_ROOTS = ("results/runs", "results/runs_smoke", "results/runs_ci")
+RESCAN_INTERVAL = 5.0
+
+
+def configured_roots() -> List[Path]:
+    """Result roots in lookup order, from RESULTS_ROOTS or DEFAULT_RESULTS_ROOTS."""
+    env = os.environ.get("RESULTS_ROOTS")
+    roots = [r for r in env.split(os.pathsep) if r] if env else DEFAULT_RESULTS_ROOTS
+    return [Path(ledger_root(os.path.join(project_root, root))) for root in roots]
+
+
+class RunRegistry:
+    """In-memory run_id -> run folder index over a list of result roots."""
+
+    def __init__(self, roots, db_path: Optional[str] = None, rescan_interval: float = RESCAN_INTERVAL):
+        self.roots = [Path(ledger_root(root)) for root in roots]
+        self.db_path = db_path
+        self.rescan_interval = rescan_interval
+        self._priority = {str(root): i for i, root in enumerate(self.roots)}
+        self._index: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._scanned_at: Optional[float] = None
+        if db_path:
+            self._index = dict(self._by_priority(self._ledger_rows("SELECT run_id, run_dir FROM ingest_ledger")))
+
+    def _ledger_rows(self, sql: str, args=()) -> list:
+        """(run_id, run_dir) rows of the ingest ledger; [] without a readable DB."""
+        if not self.db_path or not os.path.exists(self.db_path):
+            return []
+        try:
+            conn = sqlite3.connect(Path(self.db_path).resolve().as_uri() + "?mode=ro", uri=True)
+            try:
+                return conn.execute(sql, args).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return []
+
+    def _by_priority(self, run_dirs) -> List[tuple]:
+        """
+        (run_id, folder) of the (run_id, root) pairs under a configured root,
+        lowest-priority roots first so that earlier roots overwrite them.
+        """
+        known = [(run_id, ledger_root(root)) for run_id, root in run_dirs]
+        known = sorted((r for r in known if r[1] in self._priority), key=lambda r: -self._priority[r[1]])
+        return [(run_id, Path(root) / run_id) for run_id, root in known]
+
+    def update(self, run_dirs: Iterable[str]):
+        """Add (or re-point) freshly written or ingested run folders."""
+        found = self._by_priority((os.path.basename(d), os.path.dirname(os.path.abspath(d))) for d in run_dirs)
+        with self._lock:
+            for run_id, path in found:
+                current = self._index.get(run_id)
+                # Keep a run of a higher-priority root that still exists
+                if (current is None or not current.is_dir()
+                        or self._priority[str(path.parent)] <= self._priority.get(str(current.parent), len(self.roots))):
+                    self._index[run_id] = path
+
+    def scan(self) -> int:
+        """Rebuild the index from the result roots. Returns the number of runs."""
+        index = {}
+        for root in reversed(self.roots):
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            index[entry.name] = root / entry.name
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            self._index = index
+            self._scanned_at = time.monotonic()
+        return len(index)
+
+    def lookup(self, run_id: str) -> Optional[Path]:
+        """Run folder of run_id, or None if no root contains it."""
+        path = self._index.get(run_id)
+        if path is not None and path.is_dir():
+            return path
+        # Ingested since the index was built (e.g. by the CLI)
+        found = [path for _, path in self._by_priority(
+            self._ledger_rows("SELECT run_id, run_dir FROM ingest_ledger WHERE run_id = ?", (run_id,)))
+            if path.is_dir()]
+        if found:
+            with self._lock:
+                self._index[run_id] = found[-1]
+            return found[-1]
+        if self._scanned_at is None or time.monotonic() - self._scanned_at >= self.rescan_interval:
+            self.scan()
+            return self._index.get(run_id)
+        return None
+
+    def __len__(self):
+        return len(self._index)
+
+
+_registry: Optional[RunRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> RunRegistry:
+    """The process-wide registry over configured_roots(), created on first use."""
+    global _registry
+    if _registry is None:
+        from api.db import DB_PATH
+        with _registry_lock:
+            if _registry is None:
+                _registry = RunRegistry(configured_roots(), db_path=DB_PATH)
+    return _registry
+
+
+def reset_registry():
+    """Forget the process-wide registry (e.g. after changing RESULTS_ROOTS)."""
+    global _registry
+    with _registry_lock:
+        _registry = None
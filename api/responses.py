@@ -0,0 +1,80 @@
+"""
+Response helpers: fast JSON encoding and conditional GET.
+
+JSON bodies are encoded with orjson when it is installed (numpy arrays are
+serialized natively, without tolist()), falling back to FastAPI's encoder.
+
+Artifact-backed resources carry a version (etag, last_modified) computed
+from file stats (api.storage.get_*_version). Clients that send the ETag
+back in If-None-Match (or the date in If-Modified-Since) get an empty 304
+when nothing changed, so a repeat request costs a few stat() calls.
+"""
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Version = Tuple[str, float]
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response encoded with orjson if available. content may hold numpy arrays."""
+    if orjson is not None:
+        body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+    encoded = jsonable_encoder(content, custom_encoder={np.ndarray: lambda a: a.tolist()})
+    return JSONResponse(content=encoded, status_code=status_code, headers=headers)
+
+
+def validator_headers(version: Optional[Version]) -> Dict[str, str]:
+    """ETag, Last-Modified and Cache-Control (revalidate every time) for a resource version."""
+    if version is None:
+        return {}
+    etag, last_modified = version
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def _opaque_tag(tag: str) -> str:
+    # Weak comparison (RFC 7232): W/"x" matches "x"
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def not_modified(request: Request, version: Optional[Version]) -> Optional[Response]:
+    """
+    An empty 304 if the request's validators match version, else None.
+    If-None-Match takes precedence over If-Modified-Since.
+    """
+    if version is None:
+        return None
+    etag, last_modified = version
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_opaque_tag(tag) for tag in if_none_match.split(",")}
+        if "*" in tags or _opaque_tag(etag) in tags:
+            return Response(status_code=304, headers=validator_headers(version))
+        return None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return None
+        # HTTP dates have one-second resolution
+        if int(last_modified) <= since:
+            return Response(status_code=304, headers=validator_headers(version))
+    return None
@@ -1,6 +1,8 @@
 import os
 import json
 import sys
+import hashlib
+from functools import lru_cache
 from pathlib import Path
 
 # Add project root
@@ -8,56 +10,118 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
 # Import validation logic
-from scripts.validate_metrics import validate_run_metrics, load_schema as load_metrics_schema
+from scripts.validate_metrics import validate_run_metrics, validate_with
+from scripts.extract_metrics import extract_run_metrics, CANONICAL_METRICS_FILE
+from api.registry import get_registry
+from analysis.timeseries import read_window, lttb_indices, find_timeseries, pa
+from analysis.compare import profile_differences
 import jsonschema
+import numpy as np
 
-RESULTS_DIR = Path(project_root) / "results" / "runs"
-INSIGHTS_DIR = Path(project_root) / "results" / "runs" # Assuming insights are inside run dir or separate?
-# The generation script puts insights inside run_dir/insights/
+# Run folders are resolved through api.registry (RESULTS_ROOTS); insights live in run_dir/insights/
 # generate_ai_insights.py: out_path = run_path / "insights"
+INSIGHTS_SCHEMA_PATH = Path(project_root) / "ai" / "insights_schema.json"
+
+# Validated payloads are kept in memory, keyed on the run folder plus the
+# mtime/size of every artifact they were built from: a changed artifact
+# changes the key, so hot runs are served without touching their JSON files.
+PAYLOAD_CACHE_SIZE = 1024
+
+# POST /runs/batch and GET /compare limits
+MAX_BATCH_RUNS = 100
+BATCH_SECTIONS = ("metrics", "insights")
+# Profile differences are evaluated on at most this many baseline snapshots
+COMPARE_MAX_SNAPSHOTS = 500
+
+def _stat_key(path: Path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _artifact_version(artifact_key):
+    """
+    (etag, last_modified) of a resource built from the artifacts whose
+    _stat_key values are given: a weak ETag over the mtimes/sizes and the
+    newest mtime (epoch seconds). None if no artifact exists.
+    """
+    present = [key for key in artifact_key if key is not None]
+    if not present:
+        return None
+    digest = hashlib.sha1(repr(artifact_key).encode("ascii")).hexdigest()[:20]
+    return f'W/"{digest}"', max(mtime_ns for mtime_ns, _ in present) / 1e9
+
+def _metrics_artifact_key(run_dir: Path):
+    return tuple(_stat_key(run_dir / name) for name in ("metadata.json", "metrics.json", CANONICAL_METRICS_FILE))
+
+def _insights_paths(run_dir: Path, run_id: str):
+    insights_dir = run_dir / "insights"
+    return insights_dir / f"{run_id}.insights.json", insights_dir / f"{run_id}.insights.md"
+
+def get_metrics_version(run_id: str):
+    """(etag, last_modified) of a run's metrics payload from artifact stats alone, or None."""
+    run_dir = get_registry().lookup(run_id)
+    return _artifact_version(_metrics_artifact_key(run_dir)) if run_dir is not None else None
+
+def get_insights_version(run_id: str):
+    """(etag, last_modified) of a run's insights, or None if it has none."""
+    run_dir = get_registry().lookup(run_id)
+    if run_dir is None:
+        return None
+    json_path, md_path = _insights_paths(run_dir, run_id)
+    json_key = _stat_key(json_path)
+    return _artifact_version((json_key, _stat_key(md_path))) if json_key is not None else None
+
+def get_timeseries_version(run_id: str):
+    """(etag, last_modified) of a run's timeseries file plus metadata, or None."""
+    run_dir = get_registry().lookup(run_id)
+    path = find_timeseries(run_dir) if run_dir is not None else None
+    if path is None:
+        return None
+    # The companion times file of npy timeseries changes together with the values file
+    return _artifact_version((_stat_key(path), _stat_key(run_dir / "metadata.json")))
+
+def clear_payload_cache():
+    """Drop every cached metrics and insights payload."""
+    _validated_metrics.cache_clear()
+    _validated_insights.cache_clear()
+
+def payload_cache_stats():
+    """lru_cache statistics (hits, misses, maxsize, currsize) per payload cache."""
+    return {
+        "metrics": _validated_metrics.cache_info(),
+        "insights": _validated_insights.cache_info(),
+    }
 
 def get_run_metrics(run_id: str):
     """
     Retrieves and VALIDATES the canonical metrics.json for a run.
     Returns: (payload, error_message)
     """
-
-    # Try finding the run directory
-    # Run ID is folder name in results/runs/ usually, but let's search or assume standard structure
-    # Robust Lookup: Check main runs, then smoke runs, then ci runs
-    candidate_roots = [
-        RESULTS_DIR,
-        Path(project_root) / "results" / "runs_smoke",
-        Path(project_root) / "results" / "runs_ci"
-    ]
-    
-    run_dir = None
-    for root in candidate_roots:
-        candidate = root / run_id
-        if candidate.exists():
-            run_dir = candidate
-            break
-            
-    # Check if run exists
-    if not run_dir or not run_dir.exists():
+    run_dir = get_registry().lookup(run_id)
+    if run_dir is None:
         return None, "Run directory not found in known results paths."
 
-    metrics_path = run_dir / "metrics.json" # Wait, Day 3 script (extract_metrics) puts it somewhere?
-    # extract_metrics.py prints to stdout or file. 
-    # Standard practice here: The pipeline should have persisted "metrics.json" to the run folder.
-    # Day 3 extract_metrics can output anywhere. 
-    # Let's assume for the API that we expect a 'canonical_metrics.json' or 'metrics.json' in the run dir.
-    # We will look for 'metrics.json' first (raw) or 'canonical_metrics.json'.
-    # Actually, Day 3 extract_metrics is a tool. We need to ensure it was RUN.
-    # For this Day 5 implementation, we will try to load 'canonical_metrics.json' if it exists,
-    # or generate it on fly using extract_run_metrics logic (but read-only means we shouldn't write).
-    # Let's import the extractor to be safe and generated in-memory if file missing but raw artifacts exist.
-    
-    from scripts.extract_metrics import extract_run_metrics
-    
+    return _validated_metrics(str(run_dir), _metrics_artifact_key(run_dir))
+
+@lru_cache(maxsize=PAYLOAD_CACHE_SIZE)
+def _validated_metrics(run_dir: str, artifact_key):
+    """
+    Canonical payload of a run and its validation result, as (payload, error).
+    Uses the canonical file materialized at ingest when it is newer than the
+    raw artifacts, otherwise extracts from metadata.json and metrics.json.
+    """
+    metadata_key, metrics_key, canonical_key = artifact_key
     try:
-        # Generate fresh from artifacts (guarantees up to date)
-        payload = extract_run_metrics(str(run_dir))
+        if (canonical_key and metadata_key and metrics_key
+                and canonical_key[0] >= max(metadata_key[0], metrics_key[0])):
+            with open(Path(run_dir) / CANONICAL_METRICS_FILE, 'r') as f:
+                payload = json.load(f)
+        else:
+            # Generate fresh from artifacts (guarantees up to date)
+            payload = extract_run_metrics(run_dir)
         
         # Validate
         is_valid, errors = validate_run_metrics(payload)
@@ -76,28 +140,28 @@ def get_run_insights(run_id: str):
     Retrieves and VALIDATES the insights.json for a run.
     Returns: (json_payload, md_content, error_message)
     """
-    run_dir = RESULTS_DIR / run_id
-    insights_dir = run_dir / "insights"
-    json_path = insights_dir / f"{run_id}.insights.json"
-    md_path = insights_dir / f"{run_id}.insights.md"
+    run_dir = get_registry().lookup(run_id)
+    if run_dir is None:
+        return None, None, "Insights not found: run directory not found in known results paths."
+    json_path, md_path = _insights_paths(run_dir, run_id)
     
-    if not json_path.exists():
+    json_key = _stat_key(json_path)
+    if json_key is None:
         return None, None, "Insights not found. Run 'scripts/generate_ai_insights.py' first."
-        
+    return _validated_insights(str(json_path), str(md_path), (json_key, _stat_key(md_path)))
+
+@lru_cache(maxsize=PAYLOAD_CACHE_SIZE)
+def _validated_insights(json_path: str, md_path: str, artifact_key):
+    """Validated insights JSON and markdown of a run, as (data, md, error)."""
     try:
         with open(json_path, 'r') as f:
             data = json.load(f)
             
-        # Validate Schema
-        # We need to import the schema loading from somewhere or just load strictly
-        schema_path = Path(project_root) / "ai" / "insights_schema.json"
-        with open(schema_path, 'r') as f:
-            schema = json.load(f)
-            
-        jsonschema.validate(instance=data, schema=schema)
+        # Validate Schema (validator compiled once per process)
+        validate_with(str(INSIGHTS_SCHEMA_PATH), data)
         
         md_content = ""
-        if md_path.exists():
+        if artifact_key[1] is not None:
             with open(md_path, 'r') as f:
                 md_content = f.read()
                 
@@ -107,3 +171,140 @@ def get_run_insights(run_id: str):
         return None, None, f"Invalid Insights Schema: {e.message}"
     except Exception as e:
         return None, None, f"Error reading insights: {e}"
+
+def get_run_timeseries(run_id: str, t_min=None, t_max=None, x_start=None, x_stop=None,
+                       stride: int = 1, x_stride: int = 1, max_snapshots=None):
+    """
+    A window of a run's temperature field, optionally thinned: every
+    stride-th snapshot and x_stride-th grid point, then at most
+    max_snapshots snapshots picked by LTTB on the window's peak temperature.
+    Binary timeseries are memory-mapped, so only the window is read.
+
+    Returns: (data, error_message) with data holding numpy arrays
+        times (n,), x (m,) grid positions, x_index (m,) grid indices and
+        values (n, m).
+    """
+    run_dir = get_registry().lookup(run_id)
+    if run_dir is None:
+        return None, "Run directory not found in known results paths."
+
+    try:
+        times, values = read_window(run_dir, t_min, t_max, x_start, x_stop)
+        with open(run_dir / "metadata.json", 'r') as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None, "Timeseries not found for this run."
+    except Exception as e:
+        return None, f"Error reading timeseries: {e}"
+
+    nx = int(meta.get("nx", 0)) or values.shape[1]
+    if (x_start is not None and x_start >= nx) or (x_start is not None and x_stop is not None and x_start >= x_stop):
+        return None, f"Empty grid window x_start={x_start}, x_stop={x_stop} (the run has {nx} points)"
+    x_index = np.arange(nx)[x_start:x_stop][::x_stride]
+    x = x_index * (float(meta.get("L", 1.0)) / (nx - 1) if nx > 1 else 0.0)
+    times = times[::stride]
+    values = values[::stride, ::x_stride]
+    if max_snapshots and len(times) > max_snapshots and values.shape[1]:
+        keep = lttb_indices(times, values.max(axis=1), max_snapshots)
+        times, values = times[keep], values[keep]
+
+    return {"times": np.asarray(times), "x": x, "x_index": x_index, "values": values}, None
+
+def encode_timeseries(data, fmt: str):
+    """
+    Binary encodings of get_run_timeseries data, as (body, media_type):
+
+      f32:   little-endian float32 times (n), x (m), then values (n*m, row-major)
+      arrow: Arrow IPC stream with a float64 time column and float32 p<index> columns
+
+    Raises:
+        ImportError: For arrow without pyarrow installed.
+    """
+    times, x, values = data["times"], data["x"], data["values"]
+    if fmt == "f32":
+        body = b"".join(np.ascontiguousarray(a, dtype="<f4").tobytes() for a in (times, x, values))
+        return body, "application/octet-stream"
+    if pa is None:
+        raise ImportError("pyarrow is required for the arrow timeseries format")
+    values = np.asarray(values, dtype=np.float32)
+    table = pa.table({"time": np.asarray(times, dtype=float),
+                      **{f"p{i}": values[:, k] for k, i in enumerate(data["x_index"])}})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream"
+
+def get_runs_batch(run_ids, include=BATCH_SECTIONS):
+    """
+    Metrics and/or insights of several runs in one call, each with its own
+    error (same messages as the single-run functions).
+
+    Returns: {run_id: {"metrics", "metrics_error", "insights", "insights_error"}}
+    """
+    results = {}
+    for run_id in dict.fromkeys(run_ids):
+        entry = {}
+        if "metrics" in include:
+            entry["metrics"], entry["metrics_error"] = get_run_metrics(run_id)
+        if "insights" in include:
+            data, md, error = get_run_insights(run_id)
+            entry["insights"] = {"json": data, "markdown": md} if error is None else None
+            entry["insights_error"] = error
+        results[run_id] = entry
+    return results
+
+def _metric_delta(value, base):
+    """value - base if both are numbers (bools excluded), else None."""
+    if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in (value, base)):
+        return None
+    return value - base
+
+def compare_runs(baseline: str, candidates, max_snapshots: int = COMPARE_MAX_SNAPSHOTS):
+    """
+    Performance metrics, their deltas (candidate - baseline, None unless both
+    values are numbers) and profile L2/L-inf differences over time for each candidate against the baseline.
+    The baseline is strided to at most max_snapshots snapshots; candidates
+    are resampled onto its times and grid (see analysis.compare).
+
+    Returns: (result, error_message); error_message only when the baseline
+        itself cannot be loaded. Candidate problems are reported per candidate.
+    """
+    base_metrics, error = get_run_metrics(baseline)
+    if error:
+        return None, error
+    base_perf = base_metrics.get("performance_metrics", {})
+
+    base_series, base_series_error = get_run_timeseries(baseline)
+    if base_series is not None:
+        stride = max(1, -(-len(base_series["times"]) // max_snapshots))
+        base_profile = (base_series["times"][::stride], base_series["x"], base_series["values"][::stride])
+
+    comparisons = []
+    profiled = []
+    for run_id in dict.fromkeys(candidates):
+        entry = {"run_id": run_id, "performance_metrics": None, "metric_deltas": None, "error": None,
+                 "profile_diff": None, "profile_error": None}
+        metrics, error = get_run_metrics(run_id)
+        if error:
+            entry["error"] = error
+        else:
+            perf = entry["performance_metrics"] = metrics.get("performance_metrics", {})
+            entry["metric_deltas"] = {k: _metric_delta(perf.get(k), base_perf.get(k)) for k in {**base_perf, **perf}}
+
+        if base_series is None:
+            entry["profile_error"] = f"Baseline: {base_series_error}"
+        else:
+            series, series_error = get_run_timeseries(run_id)
+            if series is None:
+                entry["profile_error"] = series_error
+            else:
+                profiled.append((entry, (series["times"], series["x"], series["values"])))
+        comparisons.append(entry)
+
+    if profiled:
+        diffs = profile_differences(base_profile, [series for _, series in profiled])
+        for (entry, _), (diff, diff_error) in zip(profiled, diffs):
+            entry["profile_diff"] = diff
+            entry["profile_error"] = diff_error
+
+    return {"baseline": baseline, "baseline_metrics": base_perf, "comparisons": comparisons}, None
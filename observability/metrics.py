@@ -0,0 +1,193 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A small dependency-free registry of counters, gauges and histograms with
+labels. Recording is a dict lookup plus a locked increment (a histogram
+adds one bisect over its buckets), so it stays at around a microsecond;
+cumulative bucket counts and the text output are only built when the
+registry is rendered for a scrape. Values owned by other code (e.g.
+lru_cache statistics) are exported through collectors, callables that are
+read at scrape time and cost nothing per request.
+"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; suited to API latencies from sub-millisecond cache hits to slow scans
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (labels, value) pairs of one metric family
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = self._header()
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests served. Label values are passed positionally."""
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        values = self._values
+        with self._lock:
+            values[labels] = values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight."""
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        values = self._values
+        with self._lock:
+            values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        values = self._values
+        with self._lock:
+            values[labels] = values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Distribution over fixed upper bounds (le), exported with _bucket, _sum and _count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._children: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        child = self._children.get(labels)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+        with self._lock:
+            child[0][index] += 1
+            child[1] += value
+
+    def count(self, *labels) -> int:
+        child = self._children.get(labels)
+        return sum(child[0]) if child else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            children = sorted((labels, list(counts), total) for labels, (counts, total) in self._children.items())
+        lines = self._header()
+        bucket_names = self.labelnames + ("le",)
+        for labels, counts, total in children:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_names, labels + (_format_value(bound),))} "
+                             f"{cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+
+class MetricsRegistry:
+    """Named metrics and scrape-time collectors, rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Tuple[str, str, str, Callable[[], Samples]]] = []
+
+    def _add(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} already registered with another type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, name: str, kind: str, documentation: str, collect: Callable[[], Samples]):
+        """Export collect()'s (labels, value) samples as metric `name` of type kind on every scrape."""
+        self._collectors.append((name, kind, documentation, collect))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for name, kind, documentation, collect in self._collectors:
+            lines.append(f"# HELP {name} {_escape(documentation)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Reset every metric's values (collectors are kept)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,96 @@
+"""
+Benchmark the explicit stencil kernel backends across grid sizes.
+
+Each backend advances the same initial profile for a fixed number of steps;
+the best of several repeats is reported as time per step. Results are
+printed as a Markdown table and can optionally be saved as JSON.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from simulations.kernels import KERNEL_BACKENDS, available_backends
+
+
+def benchmark_backend(kernel, nx, n_steps, repeats):
+    x = np.linspace(0, 1.0, nx)
+    u0 = np.exp(-100 * (x - 0.5)**2)
+    r = 0.45
+
+    # Warm-up (triggers JIT compilation for numba)
+    kernel(u0.copy(), r, 2)
+
+    best = float("inf")
+    for _ in range(repeats):
+        u = u0.copy()
+        start = time.perf_counter()
+        kernel(u, r, n_steps)
+        best = min(best, time.perf_counter() - start)
+    return best, u
+
+
+def run_benchmark(grid_sizes, n_steps, repeats):
+    backends = available_backends()
+    rows = []
+    for nx in grid_sizes:
+        reference = None
+        for name in backends:
+            seconds, u = benchmark_backend(KERNEL_BACKENDS[name], nx, n_steps, repeats)
+            if reference is None:
+                reference = (seconds, u)
+            rows.append({
+                "backend": name,
+                "nx": nx,
+                "steps": n_steps,
+                "seconds": seconds,
+                "us_per_step": seconds / n_steps * 1e6,
+                "speedup_vs_numpy": reference[0] / seconds,
+                "max_abs_diff_vs_numpy": float(np.max(np.abs(u - reference[1]))),
+            })
+    return rows
+
+
+def format_markdown(rows):
+    lines = [
+        "| backend | nx | us/step | speedup vs numpy | max abs diff vs numpy |",
+        "| --- | --- | --- | --- | --- |",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {r['backend']} | {r['nx']} | {r['us_per_step']:.2f} | "
+            f"{r['speedup_vs_numpy']:.2f}x | {r['max_abs_diff_vs_numpy']:.1e} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stencil kernel backends.")
+    parser.add_argument("--nx", type=int, nargs="+", default=[50, 200, 1000, 5000, 20000],
+                        help="Grid sizes to benchmark")
+    parser.add_argument("--steps", type=int, default=2000, help="Time steps per measurement")
+    parser.add_argument("--repeats", type=int, default=3, help="Repeats (best is reported)")
+    parser.add_argument("--output", type=str, default=None, help="Optional path for JSON results")
+    args = parser.parse_args()
+
+    missing = sorted(set(KERNEL_BACKENDS) - set(available_backends()))
+    if missing:
+        print(f"Skipping unavailable backends: {', '.join(missing)}")
+
+    rows = run_benchmark(args.nx, args.steps, args.repeats)
+    print(format_markdown(rows))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Benchmark the analytics SQL against synthetic run databases.
+
+For each requested size a SQLite database is generated with the real schema
+(sql/db_schema.sql) and realistic parameter distributions, then every bundled
+query in sql/ and every API query (api/db.py) is timed (best of several
+repeats) and its EXPLAIN QUERY PLAN captured. Plans that scan a table without
+an index are flagged. Results are printed as a Markdown table and can be saved
+as JSON; pass a previous JSON report with --compare to see the change per
+query across commits.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from api.db import DEFAULT_PAGE_SIZE, RUN_DETAILS_SQL, PARAM_ROLLUPS_SQL, build_list_runs_query
+from scripts.rollups import rebuild_rollups
+
+SQL_DIR = os.path.join(project_root, 'sql')
+SCHEMA_PATH = os.path.join(SQL_DIR, 'db_schema.sql')
+
+# Synthetic sweep axes, shaped like configs/sweep.yaml grids
+ALPHAS = np.round(np.linspace(0.01, 0.5, 200), 5)
+NXS = np.array([25, 50, 100, 200, 400])
+T_MAXS = np.array([0.1, 0.25, 0.5, 1.0])
+SAVE_INTERVALS = np.array([10, 20, 50])
+
+GENERATE_BATCH = 50000
+
+
+def generate_db(db_path, n_runs, seed=0):
+    """Create a database of n_runs synthetic runs (all tables, rollups and ANALYZE statistics)."""
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(db_path)
+    with open(SCHEMA_PATH, 'r') as f:
+        conn.executescript(f.read())
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    start_ts = np.datetime64('2025-01-01T00:00:00')
+    with conn:
+        for offset in range(0, n_runs, GENERATE_BATCH):
+            n = min(GENERATE_BATCH, n_runs - offset)
+            ids = [f"run_{i:010x}" for i in range(offset, offset + n)]
+            alpha = rng.choice(ALPHAS, n)
+            nx = rng.choice(NXS, n)
+            t_max = rng.choice(T_MAXS, n)
+            save_interval = rng.choice(SAVE_INTERVALS, n)
+            dx = 1.0 / (nx - 1)
+            actual_dt = 0.45 * dx**2 / alpha
+            stability = alpha * actual_dt / dx**2
+            # A few percent of runs use a user-set dt beyond the stability limit
+            unstable = rng.random(n) < 0.03
+            stability[unstable] = rng.uniform(0.5, 1.0, unstable.sum())
+            max_temp = np.exp(-alpha * t_max * 20) * rng.uniform(0.9, 1.0, n)
+            seconds = np.sort(rng.integers(0, 3600 * 24 * 365, n))
+            timestamps = (start_ts + seconds.astype('timedelta64[s]')).astype(str)
+
+            conn.executemany(
+                "INSERT INTO runs (run_id, timestamp, status, duration_ms, git_commit_hash, platform, python_version) "
+                "VALUES (?, ?, 'SUCCESS', 0.0, NULL, 'Linux', '3.11')",
+                zip(ids, timestamps.tolist()))
+            conn.executemany(
+                "INSERT INTO parameters (run_id, param_name, param_value) VALUES (?, ?, ?)",
+                ((rid, name, str(value))
+                 for rid, a, x, t, si in zip(ids, alpha.tolist(), nx.tolist(), t_max.tolist(), save_interval.tolist())
+                 for name, value in (('L', 1.0), ('nx', x), ('alpha', a), ('t_max', t), ('dt', None),
+                                     ('save_interval', si))))
+            conn.executemany(
+                "INSERT INTO run_parameters (run_id, alpha, nx, dt, actual_dt, L, t_max, save_interval, scheme) "
+                "VALUES (?, ?, ?, NULL, ?, 1.0, ?, ?, 'explicit')",
+                zip(ids, alpha.tolist(), nx.tolist(), actual_dt.tolist(), t_max.tolist(), save_interval.tolist()))
+            conn.executemany(
+                "INSERT INTO metrics (run_id, max_temperature, min_temperature, mean_temperature, "
+                "energy_like_metric, stability_ratio) VALUES (?, ?, 0.0, ?, ?, ?)",
+                zip(ids, max_temp.tolist(), (max_temp * 0.2).tolist(), (max_temp**2 * 0.1).tolist(),
+                    stability.tolist()))
+    rebuild_rollups(conn)
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def benchmark_queries(n_runs):
+    """(name, sql, args) of every query to time."""
+    queries = []
+    for name in sorted(os.listdir(SQL_DIR)):
+        if name.endswith('.sql') and name != 'db_schema.sql':
+            with open(os.path.join(SQL_DIR, name), 'r') as f:
+                queries.append((f"sql/{name}", f.read(), ()))
+    probe_id = f"run_{n_runs // 2:010x}"
+    queries += [
+        ("api: list_runs_summary", *build_list_runs_query(DEFAULT_PAGE_SIZE)),
+        ("api: list_runs_summary (alpha filter)",
+         *build_list_runs_query(DEFAULT_PAGE_SIZE, filters={"alpha": (0.1, 0.2)}, ordered=True)),
+        ("api: list_runs_summary (by stability)", *build_list_runs_query(DEFAULT_PAGE_SIZE, sort="stability_ratio")),
+        ("api: get_run_details", RUN_DETAILS_SQL, (probe_id,)),
+        ("api: get_param_rollups", PARAM_ROLLUPS_SQL + " WHERE param_name = ?", ('alpha',)),
+    ]
+    return queries
+
+
+def full_scans(plan):
+    """Tables scanned without an index ('SCAN t' rather than 'SCAN t USING ... INDEX')."""
+    return [line.split()[1] for line in plan
+            if line.startswith('SCAN ') and 'INDEX' not in line and 'CONSTANT ROW' not in line]
+
+
+def time_query(conn, sql, args, repeats):
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, args)]
+    best = float("inf")
+    rows = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = len(conn.execute(sql, args).fetchall())
+        best = min(best, time.perf_counter() - start)
+    return best, rows, plan
+
+
+def run_benchmark(sizes, repeats, db_dir, seed=0):
+    results = []
+    for n_runs in sizes:
+        db_path = os.path.join(db_dir, f"bench_{n_runs}_{seed}.db")
+        if not os.path.exists(db_path):
+            start = time.perf_counter()
+            generate_db(db_path, n_runs, seed=seed)
+            print(f"Generated {n_runs} runs in {time.perf_counter() - start:.1f}s ({db_path})")
+        conn = sqlite3.connect(db_path)
+        for name, sql, args in benchmark_queries(n_runs):
+            seconds, rows, plan = time_query(conn, sql, args, repeats)
+            results.append({
+                "query": name,
+                "n_runs": n_runs,
+                "ms": seconds * 1e3,
+                "rows": rows,
+                "plan": plan,
+                "full_scans": full_scans(plan),
+            })
+        conn.close()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                                       stderr=subprocess.DEVNULL).decode('ascii').strip()
+    except Exception:
+        return None
+
+
+def format_markdown(rows, baseline=None):
+    previous = {}
+    if baseline:
+        previous = {(r["query"], r["n_runs"]): r["ms"] for r in baseline.get("results", [])}
+    lines = [
+        "| query | runs | ms | rows | full scans | vs baseline |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for r in rows:
+        before = previous.get((r["query"], r["n_runs"]))
+        change = f"{r['ms'] / before:.2f}x" if before else "-"
+        lines.append(
+            f"| {r['query']} | {r['n_runs']} | {r['ms']:.2f} | {r['rows']} | "
+            f"{', '.join(r['full_scans']) or '-'} | {change} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytics SQL on synthetic run databases.")
+    parser.add_argument("--runs", type=int, nargs="+", default=[100000, 1000000],
+                        help="Database sizes (number of runs)")
+    parser.add_argument("--repeats", type=int, default=3, help="Repeats per query (best is reported)")
+    parser.add_argument("--db-dir", type=str, default=None,
+                        help="Directory for generated databases; existing ones are reused (default: temp dir)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic runs")
+    parser.add_argument("--output", type=str, default=None, help="Optional path for the JSON report")
+    parser.add_argument("--markdown", type=str, default=None, help="Optional path for the Markdown report")
+    parser.add_argument("--compare", type=str, default=None, help="Previous JSON report to compare against")
+    parser.add_argument("--show-plans", action="store_true", help="Print the query plans")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_dir = args.db_dir or tmp_dir
+        os.makedirs(db_dir, exist_ok=True)
+        rows = run_benchmark(args.runs, args.repeats, db_dir, seed=args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    table = format_markdown(rows, baseline)
+    print(table)
+    if args.show_plans:
+        for r in rows:
+            print(f"\n{r['query']} ({r['n_runs']} runs):")
+            for line in r["plan"]:
+                print(f"  {line}")
+
+    report = {
+        "git_commit": _git_commit(),
+        "sqlite_version": sqlite3.sqlite_version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": rows,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.output}")
+    if args.markdown:
+        with open(args.markdown, "w") as f:
+            f.write(f"# SQL benchmark ({report['git_commit']}, SQLite {report['sqlite_version']})\n\n{table}\n")
+        print(f"Saved report to {args.markdown}")
+
+
+if __name__ == "__main__":
+    main()
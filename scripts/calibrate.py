@@ -16,7 +16,7 @@ import time
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from simulations.solver import HeatEquationSolver1D
+from simulations.solver import SpectralHeatSolver
 
 def run_forward_model(alpha, target_temp):
     """
@@ -27,15 +27,14 @@ def run_forward_model(alpha, target_temp):
     nx = 50
     t_max = 0.5
     
-    # Run Solver
-    solver = HeatEquationSolver1D(L=L, nx=nx, alpha=alpha, t_max=t_max)
+    # Run Solver: closed-form DST evaluation reproducing the explicit scheme
+    solver = SpectralHeatSolver(L=L, nx=nx, alpha=alpha, t_max=t_max, mode="explicit")
     
     # Consistent initial condition
     solver.set_initial_condition(lambda x: np.exp(-100 * (x - 0.5)**2))
     
-    # Solve (we only need the final state)
-    history = solver.solve(save_interval=999999) # Don't save intermediate steps
-    final_u = history[-1][1]
+    # Solve (we only need the final state, no time stepping)
+    _, final_u = solver.solve(history="final")
     
     max_temp = np.max(final_u)
     return max_temp - target_temp
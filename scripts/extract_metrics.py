@@ -9,9 +9,13 @@ sys.path.append(project_root)
 from pathlib import Path
 from datetime import datetime
 from observability.logging import get_logger, log_event
+from scripts.validate_metrics import is_unconditionally_stable
 
 logger = get_logger(__name__)
 
+# Canonical payload materialized next to the raw artifacts (ingest --materialize)
+CANONICAL_METRICS_FILE = "canonical_metrics.json"
+
 def extract_run_metrics(run_dir):
     """
     Extracts metrics from a run directory and formats them according to the canonical schema.
@@ -39,6 +43,10 @@ def extract_run_metrics(run_dir):
         "L": float(meta.get("L", 1.0)),
         "t_max": float(meta.get("t_max", 0.5))
     }
+    if meta.get("scheme"):
+        parameter_set["scheme"] = meta["scheme"]
+    if meta.get("mode"):
+        parameter_set["mode"] = meta["mode"]
 
     # 2. Performance Metrics
     performance_metrics = {
@@ -52,7 +60,10 @@ def extract_run_metrics(run_dir):
     # 3. Quality Metrics
     # In this solver, currently we assume convergence if it finished. 
     # Real logic would check residuals. Here we check stability.
-    is_stable = performance_metrics["stability_ratio"] <= 0.5
+    is_stable = (
+        performance_metrics["stability_ratio"] <= 0.5
+        or is_unconditionally_stable(parameter_set.get("scheme"), parameter_set.get("mode"))
+    )
     
     # Calculate dx from L and nx if available
     L = parameter_set["L"]
@@ -84,6 +95,22 @@ def extract_run_metrics(run_dir):
 
     return canonical_payload
 
+def materialize_canonical_metrics(run_dir):
+    """
+    Write the canonical payload to CANONICAL_METRICS_FILE in the run folder
+    (atomically), so the API can serve it without re-extracting. It is only
+    used while newer than metadata.json and metrics.json.
+
+    Returns: path of the written file
+    """
+    payload = extract_run_metrics(run_dir)
+    out_path = Path(run_dir) / CANONICAL_METRICS_FILE
+    tmp_path = out_path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, out_path)
+    return out_path
+
 def main():
     parser = argparse.ArgumentParser(description="Extract canonical metrics from run artifacts.")
     parser.add_argument("--run-dir", type=str, required=True, help="Path to simulation run directory")
@@ -12,7 +12,7 @@ sys.path.append(project_root)
 
 # Imports from previous days
 from scripts.extract_metrics import extract_run_metrics
-from scripts.validate_metrics import validate_run_metrics
+from scripts.validate_metrics import validate_run_metrics, validate_with
 from ai.prompt_templates import SYSTEM_PROMPT, build_user_prompt
 from ai.azure_openai_client import EngineeringAIClient
 
@@ -111,8 +111,7 @@ def generate_insights_for_run(run_dir, client, output_dir=None, mock=False):
                 insights_json = json.loads(raw_response)
                 
                 # 6. Validate Output Schema
-                schema = load_insights_schema()
-                jsonschema.validate(instance=insights_json, schema=schema)
+                validate_with(INSIGHTS_SCHEMA_PATH, insights_json)
                 
                 # 7. Save Artifacts
                 # JSON
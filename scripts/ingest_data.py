@@ -3,6 +3,8 @@ import json
 import os
 import sys
 import argparse
+import hashlib
+import time
 from pathlib import Path
 
 # Add project root to path
@@ -12,6 +14,9 @@ sys.path.append(project_root)
 # Observability imports
 from observability.logging import get_logger, log_event
 from observability.timing import Timer
+from scripts.extract_metrics import CANONICAL_METRICS_FILE, materialize_canonical_metrics
+from scripts.rollups import (apply_rollup_deltas, contribution, fetch_contributions,
+                             refresh_dirty_rollups, rebuild_rollups)
 
 logger = get_logger(__name__)
 
@@ -24,76 +29,302 @@ def init_db(db_path=DB_PATH):
     conn = sqlite3.connect(db_path)
     with open(SCHEMA_PATH, 'r') as f:
         schema = f.read()
+    legacy_ledger = take_legacy_ledger(conn)
     conn.executescript(schema)
+    if legacy_ledger:
+        with conn:
+            conn.executemany(UPSERT_LEDGER_ROW_SQL, legacy_ledger)
+        log_event(logger, "ledger_migrated", f"Re-keyed {len(legacy_ledger)} ingest ledger rows per results folder",
+                  count=len(legacy_ledger))
+    # WAL is persistent: the API's read-only connections keep reading while ingest writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    backfilled = backfill_actual_dt(conn)
+    # Backfill rollups for databases ingested before param_rollups existed, or
+    # before dt and actual_dt were rolled up separately
+    has_runs = conn.execute("SELECT 1 FROM run_parameters LIMIT 1").fetchone() is not None
+    missing_actual_dt = (
+        conn.execute("SELECT 1 FROM param_rollups WHERE param_name = 'actual_dt' LIMIT 1").fetchone() is None
+        and conn.execute("SELECT 1 FROM run_parameters WHERE actual_dt IS NOT NULL LIMIT 1").fetchone() is not None
+    )
+    if has_runs and (backfilled or missing_actual_dt
+                     or conn.execute("SELECT 1 FROM param_rollups LIMIT 1").fetchone() is None):
+        rebuild_rollups(conn)
     conn.close()
     log_event(logger, "db_initialized", f"Database initialized at {db_path}")
 
-def ingest_run(run_dir, db_path=DB_PATH):
-    """Ingest a single run directory into the database."""
+def ledger_root(path):
+    """The form of a results folder stored in ingest_ledger.run_dir (symlinks resolved)."""
+    return os.path.realpath(path)
+
+def take_legacy_ledger(conn):
+    """
+    Drop an ingest_ledger keyed on run_id alone (before it was keyed per
+    results folder) and return its rows, run_dir normalized, for re-insertion
+    into the new table. Returns [] for current or missing ledgers.
+    """
+    columns = conn.execute("PRAGMA table_info(ingest_ledger)").fetchall()
+    if [col[1] for col in sorted(columns, key=lambda col: col[5]) if col[5]] != ['run_id']:
+        return []
+    rows = conn.execute("SELECT run_dir, run_id, fingerprint, ingested_at FROM ingest_ledger "
+                        "WHERE run_dir IS NOT NULL").fetchall()
+    with conn:
+        conn.execute("DROP TABLE ingest_ledger")
+    return [(ledger_root(run_dir), run_id, fingerprint, ingested_at)
+            for run_dir, run_id, fingerprint, ingested_at in rows]
+
+def backfill_actual_dt(conn):
+    """
+    Fill run_parameters.actual_dt of runs backfilled from `parameters` (which
+    never stores it) from their metadata.json, found through the ingest
+    ledger. Returns the number of runs updated.
+    """
+    rows = conn.execute(
+        "SELECT rp.run_id, MIN(l.run_dir) FROM run_parameters rp "
+        "JOIN ingest_ledger l ON l.run_id = rp.run_id WHERE rp.actual_dt IS NULL GROUP BY rp.run_id"
+    ).fetchall()
+    updates = []
+    for run_id, run_dir in rows:
+        try:
+            with open(os.path.join(run_dir, run_id, "metadata.json"), 'r') as f:
+                actual_dt = _typed(json.load(f).get('actual_dt'), float)
+        except (OSError, ValueError):
+            continue
+        if actual_dt is not None:
+            updates.append((actual_dt, run_id))
+    if updates:
+        with conn:
+            conn.executemany("UPDATE run_parameters SET actual_dt = ? WHERE run_id = ?", updates)
+        log_event(logger, "actual_dt_backfilled", f"Backfilled actual_dt of {len(updates)} runs from metadata",
+                  count=len(updates))
+    return len(updates)
+
+# Metadata keys describing the execution rather than the simulation input
+SYSTEM_KEYS = {'actual_dt', 'steps', 'run_id', 'git_commit_hash', 'python_version', 'platform', 'created_at', 'cache_key'}
+
+# Bulk mode trades per-commit durability for throughput: WAL lets readers
+# (API, dashboard) keep working during the load, and synchronous=NORMAL only
+# fsyncs at checkpoints. A crash can lose the last uncommitted batch, which
+# the next ingest simply re-applies.
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+DEFAULT_BATCH_SIZE = 500
+
+UPSERT_RUN_SQL = '''
+    INSERT OR REPLACE INTO runs (run_id, timestamp, status, duration_ms, git_commit_hash, platform, python_version)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+DELETE_PARAMS_SQL = 'DELETE FROM parameters WHERE run_id = ?'
+INSERT_PARAM_SQL = 'INSERT INTO parameters (run_id, param_name, param_value) VALUES (?, ?, ?)'
+UPSERT_METRICS_SQL = '''
+    INSERT OR REPLACE INTO metrics (run_id, max_temperature, min_temperature, mean_temperature, energy_like_metric, stability_ratio)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+UPSERT_TYPED_PARAMS_SQL = '''
+    INSERT OR REPLACE INTO run_parameters (run_id, alpha, nx, dt, actual_dt, L, t_max, save_interval, scheme)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+UPSERT_LEDGER_SQL = '''
+    INSERT OR REPLACE INTO ingest_ledger (run_dir, run_id, fingerprint, ingested_at)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+'''
+UPSERT_LEDGER_ROW_SQL = '''
+    INSERT OR REPLACE INTO ingest_ledger (run_dir, run_id, fingerprint, ingested_at)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Artifacts whose changes require a run to be re-ingested
+LEDGER_ARTIFACTS = ("metadata.json", "metrics.json")
+
+def artifact_fingerprint(run_path, mode="stat"):
+    """
+    Fingerprint of a run's ingested artifacts.
+
+    Args:
+        mode: "stat" (mtime and size, no file reads) or "hash" (sha256 of
+            the contents, robust to touched-but-unchanged files).
+    """
+    h = hashlib.sha256()
+    for name in LEDGER_ARTIFACTS:
+        path = Path(run_path) / name
+        if mode == "hash":
+            h.update(path.read_bytes())
+        else:
+            st = path.stat()
+            h.update(f"{name}:{st.st_mtime_ns}:{st.st_size};".encode('utf-8'))
+    return f"{mode}:{h.hexdigest()[:32]}"
+
+def _typed(value, cast):
+    return None if value is None else cast(value)
+
+def _metric_value(value):
+    """A metric as float, or None if it is missing or not numeric (e.g. "n/a")."""
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+def load_run_rows(run_path, fingerprint=None):
+    """
+    Read a run's artifacts and build its table rows.
+
+    Args:
+        fingerprint (str, optional): Artifact fingerprint taken before
+            reading; when given, a ledger row is included.
+
+    Returns:
+        dict with run_id, run (row), params (rows), typed_params (row),
+        metrics (row) and ledger (row or None).
+
+    Raises:
+        FileNotFoundError: If metadata.json or metrics.json is missing.
+    """
+    metadata_path = run_path / "metadata.json"
+    metrics_path = run_path / "metrics.json"
+    if not metadata_path.exists() or not metrics_path.exists():
+        raise FileNotFoundError("Missing metadata.json or metrics.json")
+
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    with open(metrics_path, 'r') as f:
+        metrics = json.load(f)
+
+    run_id = metadata.get('run_id', run_path.name)
+    return {
+        'run_id': run_id,
+        'run': (
+            run_id,
+            metadata.get('created_at'),
+            'SUCCESS',
+            0.0,
+            metadata.get('git_commit_hash'),
+            metadata.get('platform'),
+            metadata.get('python_version'),
+        ),
+        'params': [(run_id, k, str(v)) for k, v in metadata.items() if k not in SYSTEM_KEYS],
+        'typed_params': (
+            run_id,
+            _typed(metadata.get('alpha'), float),
+            _typed(metadata.get('nx'), int),
+            _typed(metadata.get('dt'), float),
+            _typed(metadata.get('actual_dt'), float),
+            _typed(metadata.get('L'), float),
+            _typed(metadata.get('t_max'), float),
+            _typed(metadata.get('save_interval'), int),
+            metadata.get('scheme', 'explicit'),
+        ),
+        'metrics': (
+            run_id,
+            _metric_value(metrics.get('max_temperature')),
+            _metric_value(metrics.get('min_temperature')),
+            _metric_value(metrics.get('mean_temperature')),
+            _metric_value(metrics.get('energy_like_metric')),
+            _metric_value(metrics.get('stability_ratio')),
+        ),
+        'ledger': (ledger_root(run_path.parent), run_id, fingerprint) if fingerprint else None,
+    }
+
+def write_runs(cursor, batch):
+    """
+    Upsert the rows of several runs (as built by load_run_rows) and apply
+    their rollup deltas. Replaced runs may leave rollup rows dirty; see
+    refresh_dirty_rollups.
+    """
+    removed = fetch_contributions(cursor, [rows['run_id'] for rows in batch])
+    cursor.executemany(UPSERT_RUN_SQL, [rows['run'] for rows in batch])
+    cursor.executemany(DELETE_PARAMS_SQL, [(rows['run_id'],) for rows in batch])
+    cursor.executemany(INSERT_PARAM_SQL, [p for rows in batch for p in rows['params']])
+    cursor.executemany(UPSERT_TYPED_PARAMS_SQL, [rows['typed_params'] for rows in batch])
+    cursor.executemany(UPSERT_METRICS_SQL, [rows['metrics'] for rows in batch])
+    cursor.executemany(UPSERT_LEDGER_SQL, [rows['ledger'] for rows in batch if rows['ledger']])
+    apply_rollup_deltas(cursor, removed, [contribution(rows['typed_params'], rows['metrics']) for rows in batch])
+
+def load_ledger(db_path, results_dir):
+    """Fingerprints of the runs previously ingested from results_dir, by run_id."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('SELECT run_id, fingerprint FROM ingest_ledger WHERE run_dir = ?',
+                            (ledger_root(results_dir),)).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+def prune_runs(db_path, run_ids, results_dir):
+    """
+    Delete runs of results_dir from the ledger and, unless another results
+    folder's ledger still lists them, from every table (with their rollup
+    contributions), in one transaction.
+    """
+    if not run_ids:
+        return 0
+    root = ledger_root(results_dir)
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            cursor = conn.cursor()
+            cursor.executemany('DELETE FROM ingest_ledger WHERE run_dir = ? AND run_id = ?',
+                               [(root, run_id) for run_id in run_ids])
+            run_ids = [run_id for run_id in run_ids if cursor.execute(
+                'SELECT 1 FROM ingest_ledger WHERE run_id = ? LIMIT 1', (run_id,)).fetchone() is None]
+            removed = fetch_contributions(cursor, run_ids)
+            ids = [(run_id,) for run_id in run_ids]
+            for table in ('parameters', 'run_parameters', 'metrics', 'runs'):
+                cursor.executemany(f'DELETE FROM {table} WHERE run_id = ?', ids)
+            apply_rollup_deltas(cursor, removed=removed)
+            refresh_dirty_rollups(cursor)
+    finally:
+        conn.close()
+    return len(run_ids)
+
+def refresh_rollups(db_path=DB_PATH):
+    """Recompute the rollup rows left dirty by replaced or removed runs."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            refreshed = refresh_dirty_rollups(conn.cursor())
+    finally:
+        conn.close()
+    if refreshed:
+        log_event(logger, "rollups_refreshed", f"Recomputed {refreshed} dirty rollup rows", count=refreshed)
+    return refreshed
+
+def ingest_run(run_dir, db_path=DB_PATH, fingerprint_mode="stat", refresh=True):
+    """
+    Ingest a single run directory into the database and record it in the ledger.
+
+    Args:
+        refresh (bool): Recompute dirty rollup rows afterwards. ingest_all
+            disables this and refreshes once at the end.
+    """
     run_path = Path(run_dir)
     run_id = run_path.name
     
     log_event(logger, "ingest_run_start", f"Ingesting run: {run_id}", run_id=run_id)
     
     # Check for required files
-    metadata_path = run_path / "metadata.json"
-    metrics_path = run_path / "metrics.json"
-    
-    if not metadata_path.exists() or not metrics_path.exists():
+    if not (run_path / "metadata.json").exists() or not (run_path / "metrics.json").exists():
         logger.warning(f"Skipping {run_dir}: Missing metadata.json or metrics.json")
         return False
         
     try:
         with Timer("ingest_run_db_transaction", description=f"DB Upsert for {run_id}"):
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
-                
-            with open(metrics_path, 'r') as f:
-                metrics = json.load(f)
+            rows = load_run_rows(run_path, artifact_fingerprint(run_path, fingerprint_mode))
+            run_id = rows['run_id']
                 
             conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            run_id = metadata.get('run_id', run_path.name)
-            
-            # 1. Upsert Run
-            cursor.execute('''
-                INSERT OR REPLACE INTO runs (run_id, timestamp, status, duration_ms, git_commit_hash, platform, python_version)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                run_id,
-                metadata.get('created_at'),
-                'SUCCESS', 
-                0.0, 
-                metadata.get('git_commit_hash'),
-                metadata.get('platform'),
-                metadata.get('python_version')
-            ))
-            
-            # 2. Insert Parameters
-            cursor.execute('DELETE FROM parameters WHERE run_id = ?', (run_id,))
-            system_keys = {'actual_dt', 'steps', 'run_id', 'git_commit_hash', 'python_version', 'platform', 'created_at'}
-            
-            for k, v in metadata.items():
-                if k not in system_keys:
-                    cursor.execute('INSERT INTO parameters (run_id, param_name, param_value) VALUES (?, ?, ?)',
-                                   (run_id, k, str(v)))
-                                   
-            # 3. Upsert Metrics
-            cursor.execute('''
-                INSERT OR REPLACE INTO metrics (run_id, max_temperature, min_temperature, mean_temperature, energy_like_metric, stability_ratio)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                run_id,
-                metrics.get('max_temperature'),
-                metrics.get('min_temperature'),
-                metrics.get('mean_temperature'),
-                metrics.get('energy_like_metric'),
-                metrics.get('stability_ratio')
-            ))
-            
-            conn.commit()
-            conn.close()
+            try:
+                cursor = conn.cursor()
+                write_runs(cursor, [rows])
+                if refresh:
+                    refresh_dirty_rollups(cursor)
+                conn.commit()
+            finally:
+                # A failed run must not keep holding the write lock
+                conn.rollback()
+                conn.close()
             
         log_event(logger, "ingest_run_completed", f"Fully ingested run: {run_id}", run_id=run_id)
         return True
@@ -102,22 +333,173 @@ def ingest_run(run_dir, db_path=DB_PATH):
         log_event(logger, "ingest_run_failed", f"Failed to ingest {run_dir}", error=str(e), run_id=run_id)
         return False
 
-def ingest_all(results_dir, db_path=DB_PATH):
-    """Ingest all runs in a results directory."""
+def connect_bulk(db_path=DB_PATH):
+    """Connection for bulk loads: autocommit mode (transactions are explicit) and BULK_PRAGMAS."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _commit_batch(conn, batch):
+    """
+    Write a batch in one transaction. If the batch fails (database error or
+    a malformed row), replay it one run per savepoint so a bad run only
+    loses itself.
+
+    Returns:
+        int: Number of runs written.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN")
+        write_runs(cursor, batch)
+        cursor.execute("COMMIT")
+        return len(batch)
+    except Exception:
+        cursor.execute("ROLLBACK")
+
+    written = 0
+    cursor.execute("BEGIN")
+    for rows in batch:
+        cursor.execute("SAVEPOINT run")
+        try:
+            write_runs(cursor, [rows])
+            cursor.execute("RELEASE run")
+            written += 1
+        except Exception as e:
+            cursor.execute("ROLLBACK TO run")
+            cursor.execute("RELEASE run")
+            log_event(logger, "ingest_run_failed", f"Failed to ingest {rows['run_id']}",
+                      error=str(e), run_id=rows['run_id'])
+    cursor.execute("COMMIT")
+    return written
+
+def ingest_bulk(run_dirs, db_path=DB_PATH, batch_size=DEFAULT_BATCH_SIZE, fingerprint_mode="stat"):
+    """
+    Ingest many runs over one connection, batch_size runs per transaction,
+    using executemany. Runs with unreadable artifacts are skipped individually.
+    Ledger rows are written in the same transaction as the run.
+
+    Returns:
+        int: Number of runs ingested.
+    """
+    batch_size = max(1, int(batch_size))
+    conn = connect_bulk(db_path)
+    count = 0
+    seen = 0
+    start = time.perf_counter()
+    batch = []
+
+    def flush():
+        nonlocal count
+        count += _commit_batch(conn, batch)
+        batch.clear()
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed else 0.0
+        log_event(logger, "ingest_bulk_progress", f"Ingested {count}/{seen} runs ({rate:.0f} runs/s)",
+                  count=count, seen=seen, runs_per_sec=rate)
+
+    try:
+        for run_dir in run_dirs:
+            seen += 1
+            try:
+                run_path = Path(run_dir)
+                batch.append(load_run_rows(run_path, artifact_fingerprint(run_path, fingerprint_mode)))
+            except Exception as e:
+                log_event(logger, "ingest_run_failed", f"Failed to ingest {run_dir}",
+                          error=str(e), run_id=Path(run_dir).name)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        conn.close()
+    return count
+
+def _canonical_stale(run_path):
+    """True if the run has no materialized canonical payload or it predates the raw artifacts."""
+    try:
+        canonical_mtime = (run_path / CANONICAL_METRICS_FILE).stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+    return any((run_path / name).stat().st_mtime_ns > canonical_mtime for name in LEDGER_ARTIFACTS)
+
+def materialize_runs(run_dirs):
+    """
+    Write canonical_metrics.json for runs that lack an up-to-date one, so the
+    API serves it instead of re-extracting. Returns the number written.
+    """
+    written = 0
+    for run_dir in run_dirs:
+        run_path = Path(run_dir)
+        try:
+            if _canonical_stale(run_path):
+                materialize_canonical_metrics(run_path)
+                written += 1
+        except Exception as e:
+            log_event(logger, "materialize_failed", f"Failed to materialize canonical metrics for {run_path.name}",
+                      error=str(e), run_id=run_path.name)
+    return written
+
+def ingest_all(results_dir, db_path=DB_PATH, bulk=False, batch_size=DEFAULT_BATCH_SIZE,
+               overwrite=False, prune=False, fingerprint_mode="stat", materialize=False):
+    """
+    Ingest the new or changed runs in a results directory.
+
+    Runs whose artifact fingerprint matches the ingest ledger are skipped.
+
+    Args:
+        bulk (bool): Use ingest_bulk (one connection, batched transactions)
+            instead of one connection and commit per run.
+        batch_size (int): Runs per transaction in bulk mode.
+        overwrite (bool): Ignore the ledger and re-ingest every run.
+        prune (bool): Delete runs previously ingested from results_dir whose
+            folder no longer exists.
+        fingerprint_mode (str): "stat" (mtime/size) or "hash" (contents).
+        materialize (bool): Also write each run's canonical_metrics.json
+            (see materialize_runs).
+    """
     init_db(db_path)
     
-    count = 0
     results_path = Path(results_dir)
     if not results_path.exists():
         logger.warning(f"Results directory not found: {results_dir}")
         return
         
-    for run_dir in results_path.iterdir():
-        if run_dir.is_dir() and (run_dir / "metadata.json").exists():
-            if ingest_run(run_dir, db_path):
-                count += 1
+    ledger = load_ledger(db_path, results_path)
+    run_dirs = [d for d in results_path.iterdir() if d.is_dir() and (d / "metadata.json").exists()]
+
+    pending = []
+    for run_dir in run_dirs:
+        if not overwrite and run_dir.name in ledger:
+            try:
+                if artifact_fingerprint(run_dir, fingerprint_mode) == ledger[run_dir.name]:
+                    continue
+            except OSError:
+                pass  # Incomplete run; ingest reports it
+        pending.append(run_dir)
+
+    pruned = 0
+    if prune:
+        present = {d.name for d in results_path.iterdir() if d.is_dir()}
+        pruned = prune_runs(db_path, [run_id for run_id in ledger if run_id not in present], results_path)
+
+    log_event(logger, "ingest_plan", f"{len(pending)} new or changed runs, {len(run_dirs) - len(pending)} unchanged",
+              pending=len(pending), unchanged=len(run_dirs) - len(pending), pruned=pruned)
+
+    start = time.perf_counter()
+    if bulk:
+        count = ingest_bulk(pending, db_path, batch_size=batch_size, fingerprint_mode=fingerprint_mode)
+    else:
+        count = sum(1 for run_dir in pending if ingest_run(run_dir, db_path, fingerprint_mode, refresh=False))
+    refresh_rollups(db_path)
+    if materialize:
+        written = materialize_runs(run_dirs)
+        log_event(logger, "materialize_completed", f"Materialized canonical metrics for {written} runs", count=written)
+    elapsed = time.perf_counter() - start
                 
-    log_event(logger, "ingest_batch_completed", f"Total runs ingested: {count}", count=count)
+    log_event(logger, "ingest_batch_completed", f"Total runs ingested: {count}", count=count,
+              runs_per_sec=count / elapsed if elapsed else None)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Ingest simulation results into SQL database.')
@@ -126,12 +508,36 @@ if __name__ == '__main__':
     if "--runs-dir" in sys.argv: # Backwards compat/alias for makefile if needed
          # check if we used runs-dir anywhere ... makefile says --runs-dir
          parser.add_argument('--runs-dir', type=str, dest='results')
+    parser.add_argument('--bulk', action='store_true',
+                        help='One connection, batched transactions and WAL (much faster for many runs)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Runs per transaction with --bulk')
+    parser.add_argument('--overwrite', action='store_true', help='Re-ingest every run, ignoring the ingest ledger')
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete previously ingested runs whose folder no longer exists')
+    parser.add_argument('--hash', dest='fingerprint_mode', action='store_const', const='hash', default='stat',
+                        help='Detect changed runs by content hash instead of mtime/size')
+    parser.add_argument('--materialize', action='store_true',
+                        help='Write canonical_metrics.json into each run folder for the API to serve')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='Recompute the param_rollups table from scratch and exit')
+    parser.add_argument('--db', type=str, default=DB_PATH, help='SQLite database path')
          
     args = parser.parse_args()
     
+    if args.rebuild_rollups:
+        init_db(args.db)
+        conn = sqlite3.connect(args.db)
+        with Timer("rollups_rebuild", description="Rebuild param_rollups"):
+            rows = rebuild_rollups(conn)
+        conn.close()
+        log_event(logger, "rollups_rebuilt", f"Rebuilt {rows} rollup rows", count=rows)
+        sys.exit(0)
+
     if args.results:
         results_dir = args.results
     else:
         results_dir = os.path.join(project_root, 'results', 'runs')
         
-    ingest_all(results_dir)
+    ingest_all(results_dir, db_path=args.db, bulk=args.bulk, batch_size=args.batch_size,
+               overwrite=args.overwrite, prune=args.prune, fingerprint_mode=args.fingerprint_mode,
+               materialize=args.materialize)
@@ -0,0 +1,71 @@
+"""
+Convert the timeseries of existing run folders to another format.
+
+Each run_* folder under the results directory is rewritten in place
+(csv <-> parquet <-> npy); the previous file is removed once the new one is
+written. Runs already in the target format are left untouched. Metadata and
+metrics are not modified, so cached runs stay valid for sweeps using the
+new format.
+"""
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from observability.logging import get_logger, log_event
+from observability.timing import Timer
+from analysis.timeseries import TIMESERIES_FILES, convert_run
+
+
+logger = get_logger(__name__)
+
+
+def migrate_runs(results_dir, fmt):
+    """
+    Convert every run folder in results_dir to fmt.
+
+    Returns:
+        dict: Counts of converted, skipped (already fmt or no timeseries)
+        and failed runs.
+    """
+    counts = {"converted": 0, "skipped": 0, "failed": 0}
+    for run_dir in sorted(Path(results_dir).glob("run_*")):
+        if not run_dir.is_dir():
+            continue
+        try:
+            new_path = convert_run(run_dir, fmt)
+        except Exception as e:
+            log_event(logger, "timeseries_migration_failed", f"Failed to convert {run_dir.name}", error=str(e))
+            counts["failed"] += 1
+            continue
+        counts["converted" if new_path else "skipped"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert run timeseries files to another format.")
+    parser.add_argument("--format", required=True, choices=sorted(TIMESERIES_FILES), help="Target format")
+    parser.add_argument("--runs-dir", type=str, default=None, help="Runs folder (default: results/runs)")
+    args = parser.parse_args()
+
+    results_dir = args.runs_dir or os.path.join(project_root, "results", "runs")
+    if not os.path.exists(results_dir):
+        logger.error(f"Results directory {results_dir} does not exist.")
+        sys.exit(1)
+
+    with Timer("timeseries_migration", description=f"Convert runs in {results_dir} to {args.format}"):
+        counts = migrate_runs(results_dir, args.format)
+
+    log_event(logger, "timeseries_migration_complete",
+              f"Converted {counts['converted']} runs, skipped {counts['skipped']}, failed {counts['failed']}",
+              **counts)
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
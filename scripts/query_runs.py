@@ -0,0 +1,60 @@
+"""
+Run ad-hoc SQL over run artifacts with the DuckDB backend (no ingest needed).
+
+Examples:
+    python scripts/query_runs.py "SELECT nx, AVG(max_temperature) FROM run_parameters JOIN metrics USING (run_id) GROUP BY nx"
+    python scripts/query_runs.py --file sql/compare_variants.sql --runs-dir results/runs_ci --format csv
+
+Available views: runs, metrics, run_parameters, parameters,
+param_rollup_stats and (with Parquet timeseries) timeseries.
+"""
+import os
+import sys
+import argparse
+
+# Add project root to path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from analysis.duckdb_backend import connect, duckdb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query run artifacts in place with DuckDB.")
+    parser.add_argument("sql", nargs="?", help="SQL statement to run")
+    parser.add_argument("--file", type=str, default=None, help="Read the SQL from a file (e.g. sql/*.sql)")
+    parser.add_argument("--runs-dir", type=str, default=None, help="Runs folder (default: results/runs)")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table", help="Output format")
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB worker threads (default: all cores)")
+    args = parser.parse_args()
+
+    if bool(args.sql) == bool(args.file):
+        parser.error("Pass either a SQL statement or --file")
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            query = f.read()
+    else:
+        query = args.sql
+
+    runs_dir = args.runs_dir or os.path.join(project_root, "results", "runs")
+    try:
+        conn = connect(runs_dir, threads=args.threads)
+    except (ImportError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        df = conn.execute(query).df()
+    except duckdb.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.format == "csv":
+        print(df.to_csv(index=False), end="")
+    elif args.format == "json":
+        print(df.to_json(orient="records", indent=2))
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
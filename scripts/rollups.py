@@ -0,0 +1,154 @@
+"""
+Incremental maintenance of the param_rollups table (see sql/db_schema.sql).
+
+A run contributes its max_temperature and stability_ratio to one rollup row
+per rolled-up parameter. Ingest reads the contributions of the runs it is
+about to replace, writes the new rows, then applies both as deltas:
+
+  - added runs increment counts/sums and widen min/max;
+  - removed runs decrement counts/sums; if a removed value was the row's
+    min or max, the row is marked dirty.
+
+refresh_dirty_rollups recomputes only the dirty rows from the base tables and
+rebuild_rollups recomputes everything.
+"""
+import sqlite3
+
+# Rollup name -> run_parameters column: dt is the requested step (NULL =
+# auto, not rolled up), actual_dt the step the solver used
+ROLLUP_PARAMS = (
+    ('alpha', 'alpha'),
+    ('nx', 'nx'),
+    ('dt', 'dt'),
+    ('actual_dt', 'actual_dt'),
+)
+
+UNSTABLE_RATIO = 0.5
+
+# SQLite limits the number of bound variables per statement
+_IN_CHUNK = 500
+
+CONTRIBUTION_COLUMNS = "rp.alpha, rp.nx, rp.dt, rp.actual_dt, m.max_temperature, m.stability_ratio"
+
+ADD_SQL = '''
+    INSERT INTO param_rollups (param_name, param_value, run_count, max_temp_count, sum_max_temp,
+                               min_max_temp, max_max_temp, stability_count, sum_stability, unstable_runs)
+    VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(param_name, param_value) DO UPDATE SET
+        run_count = run_count + 1,
+        max_temp_count = max_temp_count + excluded.max_temp_count,
+        sum_max_temp = sum_max_temp + excluded.sum_max_temp,
+        min_max_temp = COALESCE(MIN(min_max_temp, excluded.min_max_temp), min_max_temp, excluded.min_max_temp),
+        max_max_temp = COALESCE(MAX(max_max_temp, excluded.max_max_temp), max_max_temp, excluded.max_max_temp),
+        stability_count = stability_count + excluded.stability_count,
+        sum_stability = sum_stability + excluded.sum_stability,
+        unstable_runs = unstable_runs + excluded.unstable_runs
+'''
+
+REMOVE_SQL = '''
+    UPDATE param_rollups SET
+        run_count = run_count - 1,
+        max_temp_count = max_temp_count - :has_max_temp,
+        sum_max_temp = sum_max_temp - :max_temp_total,
+        stability_count = stability_count - :has_stability,
+        sum_stability = sum_stability - :stability_total,
+        unstable_runs = unstable_runs - :unstable,
+        dirty = dirty OR (:max_temp IS NOT NULL AND (:max_temp <= min_max_temp OR :max_temp >= max_max_temp))
+    WHERE param_name = :name AND param_value = :value
+'''
+
+RECOMPUTE_SQL = '''
+    INSERT OR REPLACE INTO param_rollups (param_name, param_value, run_count, max_temp_count, sum_max_temp,
+                                          min_max_temp, max_max_temp, stability_count, sum_stability,
+                                          unstable_runs, dirty)
+    SELECT
+        '{name}',
+        rp.{column},
+        COUNT(*),
+        COUNT(m.max_temperature),
+        TOTAL(m.max_temperature),
+        MIN(m.max_temperature),
+        MAX(m.max_temperature),
+        COUNT(m.stability_ratio),
+        TOTAL(m.stability_ratio),
+        SUM(CASE WHEN m.stability_ratio > {unstable} THEN 1 ELSE 0 END),
+        0
+    FROM run_parameters rp
+    JOIN metrics m ON m.run_id = rp.run_id
+    WHERE rp.{column} IS NOT NULL {where}
+    GROUP BY rp.{column}
+'''
+
+
+def fetch_contributions(cursor, run_ids):
+    """(alpha, nx, dt, actual_dt, max_temperature, stability_ratio) of the given runs that are stored."""
+    run_ids = list(run_ids)
+    rows = []
+    for i in range(0, len(run_ids), _IN_CHUNK):
+        chunk = run_ids[i:i + _IN_CHUNK]
+        cursor.execute(
+            f"SELECT {CONTRIBUTION_COLUMNS} FROM run_parameters rp JOIN metrics m ON m.run_id = rp.run_id "
+            f"WHERE rp.run_id IN ({','.join('?' * len(chunk))})",
+            chunk,
+        )
+        rows.extend(cursor.fetchall())
+    return rows
+
+
+def contribution(typed_params, metrics):
+    """Contribution of a run from its run_parameters and metrics rows (as built by ingest)."""
+    return typed_params[1], typed_params[2], typed_params[3], typed_params[4], metrics[1], metrics[5]
+
+
+def _delta_rows(contributions):
+    for alpha, nx, dt, actual_dt, max_temp, stability in contributions:
+        unstable = 1 if stability is not None and stability > UNSTABLE_RATIO else 0
+        for (name, _), value in zip(ROLLUP_PARAMS, (alpha, nx, dt, actual_dt)):
+            if value is not None:
+                yield name, value, max_temp, stability, unstable
+
+
+def apply_rollup_deltas(cursor, removed=(), added=()):
+    """Subtract the removed and add the added contributions."""
+    cursor.executemany(REMOVE_SQL, [
+        {
+            'name': name, 'value': value, 'max_temp': max_temp, 'unstable': unstable,
+            'has_max_temp': int(max_temp is not None), 'max_temp_total': max_temp or 0.0,
+            'has_stability': int(stability is not None), 'stability_total': stability or 0.0,
+        }
+        for name, value, max_temp, stability, unstable in _delta_rows(removed)
+    ])
+    cursor.executemany(ADD_SQL, [
+        (
+            name, value,
+            int(max_temp is not None), max_temp or 0.0,
+            max_temp, max_temp,
+            int(stability is not None), stability or 0.0,
+            unstable,
+        )
+        for name, value, max_temp, stability, unstable in _delta_rows(added)
+    ])
+
+
+def refresh_dirty_rollups(cursor):
+    """Recompute the dirty rollup rows from the base tables. Returns the number refreshed."""
+    cursor.execute("SELECT param_name, param_value FROM param_rollups WHERE dirty = 1")
+    dirty = cursor.fetchall()
+    columns = dict(ROLLUP_PARAMS)
+    for name, value in dirty:
+        column = columns.get(name)
+        cursor.execute("DELETE FROM param_rollups WHERE param_name = ? AND param_value = ?", (name, value))
+        if column:
+            cursor.execute(RECOMPUTE_SQL.format(name=name, column=column, unstable=UNSTABLE_RATIO,
+                                                where=f"AND rp.{column} = ?"), (value,))
+    cursor.execute("DELETE FROM param_rollups WHERE run_count <= 0")
+    return len(dirty)
+
+
+def rebuild_rollups(conn: sqlite3.Connection):
+    """Recompute every rollup row in one transaction. Returns the number of rows."""
+    with conn:
+        conn.execute("DELETE FROM param_rollups")
+        for name, column in ROLLUP_PARAMS:
+            conn.execute(RECOMPUTE_SQL.format(name=name, column=column, unstable=UNSTABLE_RATIO, where=""))
+    return conn.execute("SELECT COUNT(*) FROM param_rollups").fetchone()[0]
@@ -7,17 +7,56 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
 import jsonschema
+from functools import lru_cache
 from pathlib import Path
 from observability.logging import get_logger, log_event
+from simulations.solver import SOLVER_SCHEMES, SpectralHeatSolver
 
 logger = get_logger(__name__)
 
 SCHEMA_PATH = os.path.join(project_root, 'metrics', 'metrics_schema.json')
 
+# Schemes whose stability does not depend on stability_ratio (r = alpha*dt/dx^2),
+# as declared by the solver classes
+UNCONDITIONALLY_STABLE_SCHEMES = {name for name, cls in SOLVER_SCHEMES.items() if cls.unconditionally_stable}
+
+def is_unconditionally_stable(scheme, mode=None):
+    """
+    Whether a run's stability does not depend on stability_ratio. Spectral
+    runs only qualify in exact mode (the default, so runs without a recorded
+    mode); explicit mode has the explicit scheme's stability limit.
+    """
+    if scheme == SpectralHeatSolver.scheme and mode not in (None, "exact"):
+        return False
+    return scheme in UNCONDITIONALLY_STABLE_SCHEMES
+
 def load_schema():
     with open(SCHEMA_PATH, 'r') as f:
         return json.load(f)
 
+@lru_cache(maxsize=None)
+def compiled_validator(schema_path):
+    """
+    Validator for the JSON schema at schema_path, loaded and checked once
+    per process (schemas ship with the code and do not change at runtime).
+    """
+    with open(schema_path, 'r') as f:
+        schema = json.load(f)
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+def validate_with(schema_path, instance):
+    """
+    Same as jsonschema.validate(instance, schema) with the cached validator.
+
+    Raises:
+        jsonschema.ValidationError: The most relevant error, if any.
+    """
+    error = jsonschema.exceptions.best_match(compiled_validator(schema_path).iter_errors(instance))
+    if error is not None:
+        raise error
+
 def validate_run_metrics(metrics_payload):
     """
     Validates a metrics object against the schema and domain rules.
@@ -27,8 +66,7 @@ def validate_run_metrics(metrics_payload):
     
     # 1. Structural Schema Validation
     try:
-        schema = load_schema()
-        jsonschema.validate(instance=metrics_payload, schema=schema)
+        validate_with(SCHEMA_PATH, metrics_payload)
     except jsonschema.ValidationError as e:
         errors.append(f"Schema Violation: {e.message}")
         # Stop early if schema fails widely
@@ -44,12 +82,13 @@ def validate_run_metrics(metrics_payload):
         errors.append(f"Physics Error: max_temp ({perf.get('max_temperature')}) < min_temp ({perf.get('min_temperature')})")
 
     # Rule: Stability Logic
-    # If stability_ratio > 0.5, theoretical stability is lost.
+    # If stability_ratio > 0.5, theoretical stability is lost (explicit scheme only).
     # We might expect 'converged' to be false, or at least flag it.
     stability_ratio = perf.get("stability_ratio", 0)
     is_converged = quality.get("converged", True)
+    scheme = params.get("scheme", "explicit")
     
-    if stability_ratio > 0.5 and is_converged:
+    if stability_ratio > 0.5 and is_converged and not is_unconditionally_stable(scheme, params.get("mode")):
         # This is a soft warning or hard failure depending on strictness. 
         # For this pipeline, we flag it as an inconsistency.
         errors.append(f"Logic Error: Run marked converged but stability_ratio {stability_ratio:.4f} > 0.5")
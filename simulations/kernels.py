@@ -0,0 +1,127 @@
+"""
+Compute kernels for the explicit stencil update.
+
+Every kernel has the signature ``advance(u, r, n_steps)`` and advances the
+1D state ``u`` in place by ``n_steps`` forward-Euler steps of
+
+    u_i^{n+1} = u_i^n + r * (u_{i+1}^n - 2u_i^n + u_{i-1}^n)
+
+with fixed Dirichlet (T=0) ends. Backends:
+
+    numpy:   reference expression, allocates temporaries every step.
+    inplace: ufuncs with out= into two ping-pong buffers, no per-step allocation.
+    numba:   JIT-compiled loop fusing all n_steps (optional dependency).
+
+The backend is chosen explicitly, or via the HEAT_KERNEL_BACKEND environment
+variable. Requesting numba without numba installed falls back to inplace.
+"""
+import os
+import numpy as np
+from typing import Callable, Optional
+
+from observability.logging import get_logger
+
+try:
+    import numba
+except ImportError:
+    # Optional accelerator; the NumPy backends cover every environment
+    numba = None
+
+logger = get_logger(__name__)
+
+KERNEL_ENV_VAR = "HEAT_KERNEL_BACKEND"
+DEFAULT_BACKEND = "numpy"
+
+_warned_missing = set()
+
+
+def advance_numpy(u: np.ndarray, r: float, n_steps: int):
+    u_new = np.zeros_like(u)
+
+    for _ in range(n_steps):
+        u_new[1:-1] = u[1:-1] + r * (u[2:] - 2*u[1:-1] + u[:-2])
+
+        # Boundary conditions: Fixed Dirichlet (T=0 at ends)
+        u_new[0] = 0.0
+        u_new[-1] = 0.0
+
+        u[:] = u_new[:]
+
+
+def advance_inplace(u: np.ndarray, r: float, n_steps: int):
+    if n_steps <= 0:
+        return
+
+    # Ping-pong between u and one scratch buffer; lap holds the interior stencil
+    a, b = u, np.empty_like(u)
+    lap = np.empty(u.shape[0] - 2)
+
+    for _ in range(n_steps):
+        np.add(a[2:], a[:-2], out=lap)
+        np.subtract(lap, a[1:-1], out=lap)
+        np.subtract(lap, a[1:-1], out=lap)
+        np.multiply(lap, r, out=lap)
+        np.add(a[1:-1], lap, out=b[1:-1])
+        b[0] = 0.0
+        b[-1] = 0.0
+        a, b = b, a
+
+    if a is not u:
+        u[:] = a
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _advance_numba(u, r, n_steps):
+        nx = u.shape[0]
+        a = u
+        b = np.empty_like(u)
+        for _ in range(n_steps):
+            for i in range(1, nx - 1):
+                b[i] = a[i] + r * (a[i + 1] - 2.0 * a[i] + a[i - 1])
+            b[0] = 0.0
+            b[nx - 1] = 0.0
+            a, b = b, a
+        if n_steps % 2 == 1:
+            u[:] = a
+
+    def advance_numba(u: np.ndarray, r: float, n_steps: int):
+        if n_steps > 0:
+            _advance_numba(u, float(r), int(n_steps))
+else:
+    advance_numba = None
+
+
+KERNEL_BACKENDS = {
+    "numpy": advance_numpy,
+    "inplace": advance_inplace,
+    "numba": advance_numba,
+}
+
+
+def available_backends():
+    """Names of the backends usable in this environment."""
+    return [name for name, fn in KERNEL_BACKENDS.items() if fn is not None]
+
+
+def get_kernel(name: Optional[str] = None) -> Callable[[np.ndarray, float, int], None]:
+    """
+    Resolve a kernel backend.
+
+    Args:
+        name: Backend name. If None, HEAT_KERNEL_BACKEND is used, then "numpy".
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    name = (name or os.environ.get(KERNEL_ENV_VAR) or DEFAULT_BACKEND).strip().lower()
+    if name not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown kernel backend '{name}'. Available: {sorted(KERNEL_BACKENDS)}")
+
+    kernel = KERNEL_BACKENDS[name]
+    if kernel is None:
+        if name not in _warned_missing:
+            logger.warning(f"Kernel backend '{name}' is not installed; falling back to 'inplace'.")
+            _warned_missing.add(name)
+        kernel = advance_inplace
+    return kernel
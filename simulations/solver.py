@@ -1,5 +1,10 @@
+import functools
 import numpy as np
-from typing import List, Tuple, Optional, Callable
+from scipy.fft import dst, idst
+from scipy.linalg import cholesky_banded, cho_solve_banded
+from typing import Iterator, List, Tuple, Optional, Callable
+
+from simulations.kernels import get_kernel
 
 class HeatEquationSolver1D:
     """
@@ -7,7 +12,14 @@ class HeatEquationSolver1D:
     Equation: dT/dt = alpha * d2T/dx^2
     """
     
-    def __init__(self, L: float, nx: int, alpha: float, t_max: float, dt: float = None):
+    scheme = "explicit"
+    # Explicit stepping is only stable for r = alpha * dt / dx^2 <= 0.5
+    unconditionally_stable = False
+    # Evaluation mode, for schemes that have several (recorded in run metadata)
+    mode = None
+    
+    def __init__(self, L: float, nx: int, alpha: float, t_max: float, dt: float = None,
+                 backend: Optional[str] = None):
         """
         Initialize the solver.
 
@@ -16,7 +28,10 @@ class HeatEquationSolver1D:
             nx (int): Number of spatial points.
             alpha (float): Thermal diffusivity key parameter.
             t_max (float): Total simulation time.
-            dt (float, optional): Time step size. If None, calculated for stability.
+            dt (float, optional): Time step size. If None, a default is chosen
+                (for the explicit scheme: 90% of the stability limit).
+            backend (str, optional): Stencil kernel backend (see simulations.kernels).
+                If None, HEAT_KERNEL_BACKEND or "numpy" is used.
         """
         self.L = L
         self.nx = nx
@@ -28,17 +43,23 @@ class HeatEquationSolver1D:
         limit_dt = 0.5 * self.dx**2 / alpha
         
         if dt is None:
-            # Use 90% of the limit for safety
-            self.dt = 0.9 * limit_dt
+            self.dt = self.default_dt(limit_dt)
         else:
             self.dt = dt
-            if self.dt > limit_dt:
+            if self.dt > limit_dt and not self.unconditionally_stable:
                 raise ValueError(f"Stability check failed: dt={dt:.2e} > limit={limit_dt:.2e} (r > 0.5)")
         
         self.nt = int(t_max / self.dt)
         self.x = np.linspace(0, L, nx)
         self.u = np.zeros(nx)
+        self.backend = backend
+        self.kernel = get_kernel(backend)
         
+    def default_dt(self, limit_dt: float) -> float:
+        """Time step used when none is given."""
+        # Use 90% of the limit for safety
+        return 0.9 * limit_dt
+
     def set_initial_condition(self, func: Callable[[np.ndarray], np.ndarray]):
         """
         Set initial temperature profile u(x, 0) = func(x).
@@ -48,41 +69,412 @@ class HeatEquationSolver1D:
         """
         self.u = func(self.x)
 
-    def solve(self, save_interval: int = 100) -> List[Tuple[float, np.ndarray]]:
+    def save_steps(self, save_interval: int) -> List[int]:
+        """Step indices at which snapshots are saved (always includes 0 and nt)."""
+        if save_interval < 1:
+            raise ValueError(f"save_interval must be >= 1, got {save_interval}")
+        steps = list(range(0, self.nt + 1, save_interval))
+        if steps[-1] != self.nt:
+            steps.append(self.nt)
+        return steps
+
+    def iter_snapshots(self, save_interval: int = 100, accumulators=()) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Run the simulation, yielding snapshots as they are produced.
+
+        The yielded array is the solver's working buffer: it is only valid
+        until the next snapshot is requested, so copy it to keep it.
+
+        Args:
+            save_interval (int): Number of steps between saving timepoints.
+            accumulators: Metric accumulators updated at every time step
+                (see iter_steps).
+
+        Yields:
+            (time, temperature_array) at every saved step.
+        """
+        for _, t, u in self.iter_steps(self.save_steps(save_interval), accumulators):
+            yield t, u
+
+    def iter_steps(self, steps, accumulators=()) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """
+        Yield the state at arbitrary step indices.
+
+        Args:
+            steps: Increasing step indices in [0, nt].
+            accumulators: Metric accumulators (see analysis.accumulators)
+                updated with the state at step 0 and after every time step
+                up to the last requested step, not only the yielded ones.
+                Without accumulators, steps between yields are advanced in
+                one kernel call.
+
+        Yields:
+            (step, time, temperature_array); the array is the working buffer.
+        """
+        u = np.array(self.u, dtype=float)
+        n = 0
+        for acc in accumulators:
+            acc.update(0.0, u)
+        for target in steps:
+            if target > n and accumulators:
+                for n in range(n + 1, target + 1):
+                    self._advance(u, 1)
+                    for acc in accumulators:
+                        acc.update(n * self.dt, u)
+            elif target > n:
+                self._advance(u, target - n)
+                n = target
+            yield n, n * self.dt, u
+
+    def _advance(self, u: np.ndarray, n_steps: int):
+        """Advance u in place by n_steps time steps."""
+        r = self.alpha * self.dt / (self.dx**2)
+        self.kernel(u, r, n_steps)
+
+    def solve(self, save_interval: int = 100, history: str = "list", accumulators=()):
         """
         Run the simulation.
 
         Args:
             save_interval (int): Number of steps between saving timepoints.
+            history (str): How to return the results:
+                "list": list of (time, temperature_array) tuples.
+                "array": (times, values) with times of shape (n_saved,) and
+                    values a single preallocated (n_saved, nx) array.
+                "final": (time, temperature_array) of the final state only;
+                    no intermediate snapshots are kept.
+            accumulators: Metric accumulators updated at every time step.
 
         Returns:
-            history: List of tuples (time, temperature_array).
+            The history in the requested form.
         """
-        t = 0.0
+        if history == "list":
+            return [(t, u.copy()) for t, u in self.iter_snapshots(save_interval, accumulators)]
+
+        if history == "array":
+            n_saved = len(self.save_steps(save_interval))
+            times = np.empty(n_saved)
+            values = np.empty((n_saved, self.nx))
+            for i, (t, u) in enumerate(self.iter_snapshots(save_interval, accumulators)):
+                times[i] = t
+                values[i] = u
+            return times, values
+
+        if history == "final":
+            t, u = 0.0, self.u
+            for t, u in self.iter_snapshots(max(self.nt, 1), accumulators):
+                pass
+            return t, np.array(u, dtype=float)
+
+        raise ValueError(f"Unknown history mode '{history}'. Available: ['list', 'array', 'final']")
+
+
+@functools.lru_cache(maxsize=64)
+def _implicit_factor(m: int, r: float, theta: float) -> np.ndarray:
+    """
+    Banded Cholesky factor of (I + theta * r * A) for the m interior points,
+    where A = tridiag(-1, 2, -1). The matrix is symmetric positive definite,
+    so it is factored once per (m, r, theta) and reused by every step.
+    """
+    ab = np.empty((2, m))
+    ab[0, 0] = 0.0
+    ab[0, 1:] = -theta * r        # super-diagonal (upper form)
+    ab[1, :] = 1.0 + 2.0 * theta * r
+    factor = cholesky_banded(ab, lower=False)
+    factor.setflags(write=False)
+    return factor
+
+
+class CrankNicolsonSolver1D(HeatEquationSolver1D):
+    """
+    1D Heat Equation Solver using the implicit theta-method.
+    theta = 0.5 is Crank-Nicolson (second order in time), theta = 1.0 is
+    backward Euler. Both are unconditionally stable, so dt is limited by
+    accuracy rather than by r = alpha * dt / dx^2 <= 0.5.
+    """
+
+    scheme = "crank_nicolson"
+    theta = 0.5
+    unconditionally_stable = True
+    # Default dt = factor * dx * L / alpha, i.e. an accuracy-driven step that
+    # shrinks linearly (not quadratically) as the grid is refined.
+    default_dt_factor = 0.05
+
+    def default_dt(self, limit_dt: float) -> float:
+        return self.default_dt_factor * self.dx * self.L / self.alpha
+
+    def _advance(self, u: np.ndarray, n_steps: int):
+        """Advance u in place by n_steps implicit steps."""
         r = self.alpha * self.dt / (self.dx**2)
-        
-        # history storage
-        history = [(t, self.u.copy())]
-        
-        u = self.u.copy()
+        factor = _implicit_factor(self.nx - 2, r, self.theta)
+        explicit_weight = (1.0 - self.theta) * r
+
+        for _ in range(n_steps):
+            # (I + theta*r*A) u^{n+1} = u^n - (1 - theta)*r*A u^n on interior points
+            rhs = u[1:-1] + explicit_weight * (u[2:] - 2*u[1:-1] + u[:-2])
+            u[1:-1] = cho_solve_banded((factor, False), rhs, check_finite=False)
+
+            # Boundary conditions: Fixed Dirichlet (T=0 at ends)
+            u[0] = 0.0
+            u[-1] = 0.0
+
+
+class BackwardEulerSolver1D(CrankNicolsonSolver1D):
+    """
+    Fully implicit (backward Euler) variant: first order in time but
+    L-stable, so sharp initial data does not ring at large r.
+    """
+
+    scheme = "backward_euler"
+    theta = 1.0
+
+
+class SpectralHeatSolver(HeatEquationSolver1D):
+    """
+    Closed-form solver for constant alpha with zero Dirichlet ends.
+
+    The interior of the initial condition is expanded once in the discrete
+    sine basis (DST-I), whose modes are the eigenvectors of the 3-point
+    Laplacian. Any snapshot is then a per-mode scaling followed by an inverse
+    DST, O(nx log nx) per time with no time stepping.
+
+    Modes:
+        "exact": semi-discrete solution, mode k decays as exp(-alpha * lambda_k * t).
+            Unconditionally stable; dt only sets the snapshot schedule.
+        "explicit": mode k is scaled by (1 - 4 r sin^2(...))^n, reproducing
+            HeatEquationSolver1D step n to rounding (same stability limit).
+    """
+
+    scheme = "spectral"
+    unconditionally_stable = True
+
+    def __init__(self, L: float, nx: int, alpha: float, t_max: float, dt: float = None,
+                 backend: Optional[str] = None, mode: str = "exact"):
+        if mode not in ("exact", "explicit"):
+            raise ValueError(f"Unknown spectral mode '{mode}'. Available: ['exact', 'explicit']")
+        self.mode = mode
+        self.unconditionally_stable = mode == "exact"
+        super().__init__(L=L, nx=nx, alpha=alpha, t_max=t_max, dt=dt, backend=backend)
+
+        m = nx - 2
+        k = np.arange(1, m + 1)
+        self._sin2 = np.sin(k * np.pi / (2 * (m + 1)))**2
+        self._coeffs = None
+
+    def default_dt(self, limit_dt: float) -> float:
+        # Keep the explicit schedule so snapshots line up with explicit runs
+        return 0.9 * limit_dt
+
+    def set_initial_condition(self, func: Callable[[np.ndarray], np.ndarray]):
+        super().set_initial_condition(func)
+        self._coeffs = None
+
+    def _mode_coefficients(self) -> np.ndarray:
+        if self._coeffs is None:
+            self._coeffs = dst(np.asarray(self.u[1:-1], dtype=float), type=1, norm="ortho")
+        return self._coeffs
+
+    def evaluate(self, times) -> np.ndarray:
+        """
+        Evaluate the temperature profile at arbitrary times.
+
+        Args:
+            times: Sequence of times. In "explicit" mode each time is rounded
+                to the nearest whole number of steps.
+
+        Returns:
+            np.ndarray: Array of shape (len(times), nx).
+        """
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        coeffs = self._mode_coefficients()
+
+        if self.mode == "exact":
+            lam = 4.0 * self._sin2 / self.dx**2
+            scale = np.exp(-self.alpha * np.outer(times, lam))
+        else:
+            r = self.alpha * self.dt / (self.dx**2)
+            steps = np.rint(times / self.dt).astype(int)
+            scale = np.power((1.0 - 4.0 * r * self._sin2)[None, :], steps[:, None])
+
+        out = np.zeros((times.shape[0], self.nx))
+        out[:, 1:-1] = idst(scale * coeffs, type=1, norm="ortho", axis=-1)
+
+        # t = 0 is the initial condition itself (boundary values included)
+        initial = times == 0.0
+        if np.any(initial):
+            out[initial] = self.u
+        return out
+
+    def iter_steps(self, steps, accumulators=()) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """
+        Evaluate the closed form at arbitrary step indices.
+
+        Args:
+            steps: Step indices in [0, nt].
+            accumulators: Metric accumulators updated at every step from 0 to
+                the last requested one; there is no time stepping to hook
+                into, so those steps are evaluated as well.
+
+        Yields:
+            (step, time, temperature_array).
+        """
+        if accumulators:
+            steps = list(steps)
+            wanted = set(steps)
+            for n, t, u in self.iter_steps(range(max(steps, default=0) + 1)):
+                for acc in accumulators:
+                    acc.update(t, u)
+                if n in wanted:
+                    yield n, t, u
+            return
+        for n in steps:
+            t = n * self.dt
+            yield n, t, self.evaluate([t])[0]
+
+
+SOLVER_SCHEMES = {
+    cls.scheme: cls
+    for cls in (HeatEquationSolver1D, CrankNicolsonSolver1D, BackwardEulerSolver1D, SpectralHeatSolver)
+}
+
+
+def create_solver(scheme: Optional[str] = None, **kwargs) -> HeatEquationSolver1D:
+    """
+    Instantiate the solver for a scheme name (default: explicit).
+
+    Raises:
+        ValueError: If the scheme is unknown.
+    """
+    scheme = scheme or HeatEquationSolver1D.scheme
+    if scheme not in SOLVER_SCHEMES:
+        raise ValueError(f"Unknown scheme '{scheme}'. Available: {sorted(SOLVER_SCHEMES)}")
+    return SOLVER_SCHEMES[scheme](**kwargs)
+
+class EnsembleHeatSolver1D:
+    """
+    Batched explicit solver for many runs that share the same grid size.
+
+    Every run keeps its own L, alpha, dt and t_max (and therefore its own
+    r = alpha * dt / dx^2 and step count). The states are stacked into a
+    single (n_runs, nx) array so each time step is one NumPy stencil pass
+    over the whole batch instead of one Python-level update per run.
+    """
+
+    def __init__(self, L, nx: int, alpha, t_max, dt=None):
+        """
+        Initialize the ensemble.
+
+        Args:
+            L: Domain length, scalar or one value per run.
+            nx (int): Number of spatial points (shared by all runs).
+            alpha: Thermal diffusivity per run (sequence or array).
+            t_max: Total simulation time, scalar or one value per run.
+            dt: Time step, None/scalar or one value (or None) per run.
+                None entries are calculated for stability as in HeatEquationSolver1D.
+        """
+        alpha = np.atleast_1d(np.asarray(alpha, dtype=float))
+        n_runs = alpha.shape[0]
+
+        self.nx = nx
+        self.n_runs = n_runs
+        self.L = np.broadcast_to(np.asarray(L, dtype=float), (n_runs,)).copy()
+        self.alpha = alpha
+        self.t_max = np.broadcast_to(np.asarray(t_max, dtype=float), (n_runs,)).copy()
+        self.dx = self.L / (nx - 1)
+
+        if dt is None or np.isscalar(dt):
+            dt = [dt] * n_runs
+        if len(dt) != n_runs:
+            raise ValueError(f"Expected {n_runs} dt values, got {len(dt)}")
+
+        # Same stability rule as the single-run solver, applied per run
+        limit_dt = 0.5 * self.dx**2 / alpha
+        self.dt = np.empty(n_runs)
+        for i, dt_i in enumerate(dt):
+            if dt_i is None:
+                self.dt[i] = 0.9 * limit_dt[i]
+            else:
+                if dt_i > limit_dt[i]:
+                    raise ValueError(
+                        f"Stability check failed for run {i}: dt={dt_i:.2e} > limit={limit_dt[i]:.2e} (r > 0.5)"
+                    )
+                self.dt[i] = dt_i
+
+        self.r = self.alpha * self.dt / self.dx**2
+        self.nt = np.array([int(tm / d) for tm, d in zip(self.t_max, self.dt)], dtype=int)
+        self.x = np.vstack([np.linspace(0, L_i, nx) for L_i in self.L])
+        self.u = np.zeros((n_runs, nx))
+
+    def set_initial_condition(self, func: Callable[[np.ndarray], np.ndarray]):
+        """
+        Set initial temperature profiles u(x, 0) = func(x) for every run.
+
+        Args:
+            func: A function that takes x array and returns u array.
+        """
+        self.u = np.vstack([func(x_i) for x_i in self.x])
+
+    def solve(self, save_interval=100, accumulators=None) -> List[List[Tuple[float, np.ndarray]]]:
+        """
+        Run all simulations in lock-step.
+
+        Args:
+            save_interval: Steps between saved timepoints, scalar or one value per run.
+            accumulators: Optional metric accumulators per run (one sequence
+                per run, in input order), updated with the run's state at
+                step 0 and after each of its time steps.
+
+        Returns:
+            histories: One history per run (same order as the inputs), each a
+            list of (time, temperature_array) tuples as returned by
+            HeatEquationSolver1D.solve.
+        """
+        save_interval = np.broadcast_to(np.asarray(save_interval, dtype=int), (self.n_runs,))
+
+        # Order runs by step count (longest first) so the active runs are
+        # always a leading slice of the batch and finished runs drop out.
+        order = np.argsort(-self.nt, kind="stable")
+        nt = self.nt[order]
+        r = self.r[order][:, None]
+        dt = self.dt[order]
+        si = save_interval[order]
+
+        u = self.u[order].copy()
         u_new = np.zeros_like(u)
-        
-        # Time-stepping
-        for n in range(1, self.nt + 1):
-            # Finite difference explicit scheme for interior points
-            # u_i^{n+1} = u_i^n + r * (u_{i+1}^n - 2u_i^n + u_{i-1}^n)
-            u_new[1:-1] = u[1:-1] + r * (u[2:] - 2*u[1:-1] + u[:-2])
-            
+        t = np.zeros(self.n_runs)
+
+        histories = [[(0.0, u[i].copy())] for i in range(self.n_runs)]
+        observers = [list(accumulators[i]) for i in order] if accumulators else []
+        for i, accs in enumerate(observers):
+            for acc in accs:
+                acc.update(0.0, u[i])
+
+        n_active = self.n_runs
+        for n in range(1, int(nt.max(initial=0)) + 1):
+            while n_active and nt[n_active - 1] < n:
+                n_active -= 1
+
+            a = u[:n_active]
+            b = u_new[:n_active]
+            b[:, 1:-1] = a[:, 1:-1] + r[:n_active] * (a[:, 2:] - 2*a[:, 1:-1] + a[:, :-2])
+
             # Boundary conditions: Fixed Dirichlet (T=0 at ends)
-            # In a more advanced version, this could be configurable-
-            u_new[0] = 0.0
-            u_new[-1] = 0.0
-            
-            # Update state
-            u[:] = u_new[:]
-            t += self.dt
-            
-            if n % save_interval == 0 or n == self.nt:
-                history.append((t, u.copy()))
-                
-        return history
+            b[:, 0] = 0.0
+            b[:, -1] = 0.0
+
+            a[:] = b
+            # n * dt like the single-run solvers (no accumulated rounding)
+            t[:n_active] = n * dt[:n_active]
+            for i, accs in enumerate(observers[:n_active]):
+                for acc in accs:
+                    acc.update(float(t[i]), u[i])
+
+            due = np.flatnonzero((n % si[:n_active] == 0) | (nt[:n_active] == n))
+            for i in due:
+                histories[i].append((float(t[i]), u[i].copy()))
+
+        # Restore caller order
+        result = [None] * self.n_runs
+        for pos, i in enumerate(order):
+            result[i] = histories[pos]
+        return result
@@ -2,11 +2,13 @@ import sys
 import os
 import itertools
 import yaml
-import csv
 import hashlib
+import functools
 import json
 import numpy as np
 import subprocess
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import platform
 import datetime
 # Add project root to path
@@ -19,14 +21,11 @@ from observability.context import RequestContext
 
 logger = get_logger(__name__)
 
-try:
-    import pandas as pd
-except ModuleNotFoundError:
-    pd = None
-
-from simulations.solver import HeatEquationSolver1D
+from simulations.solver import HeatEquationSolver1D, EnsembleHeatSolver1D, SpectralHeatSolver, create_solver
+from simulations.kernels import KERNEL_ENV_VAR
 # Import new metrics library
-from analysis.metrics import compute_run_metrics, load_timeseries
+from analysis.accumulators import FinalStateMetrics, accumulate, collect_results
+from analysis.timeseries import TIMESERIES_FILES, DEFAULT_FORMAT as DEFAULT_TIMESERIES_FORMAT, write_timeseries
 # Import cloud storage
 from scripts.cloud_storage import AzureRunStorage
 
@@ -47,85 +46,173 @@ def get_stable_id(params):
     param_str = json.dumps(clean_params, sort_keys=True)
     return hashlib.md5(param_str.encode('utf-8')).hexdigest()[:8]
 
-def run_simulation(params, output_base_dir):
+# Source files whose contents determine run outputs; editing any of them
+# invalidates the run cache.
+CACHE_FINGERPRINT_FILES = [
+    os.path.join('simulations', 'solver.py'),
+    os.path.join('simulations', 'kernels.py'),
+    os.path.join('simulations', 'sweep.py'),
+    os.path.join('analysis', 'metrics.py'),
+    os.path.join('analysis', 'accumulators.py'),
+    os.path.join('analysis', 'timeseries.py'),
+]
+
+@functools.lru_cache(maxsize=None)
+def code_fingerprint():
+    """Hash of the solver/metrics source code (computed once per process)."""
+    h = hashlib.sha256()
+    for rel_path in CACHE_FINGERPRINT_FILES:
+        h.update(rel_path.encode('utf-8'))
+        with open(os.path.join(project_root, rel_path), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def get_cache_key(params):
+    """Content address of a run: parameters plus the code fingerprint."""
+    param_str = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(f"{param_str}|{code_fingerprint()}".encode('utf-8')).hexdigest()[:16]
+
+def find_cached_run(params, output_base_dir, timeseries_format=DEFAULT_TIMESERIES_FORMAT):
+    """
+    Return the run directory if a complete run with a matching cache key
+    exists (metadata, metrics and a timeseries in the requested format),
+    else None.
+    """
+    run_dir = os.path.join(output_base_dir, f"run_{get_stable_id(params)}")
+    meta_path = os.path.join(run_dir, "metadata.json")
+    for name in ("metadata.json", "metrics.json", TIMESERIES_FILES[timeseries_format]):
+        if not os.path.exists(os.path.join(run_dir, name)):
+            return None
+    try:
+        with open(meta_path, 'r') as f:
+            cached_key = json.load(f).get('cache_key')
+    except (OSError, ValueError):
+        return None
+    return run_dir if cached_key == get_cache_key(params) else None
+
+def initial_peak(x):
+    """Consistent initial condition for fair comparison: peak in center."""
+    return np.exp(-100 * (x - 0.5)**2)
+
+def _solver_args(params):
+    """Extract solver arguments (with defaults) from a parameter set."""
+    args = {
+        'L': params.get('L', 1.0),
+        'nx': int(params.get('nx', 50)),
+        'alpha': params.get('alpha', 0.1),
+        't_max': params.get('t_max', 0.5),
+        'dt': params.get('dt', None),
+    }
+    # Only the spectral scheme has several modes; other schemes ignore a
+    # 'mode' inherited from the base config
+    if params.get('scheme') == SpectralHeatSolver.scheme and params.get('mode') is not None:
+        args['mode'] = params['mode']
+    return args
+
+def _write_json_atomic(path, data):
+    """Write JSON to a temp file and rename it into place (readers never see a partial file)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def save_run_artifacts(params, run_id, snapshots, dx, dt, steps, output_base_dir,
+                       timeseries_format=DEFAULT_TIMESERIES_FORMAT, mode=None, step_accumulators=()):
+    """
+    Persist timeseries, metadata and metrics for a run.
+
+    Args:
+        params (dict): Run parameters (as hashed into run_id).
+        run_id (str): Stable run identifier.
+        snapshots: Iterable of (time, temperature_array), e.g. a solver
+            history list or solver.iter_snapshots() for streaming.
+        dx, dt (float): Grid spacing and time step actually used.
+        steps (int): Number of time steps taken.
+        output_base_dir (str): Root directory for run folders.
+        timeseries_format (str): csv, parquet or npy (see analysis.timeseries).
+        mode (str, optional): Solver mode used (solver.mode), recorded in the
+            metadata so validation knows e.g. explicit spectral runs.
+        step_accumulators: Accumulators the solver updated at every time
+            step while producing snapshots; their results are added to
+            metrics.json once the snapshots are consumed.
+
+    metadata.json (which carries the cache key) is written last and
+    atomically, and any previous one is removed first, so an interrupted
+    rewrite never leaves a folder that find_cached_run accepts.
+
+    Returns:
+        str: Path of the run directory.
+    """
+    run_dir = os.path.join(output_base_dir, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    meta_path = os.path.join(run_dir, "metadata.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    
+    # 1. Save timeseries; metrics are accumulated from the same stream, so
+    # the file never has to be read back
+    final_state = FinalStateMetrics(dx, dt, params.get('alpha', 0.1))
+    write_timeseries(run_dir, accumulate(snapshots, [final_state]), fmt=timeseries_format)
+
+    # 2. Save Metrics
+    metrics = final_state.result()
+    metrics.update(collect_results(step_accumulators))
+    _write_json_atomic(os.path.join(run_dir, "metrics.json"), metrics)
+                
+    # 3. Enrich and Save Metadata (commits the run for the cache)
+    run_metadata = params.copy()
+    
+    # Enriched fields
+    run_metadata['actual_dt'] = dt
+    if mode is not None:
+        run_metadata['mode'] = mode
+    run_metadata['steps'] = steps
+    run_metadata['run_id'] = run_id
+    run_metadata['cache_key'] = get_cache_key(params)
+    run_metadata['git_commit_hash'] = get_git_revision_hash()
+    run_metadata['python_version'] = platform.python_version()
+    run_metadata['platform'] = platform.system()
+    run_metadata['created_at'] = datetime.datetime.utcnow().isoformat()
+    
+    _write_json_atomic(meta_path, run_metadata)
+
+    return run_dir
+
+def run_simulation(params, output_base_dir, backend=None, correlation_id=None,
+                   timeseries_format=DEFAULT_TIMESERIES_FORMAT, step_accumulators=None):
     """
     Run a single simulation with given params and save results.
+
+    Args:
+        params (dict): Simulation parameters.
+        output_base_dir (str): Root directory for run folders.
+        backend (str, optional): Stencil kernel backend (see simulations.kernels).
+        correlation_id (str, optional): Sweep-level correlation ID for the logs.
+        timeseries_format (str): Timeseries file format (csv, parquet or npy).
+        step_accumulators (callable, optional): step_accumulators(params, dx)
+            returns accumulators (e.g. analysis.accumulators.trajectory_accumulators)
+            updated at every time step; their results are added to
+            metrics.json. Must be a module-level function to reach workers.
     """
     run_id = f"run_{get_stable_id(params)}"
     
-    with RequestContext(run_id=run_id):
+    with RequestContext(correlation_id=correlation_id, run_id=run_id):
         log_event(logger, "simulation_run_start", f"Starting run {run_id}", params=params)
         
-        L = params.get('L', 1.0)
-        nx = int(params.get('nx', 50))
-        alpha = params.get('alpha', 0.1)
-        t_max = params.get('t_max', 0.5)
-        dt = params.get('dt', None)
         save_interval = int(params.get('save_interval', 20))
         
         try:
             with Timer("simulation_solve", description=f"Solver for {run_id}"):
-                solver = HeatEquationSolver1D(L=L, nx=nx, alpha=alpha, t_max=t_max, dt=dt)
-                
-                # Consistent initial condition for fair comparison
-                # Peak in center
-                def initial_peak(x):
-                    return np.exp(-100 * (x - 0.5)**2)
-                
+                solver = create_solver(params.get('scheme'), backend=backend, **_solver_args(params))
                 solver.set_initial_condition(initial_peak)
+                accumulators = step_accumulators(params, solver.dx) if step_accumulators else ()
                 
-                results = solver.solve(save_interval=save_interval)
-            
-            # Save results (FileSystem)
-            run_dir = os.path.join(output_base_dir, run_id)
-            os.makedirs(run_dir, exist_ok=True)
-            
-            # 1. Save results CSV
-            data = []
-            for t, u in results:
-                row = {'time': t}
-                for i, val in enumerate(u):
-                    row[f'p{i}'] = val
-                data.append(row)
-                
-            csv_path = os.path.join(run_dir, "timeseries.csv")
-            
-            if pd:
-                df = pd.DataFrame(data)
-                df.to_csv(csv_path, index=False)
-            else:
-                if data:
-                    fieldnames = list(data[0].keys())
-                    with open(csv_path, 'w', newline='') as f:
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        writer.writerows(data)
-                        
-            # 2. Enrich and Save Metadata
-            run_metadata = params.copy()
-            
-            # Enriched fields
-            run_metadata['actual_dt'] = solver.dt
-            run_metadata['steps'] = solver.nt
-            run_metadata['run_id'] = run_id
-            run_metadata['git_commit_hash'] = get_git_revision_hash()
-            run_metadata['python_version'] = platform.python_version()
-            run_metadata['platform'] = platform.system()
-            run_metadata['created_at'] = datetime.datetime.utcnow().isoformat()
-            
-            with open(os.path.join(run_dir, "metadata.json"), 'w') as f:
-                json.dump(run_metadata, f, indent=2)
-                
-            # 3. Compute Metrics (Strictly from CSV/Saved State)
-            if pd:
-                loaded_df = load_timeseries(csv_path)
-                metrics = compute_run_metrics(loaded_df, solver.dx, solver.dt, alpha)
-                
-                with open(os.path.join(run_dir, "metrics.json"), 'w') as f:
-                    json.dump(metrics, f, indent=2)
-                    
-            else:
-                logger.warning("Pandas not found, skipping metrics generation.")
+                # Save results (FileSystem), streaming snapshots straight to disk
+                run_dir = save_run_artifacts(
+                    params, run_id, solver.iter_snapshots(save_interval, accumulators),
+                    solver.dx, solver.dt, solver.nt, output_base_dir,
+                    timeseries_format=timeseries_format, mode=solver.mode, step_accumulators=accumulators,
+                )
     
             log_event(logger, "simulation_run_success", f"Run {run_id} completed.", run_dir=run_dir)
             return run_dir
@@ -134,58 +221,469 @@ def run_simulation(params, output_base_dir):
             log_event(logger, "simulation_run_failed", f"Run {run_id} FAILED", error=str(e))
             return None
 
-def main():
-    base_config_path = os.path.join(project_root, 'configs', 'base.yaml')
-    
-    # Allow overriding sweep config via env var
-    sweep_config_env = os.environ.get("SWEEP_CONFIG")
-    if sweep_config_env:
-        sweep_config_path = os.path.abspath(sweep_config_env)
-        logger.info(f"Using sweep config from env: {sweep_config_path}")
-    else:
-        sweep_config_path = os.path.join(project_root, 'configs', 'sweep.yaml')
-        logger.info(f"Using default sweep config: {sweep_config_path}")
-    
-    base_config = load_config(base_config_path)
-    sweep_config = load_config(sweep_config_path)
-    
-    base_params = base_config['simulation']
-    sweep_params = sweep_config['sweep']
-    
-    # Generate Cartesian product of sweep parameters
+def _start_run(params, run_id, correlation_id, build):
+    """
+    Log the start of one run of a batch and build its solver state with
+    build(); a failure is logged as that run's failure. Returns build()'s
+    result, or None if it raised.
+    """
+    with RequestContext(correlation_id=correlation_id, run_id=run_id):
+        log_event(logger, "simulation_run_start", f"Starting run {run_id}", params=params)
+        try:
+            return build()
+        except Exception as e:
+            log_event(logger, "simulation_run_failed", f"Run {run_id} FAILED", error=str(e))
+            return None
+
+def _save_run(params, run_id, snapshots, dx, dt, steps, output_base_dir, correlation_id, **options):
+    """save_run_artifacts for one run of a batch, logged in its context. Returns the run_dir or None."""
+    with RequestContext(correlation_id=correlation_id, run_id=run_id):
+        try:
+            run_dir = save_run_artifacts(params, run_id, snapshots, dx, dt, steps, output_base_dir, **options)
+        except Exception as e:
+            log_event(logger, "simulation_run_failed", f"Run {run_id} FAILED", error=str(e))
+            return None
+        log_event(logger, "simulation_run_success", f"Run {run_id} completed.", run_dir=run_dir)
+        return run_dir
+
+def _solve_ensemble_group(group_params, step_accumulators):
+    """
+    Advance runs sharing nx as one EnsembleHeatSolver1D.
+
+    Returns:
+        (solver, histories, accumulators): histories and accumulators in
+        the order of group_params.
+    """
+    args = [_solver_args(params) for params in group_params]
+    solver = EnsembleHeatSolver1D(
+        L=[a['L'] for a in args],
+        nx=args[0]['nx'],
+        alpha=[a['alpha'] for a in args],
+        t_max=[a['t_max'] for a in args],
+        dt=[a['dt'] for a in args],
+    )
+    solver.set_initial_condition(initial_peak)
+    accumulators = [step_accumulators(params, float(solver.dx[pos])) if step_accumulators else ()
+                    for pos, params in enumerate(group_params)]
+    histories = solver.solve(
+        save_interval=[int(params.get('save_interval', 20)) for params in group_params],
+        accumulators=accumulators if step_accumulators else None,
+    )
+    return solver, histories, accumulators
+
+def run_ensemble(params_list, output_base_dir, backend=None, correlation_id=None,
+                 timeseries_format=DEFAULT_TIMESERIES_FORMAT, step_accumulators=None):
+    """
+    Run many simulations through EnsembleHeatSolver1D.
+
+    Runs are grouped by nx and each group is advanced as one (n_runs, nx)
+    array. Runs whose parameters are invalid fail individually, exactly as
+    they would in run_simulation. Only the explicit scheme is batched; runs
+    using another scheme are delegated to run_simulation. step_accumulators
+    is as in run_simulation.
+
+    Returns:
+        list: run_dir (or None on failure) for each params, in input order.
+    """
+    run_ids = [f"run_{get_stable_id(p)}" for p in params_list]
+    run_dirs = [None] * len(params_list)
+
+    # Validate each run on its own so one bad combination cannot sink its group
+    groups = {}
+    for idx, (params, run_id) in enumerate(zip(params_list, run_ids)):
+        if params.get('scheme', HeatEquationSolver1D.scheme) != HeatEquationSolver1D.scheme:
+            run_dirs[idx] = run_simulation(params, output_base_dir, backend=backend, correlation_id=correlation_id,
+                                           timeseries_format=timeseries_format, step_accumulators=step_accumulators)
+        elif _start_run(params, run_id, correlation_id, lambda: HeatEquationSolver1D(**_solver_args(params))):
+            groups.setdefault(_solver_args(params)['nx'], []).append(idx)
+
+    for nx, members in groups.items():
+        try:
+            with Timer("simulation_solve", description=f"Ensemble solver for {len(members)} runs (nx={nx})"):
+                solver, histories, accumulators = _solve_ensemble_group(
+                    [params_list[i] for i in members], step_accumulators)
+        except Exception as e:
+            log_event(logger, "simulation_ensemble_failed", f"Ensemble for nx={nx} FAILED", error=str(e))
+            continue
+
+        for pos, idx in enumerate(members):
+            run_dirs[idx] = _save_run(
+                params_list[idx], run_ids[idx], histories[pos],
+                float(solver.dx[pos]), float(solver.dt[pos]), int(solver.nt[pos]), output_base_dir, correlation_id,
+                timeseries_format=timeseries_format, step_accumulators=accumulators[pos],
+            )
+
+    return run_dirs
+
+# Parameters that only decide how far / how often a trajectory is sampled.
+# Runs differing only in these are prefixes of the longest member's trajectory.
+PREFIX_KEYS = ('t_max', 'save_interval')
+
+def prefix_group_key(params):
+    """Parameters excluding PREFIX_KEYS, as a hashable key."""
+    return json.dumps({k: v for k, v in params.items() if k not in PREFIX_KEYS}, sort_keys=True)
+
+class _Horizon:
+    """Forwards the shared trajectory to a member's accumulators up to the member's own t_max."""
+
+    def __init__(self, t_end, accumulators):
+        self.t_end = t_end
+        self.accumulators = accumulators
+
+    def update(self, t, u):
+        # Shared and member steps are both n * dt with the same dt, so this is exact
+        if t <= self.t_end:
+            for acc in self.accumulators:
+                acc.update(t, u)
+
+
+def _shared_trajectory(members, params_list, backend, step_accumulators):
+    """
+    Integrate a prefix group once, to its longest member's horizon.
+
+    Args:
+        members: {index: (solver, save_steps)} of the valid members.
+
+    Returns:
+        (histories, accumulators): per member index, its (times, snapshots)
+        and its step accumulators.
+    """
+    longest = max(members, key=lambda i: members[i][0].nt)
+    histories = {i: ([], []) for i in members}
+    step_owners = {}
+    for i, (_, steps) in members.items():
+        for n in steps:
+            step_owners.setdefault(n, []).append(i)
+
+    accumulators = {i: step_accumulators(params_list[i], member_solver.dx) if step_accumulators else ()
+                    for i, (member_solver, _) in members.items()}
+    horizons = [_Horizon(members[i][0].nt * members[i][0].dt, accumulators[i]) for i in members if accumulators[i]]
+    solver = create_solver(params_list[longest].get('scheme'), backend=backend, **_solver_args(params_list[longest]))
+    solver.set_initial_condition(initial_peak)
+    for n, t, u in solver.iter_steps(sorted(step_owners), horizons):
+        snapshot = u.copy()
+        for i in step_owners[n]:
+            histories[i][0].append(t)
+            histories[i][1].append(snapshot)
+    return histories, accumulators
+
+def run_prefix_group(params_list, output_base_dir, backend=None, correlation_id=None,
+                     timeseries_format=DEFAULT_TIMESERIES_FORMAT, step_accumulators=None):
+    """
+    Run combinations that differ only in t_max and/or save_interval from a
+    single trajectory.
+
+    The group is integrated once to its largest horizon, visiting the union
+    of every member's save steps; each member's history is then exactly what
+    an independent run would have produced. Invalid members fail individually.
+    step_accumulators is as in run_simulation; each member's accumulators see
+    the shared steps up to its own t_max.
+
+    Returns:
+        list: run_dir (or None on failure) for each params, in input order.
+    """
+    run_ids = [f"run_{get_stable_id(p)}" for p in params_list]
+    run_dirs = [None] * len(params_list)
+
+    def build(params):
+        solver = create_solver(params.get('scheme'), backend=backend, **_solver_args(params))
+        return solver, solver.save_steps(int(params.get('save_interval', 20)))
+
+    members = {}
+    for idx, (params, run_id) in enumerate(zip(params_list, run_ids)):
+        member = _start_run(params, run_id, correlation_id, lambda: build(params))
+        if member is not None:
+            members[idx] = member
+
+    if not members:
+        return run_dirs
+
+    try:
+        with Timer("simulation_solve", description=f"Shared trajectory for {len(members)} runs"):
+            histories, accumulators = _shared_trajectory(members, params_list, backend, step_accumulators)
+    except Exception as e:
+        log_event(logger, "simulation_prefix_group_failed", f"Shared trajectory for {len(members)} runs FAILED",
+                  error=str(e))
+        return run_dirs
+
+    for idx, (member_solver, _) in members.items():
+        times, snapshots = histories[idx]
+        run_dirs[idx] = _save_run(
+            params_list[idx], run_ids[idx], zip(times, snapshots),
+            member_solver.dx, member_solver.dt, member_solver.nt, output_base_dir, correlation_id,
+            timeseries_format=timeseries_format, mode=member_solver.mode, step_accumulators=accumulators[idx],
+        )
+
+    return run_dirs
+
+def plan_tasks(params_list, ensemble=False, workers=1, share_prefixes=True):
+    """
+    Split a sweep into independent tasks.
+
+    A task is (kind, indices): "prefix" tasks serve combinations that differ
+    only in t_max/save_interval from one trajectory (run_prefix_group);
+    "single" tasks run one combination through run_simulation; "ensemble"
+    tasks batch the remaining combinations sharing nx through run_ensemble.
+    With several workers, each nx group is split into up to `workers`
+    slices so the pool stays balanced.
+    """
+    tasks = []
+    remaining = list(range(len(params_list)))
+
+    if share_prefixes:
+        prefix_groups = {}
+        for i in remaining:
+            prefix_groups.setdefault(prefix_group_key(params_list[i]), []).append(i)
+        remaining = []
+        for indices in prefix_groups.values():
+            if len(indices) > 1:
+                tasks.append(("prefix", indices))
+            else:
+                remaining.extend(indices)
+        remaining.sort()
+
+    if not ensemble:
+        return tasks + [("single", [i]) for i in remaining]
+
+    groups = {}
+    for i in remaining:
+        groups.setdefault(_solver_args(params_list[i])['nx'], []).append(i)
+
+    for indices in groups.values():
+        n_slices = max(1, min(workers, len(indices)))
+        for k in range(n_slices):
+            tasks.append(("ensemble", indices[k::n_slices]))
+    return tasks
+
+def _run_task(kind, task_params, output_base_dir, run_options):
+    """
+    Run one planned task; returns run_dir or None for each of task_params.
+    run_options are keyword arguments for the run functions (backend,
+    correlation_id, timeseries_format, step_accumulators).
+    """
+    if kind == "ensemble":
+        return run_ensemble(task_params, output_base_dir, **run_options)
+    if kind == "prefix":
+        return run_prefix_group(task_params, output_base_dir, **run_options)
+    return [run_simulation(params, output_base_dir, **run_options) for params in task_params]
+
+def _run_chunk(chunk, output_base_dir, run_options):
+    """Worker entry point: run a chunk of (kind, task_params) tasks."""
+    results = []
+    for kind, task_params in chunk:
+        try:
+            results.append(_run_task(kind, task_params, output_base_dir, run_options))
+        except Exception as e:
+            log_event(logger, "simulation_task_failed", f"Sweep task ({kind}) FAILED", error=str(e))
+            results.append([None] * len(task_params))
+    return results
+
+def execute_sweep(params_list, output_base_dir, ensemble=False, workers=1, chunksize=None,
+                  backend=None, correlation_id=None, share_prefixes=True,
+                  timeseries_format=DEFAULT_TIMESERIES_FORMAT, step_accumulators=None):
+    """
+    Execute every combination, serially or on a process pool.
+
+    Each run is isolated: failures yield None at its position, as with
+    run_simulation. Results are returned in the order of params_list
+    regardless of completion order, and run folders are named by the
+    stable parameter hash, so output is deterministic for any worker count.
+
+    Args:
+        params_list (list): Parameter dicts, one per run.
+        output_base_dir (str): Root directory for run folders.
+        ensemble (bool): Batch runs sharing nx through EnsembleHeatSolver1D.
+        workers (int): Number of worker processes (1 = run in-process).
+        chunksize (int, optional): Tasks per submission; default spreads the
+            tasks over roughly four chunks per worker.
+        backend (str, optional): Stencil kernel backend.
+        correlation_id (str, optional): Correlation ID shared by all run logs.
+        share_prefixes (bool): Serve runs that differ only in t_max and/or
+            save_interval from a single trajectory.
+        timeseries_format (str): Timeseries file format (csv, parquet or npy).
+        step_accumulators (callable, optional): Per-step metric accumulators
+            for each run (see run_simulation).
+
+    Returns:
+        list: run_dir or None for each params, in input order.
+    """
+    tasks = plan_tasks(params_list, ensemble=ensemble, workers=workers, share_prefixes=share_prefixes)
+    run_dirs = [None] * len(params_list)
+    run_options = {'backend': backend, 'correlation_id': correlation_id, 'timeseries_format': timeseries_format,
+                   'step_accumulators': step_accumulators}
+
+    def collect(indices, task_run_dirs):
+        for i, run_dir in zip(indices, task_run_dirs):
+            run_dirs[i] = run_dir
+
+    if workers <= 1:
+        for kind, indices in tasks:
+            collect(indices, _run_task(kind, [params_list[i] for i in indices], output_base_dir, run_options))
+        return run_dirs
+
+    if not chunksize:
+        chunksize = max(1, len(tasks) // (workers * 4))
+    chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+    logger.info(f"Dispatching {len(tasks)} tasks in {len(chunks)} chunks to {workers} workers.")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _run_chunk,
+                [(kind, [params_list[i] for i in indices]) for kind, indices in chunk],
+                output_base_dir, run_options,
+            )
+            for chunk in chunks
+        ]
+        for chunk, future in zip(chunks, futures):
+            try:
+                for (_, indices), task_run_dirs in zip(chunk, future.result()):
+                    collect(indices, task_run_dirs)
+            except Exception as e:
+                # Keep going: a crashed worker only fails the chunks it could not finish
+                log_event(logger, "simulation_chunk_failed", f"Worker chunk of {len(chunk)} tasks FAILED", error=str(e))
+
+    return run_dirs
+
+def resolve_workers(value):
+    """Parse a worker count; 0 or 'auto' means one worker per CPU."""
+    if value is None:
+        return 1
+    if str(value).strip().lower() in ('0', 'auto'):
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+def build_param_combinations(base_params, sweep_params):
+    """Merge base params with every Cartesian combination of the sweep axes."""
     keys = list(sweep_params.keys())
     values = list(sweep_params.values())
-    combinations = list(itertools.product(*values))
-    
-    logger.info(f"Found {len(combinations)} parameter combinations to sweep.")
-    
-    # Allow overriding output root via env var
-    output_root_env = os.environ.get("OUTPUT_ROOT")
-    if output_root_env:
-        results_dir = os.path.abspath(output_root_env)
-        logger.info(f"Using output root from env: {results_dir}")
-    else:
-        results_dir = os.path.join(project_root, 'results', 'runs')
-        logger.info(f"Using default output root: {results_dir}")
-        
-    os.makedirs(results_dir, exist_ok=True)
-    
-    for combo in combinations:
-        # Merge base params with sweep overrides
+
+    params_list = []
+    for combo in itertools.product(*values):
         current_params = base_params.copy()
         for i, key in enumerate(keys):
             current_params[key] = combo[i]
-            
-        # Run simulation
-        run_dir = run_simulation(current_params, results_dir)
-        
-        # Attempt upload if successful
+        params_list.append(current_params)
+    return params_list
+
+def _env_flag(name):
+    value = os.environ.get(name)
+    if value is None:
+        return None
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run a parameter sweep of the heat equation solver.')
+    parser.add_argument('--ensemble', action='store_true', default=None,
+                        help='Advance runs sharing the same nx as one batched array (env: SWEEP_ENSEMBLE)')
+    parser.add_argument('--workers', type=str, default=None,
+                        help='Worker processes; 0 or "auto" uses every CPU (env: SWEEP_WORKERS, default: 1)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Tasks per worker submission (default: ~4 chunks per worker)')
+    parser.add_argument('--no-prefix-sharing', dest='share_prefixes', action='store_false',
+                        help='Integrate runs that differ only in t_max/save_interval separately')
+    parser.add_argument('--force', action='store_true',
+                        help='Recompute every run even if a complete cached result exists')
+    parser.add_argument('--backend', type=str, default=None,
+                        help=f'Stencil kernel backend: numpy, inplace or numba (env: {KERNEL_ENV_VAR})')
+    parser.add_argument('--timeseries-format', choices=sorted(TIMESERIES_FILES), default=None,
+                        help='Run timeseries file format (env: SWEEP_TIMESERIES_FORMAT, default: csv)')
+    return parser.parse_args(argv)
+
+def _path_from_env(name, default, description):
+    """Absolute path from environment variable name, else default; logs which one is used."""
+    value = os.environ.get(name)
+    if value:
+        path = os.path.abspath(value)
+        logger.info(f"Using {description} from env: {path}")
+    else:
+        path = default
+        logger.info(f"Using default {description}: {path}")
+    return path
+
+def resolve_execution(args, execution):
+    """
+    Execution options of a sweep. Precedence: CLI flag > environment
+    variable > the sweep config's execution section.
+
+    Raises:
+        ValueError: If the timeseries format is unknown.
+    """
+    ensemble = args.ensemble
+    if ensemble is None:
+        ensemble = _env_flag("SWEEP_ENSEMBLE")
+    if ensemble is None:
+        ensemble = bool(execution.get('ensemble', False))
+
+    timeseries_format = (args.timeseries_format or os.environ.get("SWEEP_TIMESERIES_FORMAT")
+                         or execution.get('timeseries_format') or DEFAULT_TIMESERIES_FORMAT)
+    if timeseries_format not in TIMESERIES_FILES:
+        raise ValueError(f"Unknown timeseries format '{timeseries_format}'. Available: {sorted(TIMESERIES_FILES)}")
+    return {
+        'ensemble': ensemble,
+        'workers': resolve_workers(args.workers or os.environ.get("SWEEP_WORKERS") or execution.get('workers')),
+        'chunksize': args.chunksize or execution.get('chunksize'),
+        'backend': args.backend or os.environ.get(KERNEL_ENV_VAR) or execution.get('backend'),
+        'share_prefixes': args.share_prefixes and execution.get('share_prefixes', True),
+        'timeseries_format': timeseries_format,
+    }
+
+def _pending_runs(params_list, results_dir, timeseries_format, force=False):
+    """Indices of the combinations without complete cached results on disk (all of them with force)."""
+    pending = []
+    for i, current_params in enumerate(params_list):
+        cached = None if force else find_cached_run(current_params, results_dir, timeseries_format)
+        if cached:
+            log_event(logger, "simulation_run_cache_hit", f"Cache hit: {os.path.basename(cached)}",
+                      run_dir=cached)
+        else:
+            pending.append(i)
+    log_event(logger, "sweep_cache_summary",
+              f"{len(params_list) - len(pending)} cache hits, {len(pending)} runs to compute",
+              cache_hits=len(params_list) - len(pending), cache_misses=len(pending))
+    return pending
+
+def _upload_runs(run_dirs):
+    """Upload the successful runs to cloud storage, if it is configured."""
+    for run_dir in run_dirs:
         if run_dir:
             # Initialize storage (will log warning if disabled)
             storage = AzureRunStorage()
             if storage.is_enabled():
-                run_id = os.path.basename(run_dir)
-                storage.upload_run(run_id, run_dir)
+                storage.upload_run(os.path.basename(run_dir), run_dir)
+
+def main(argv=None):
+    args = parse_args(argv)
+    base_config_path = os.path.join(project_root, 'configs', 'base.yaml')
+    sweep_config_path = _path_from_env("SWEEP_CONFIG", os.path.join(project_root, 'configs', 'sweep.yaml'),
+                                       "sweep config")
+
+    base_config = load_config(base_config_path)
+    sweep_config = load_config(sweep_config_path)
+    # Execution options do not change results, so they stay out of the run hash.
+    options = resolve_execution(args, sweep_config.get('execution') or {})
+
+    # Generate Cartesian product of sweep parameters
+    params_list = build_param_combinations(base_config['simulation'], sweep_config['sweep'])
+    logger.info(f"Found {len(params_list)} parameter combinations to sweep.")
+
+    results_dir = _path_from_env("OUTPUT_ROOT", os.path.join(project_root, 'results', 'runs'), "output root")
+    os.makedirs(results_dir, exist_ok=True)
+
+    if options['ensemble']:
+        logger.info("Running sweep in ensemble mode.")
+
+    with RequestContext() as ctx:
+        # Skip combinations whose complete results are already on disk
+        pending = _pending_runs(params_list, results_dir, options['timeseries_format'], force=args.force)
+        log_event(logger, "sweep_start", f"Sweeping {len(pending)} runs with {options['workers']} worker(s)",
+                  workers=options['workers'], ensemble=options['ensemble'])
+        with Timer("sweep_execute", description=f"Sweep of {len(pending)} runs"):
+            computed = execute_sweep([params_list[i] for i in pending], results_dir,
+                                     correlation_id=ctx.correlation_id, **options)
+
+    # Only freshly computed runs need uploading; cache hits were uploaded before
+    _upload_runs(computed)
 
 if __name__ == "__main__":
     main()
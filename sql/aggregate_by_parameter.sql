@@ -1,17 +1,35 @@
 -- Aggregate Performance by Parameter Value
 -- This query helps answer: "How does changing 'alpha' affect stability and max temp?"
+-- One GROUP BY per typed column of run_parameters (values sort numerically).
+-- dt is the requested step (NULL = auto-calculated); actual_dt is the step the
+-- solver used (NULL only for backfilled runs whose metadata was unavailable).
 
-SELECT 
-    p.param_name,
-    p.param_value,
-    COUNT(m.run_id) as run_count,
-    AVG(m.max_temperature) as avg_max_temp,
-    MIN(m.max_temperature) as min_max_temp,
-    MAX(m.max_temperature) as max_max_temp,
-    AVG(m.stability_ratio) as avg_stability,
-    SUM(CASE WHEN m.stability_ratio > 0.5 THEN 1 ELSE 0 END) as unstable_runs
-FROM metrics m
-JOIN parameters p ON m.run_id = p.run_id
-WHERE p.param_name IN ('alpha', 'nx', 'dt') -- Customize as needed
-GROUP BY p.param_name, p.param_value
-ORDER BY p.param_name, p.param_value;
+WITH runs_with_metrics AS (
+    SELECT rp.alpha, rp.nx, rp.dt, rp.actual_dt, m.max_temperature, m.stability_ratio
+    FROM run_parameters rp
+    JOIN metrics m ON m.run_id = rp.run_id
+)
+SELECT 'alpha' AS param_name, alpha AS param_value,
+    COUNT(*) as run_count,
+    AVG(max_temperature) as avg_max_temp,
+    MIN(max_temperature) as min_max_temp,
+    MAX(max_temperature) as max_max_temp,
+    AVG(stability_ratio) as avg_stability,
+    SUM(CASE WHEN stability_ratio > 0.5 THEN 1 ELSE 0 END) as unstable_runs
+FROM runs_with_metrics GROUP BY alpha
+UNION ALL
+SELECT 'nx', nx,
+    COUNT(*), AVG(max_temperature), MIN(max_temperature), MAX(max_temperature), AVG(stability_ratio),
+    SUM(CASE WHEN stability_ratio > 0.5 THEN 1 ELSE 0 END)
+FROM runs_with_metrics GROUP BY nx
+UNION ALL
+SELECT 'dt', dt,
+    COUNT(*), AVG(max_temperature), MIN(max_temperature), MAX(max_temperature), AVG(stability_ratio),
+    SUM(CASE WHEN stability_ratio > 0.5 THEN 1 ELSE 0 END)
+FROM runs_with_metrics GROUP BY dt -- Customize as needed
+UNION ALL
+SELECT 'actual_dt', actual_dt,
+    COUNT(*), AVG(max_temperature), MIN(max_temperature), MAX(max_temperature), AVG(stability_ratio),
+    SUM(CASE WHEN stability_ratio > 0.5 THEN 1 ELSE 0 END)
+FROM runs_with_metrics WHERE actual_dt IS NOT NULL GROUP BY actual_dt
+ORDER BY param_name, param_value;
@@ -5,13 +5,12 @@ SELECT
     m.run_id,
     m.max_temperature,
     m.stability_ratio,
-    p_alpha.param_value as alpha,
-    p_nx.param_value as nx,
+    rp.alpha,
+    rp.nx,
     m.energy_like_metric
 FROM metrics m
--- pivoting parameters for readability
-LEFT JOIN parameters p_alpha ON m.run_id = p_alpha.run_id AND p_alpha.param_name = 'alpha'
-LEFT JOIN parameters p_nx ON m.run_id = p_nx.run_id AND p_nx.param_name = 'nx'
+-- typed parameters: one row per run, no per-parameter joins
+LEFT JOIN run_parameters rp ON rp.run_id = m.run_id
 WHERE m.stability_ratio <= 0.5 -- Filter for stable runs only
-ORDER BY m.max_temperature DESC
+ORDER BY m.max_temperature DESC -- walks idx_metrics_max_temp backwards, stops after 10 matches
 LIMIT 10;
@@ -42,3 +42,101 @@ CREATE TABLE IF NOT EXISTS metrics (
     stability_ratio REAL,
     FOREIGN KEY(run_id) REFERENCES runs(run_id)
 );
+
+-- 4. Ingest Ledger: fingerprint of each run's artifacts when it was last ingested
+-- Repeat ingests skip runs whose fingerprint is unchanged. Keyed per results
+-- folder (run_dir, normalized with os.path.realpath), so roots holding runs of
+-- the same name keep separate fingerprints and pruning stays within a folder.
+CREATE TABLE IF NOT EXISTS ingest_ledger (
+    run_dir TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    fingerprint TEXT,
+    ingested_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_dir, run_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ledger_run_id ON ingest_ledger(run_id);
+
+-- 5. Run Parameters: typed, one row per run for the known simulation inputs
+-- Kept in sync with `parameters` by ingest. Numeric filters and comparisons
+-- use these columns (and their indexes) instead of casting param_value.
+-- dt is the requested step (NULL = auto); actual_dt is the step the solver used.
+CREATE TABLE IF NOT EXISTS run_parameters (
+    run_id TEXT PRIMARY KEY,
+    alpha REAL,
+    nx INTEGER,
+    dt REAL,
+    actual_dt REAL,
+    L REAL,
+    t_max REAL,
+    save_interval INTEGER,
+    scheme TEXT,
+    FOREIGN KEY(run_id) REFERENCES runs(run_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_run_params_alpha_nx ON run_parameters(alpha, nx);
+CREATE INDEX IF NOT EXISTS idx_run_params_nx_alpha ON run_parameters(nx, alpha);
+CREATE INDEX IF NOT EXISTS idx_run_params_scheme_dt ON run_parameters(scheme, actual_dt);
+
+-- Top-N by max temperature scans this index in order and filters on stability without touching the table
+CREATE INDEX IF NOT EXISTS idx_metrics_max_temp ON metrics(max_temperature, stability_ratio);
+
+-- Backfill runs ingested before run_parameters existed (actual_dt is only in
+-- the run artifacts; re-ingest with --overwrite to fill it)
+INSERT OR IGNORE INTO run_parameters (run_id, alpha, nx, dt, L, t_max, save_interval, scheme)
+SELECT
+    run_id,
+    MAX(CASE WHEN param_name = 'alpha' THEN CAST(param_value AS REAL) END),
+    MAX(CASE WHEN param_name = 'nx' THEN CAST(param_value AS INTEGER) END),
+    MAX(CASE WHEN param_name = 'dt' AND param_value NOT IN ('None', '') THEN CAST(param_value AS REAL) END),
+    MAX(CASE WHEN param_name = 'L' THEN CAST(param_value AS REAL) END),
+    MAX(CASE WHEN param_name = 't_max' THEN CAST(param_value AS REAL) END),
+    MAX(CASE WHEN param_name = 'save_interval' THEN CAST(param_value AS INTEGER) END),
+    COALESCE(MAX(CASE WHEN param_name = 'scheme' THEN param_value END), 'explicit')
+FROM parameters
+-- Driven from runs so a fully backfilled database costs one pass over runs, not parameters
+WHERE run_id IN (SELECT run_id FROM runs WHERE run_id NOT IN (SELECT run_id FROM run_parameters))
+GROUP BY run_id;
+
+-- 6. Parameter Rollups: per (param_name, param_value) aggregates of the metrics
+-- Maintained incrementally by ingest (scripts/rollups.py): inserts add their
+-- deltas; removing or replacing a run subtracts its contribution and marks the
+-- row dirty when min/max may have changed, and dirty rows are recomputed at the
+-- end of the ingest. `scripts/ingest_data.py --rebuild-rollups` recomputes all.
+-- Counts of non-NULL values keep averages exact (AVG ignores NULLs).
+CREATE TABLE IF NOT EXISTS param_rollups (
+    param_name TEXT NOT NULL,
+    param_value REAL NOT NULL,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    max_temp_count INTEGER NOT NULL DEFAULT 0,
+    sum_max_temp REAL NOT NULL DEFAULT 0,
+    min_max_temp REAL,
+    max_max_temp REAL,
+    stability_count INTEGER NOT NULL DEFAULT 0,
+    sum_stability REAL NOT NULL DEFAULT 0,
+    unstable_runs INTEGER NOT NULL DEFAULT 0,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (param_name, param_value)
+);
+
+-- Same columns as sql/aggregate_by_parameter.sql, read from the rollups
+CREATE VIEW IF NOT EXISTS param_rollup_stats AS
+SELECT
+    param_name,
+    param_value,
+    run_count,
+    CASE WHEN max_temp_count > 0 THEN sum_max_temp / max_temp_count END AS avg_max_temp,
+    min_max_temp,
+    max_max_temp,
+    CASE WHEN stability_count > 0 THEN sum_stability / stability_count END AS avg_stability,
+    unstable_runs
+FROM param_rollups
+WHERE run_count > 0;
+
+-- Dirty rollup rows are recomputed per value; alpha and nx lead the composite indexes above
+CREATE INDEX IF NOT EXISTS idx_run_params_actual_dt ON run_parameters(actual_dt);
+
+-- Keyset pagination of GET /runs: one index per sortable column, tie-broken by run_id
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp, run_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_stability_run ON metrics(stability_ratio, run_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_max_temp_run ON metrics(max_temperature, run_id);
@@ -0,0 +1,9 @@
+-- Parameter Rollups (incrementally maintained)
+-- Same answer as aggregate_by_parameter.sql without scanning every run.
+-- NULL parameter values (dt of auto-step runs, actual_dt of backfilled runs
+-- without metadata) are not rolled up.
+
+SELECT *
+FROM param_rollup_stats
+WHERE param_name IN ('alpha', 'nx', 'dt', 'actual_dt') -- Customize as needed
+ORDER BY param_name, param_value;
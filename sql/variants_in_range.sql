@@ -0,0 +1,17 @@
+-- Compare Variants Within a Parameter Range
+-- This query helps answer: "For nx = 50, how do runs with alpha between 0.05 and 0.2 compare?"
+-- Runs as a range scan on idx_run_params_nx_alpha (equality on nx, range on alpha).
+
+SELECT
+    rp.run_id,
+    rp.alpha,
+    rp.nx,
+    rp.actual_dt,
+    m.max_temperature,
+    m.energy_like_metric,
+    m.stability_ratio
+FROM run_parameters rp
+JOIN metrics m ON m.run_id = rp.run_id
+WHERE rp.nx = 50 -- Customize as needed
+  AND rp.alpha BETWEEN 0.05 AND 0.2
+ORDER BY rp.alpha;
@@ -0,0 +1,51 @@
+import pytest
+import os
+import sys
+import sqlite3
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+duckdb = pytest.importorskip("duckdb")
+
+from simulations.sweep import execute_sweep
+from scripts.ingest_data import ingest_all
+from analysis.duckdb_backend import connect, run_sql_file
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), '..', 'sql')
+
+def test_duckdb_views_match_sqlite_ingest(tmp_path):
+    """The bundled queries return the same rows over artifacts (DuckDB) as over the ingested DB (SQLite)."""
+    pytest.importorskip("pyarrow")
+    runs_dir = tmp_path / "runs"
+    base = {'L': 1.0, 'dt': None, 'save_interval': 10}
+    params_list = [dict(base, alpha=a, nx=n, t_max=0.05) for a in (0.05, 0.1, 0.2) for n in (20, 50)]
+    assert all(execute_sweep(params_list, str(runs_dir), timeseries_format="parquet"))
+
+    db_path = str(tmp_path / "analytics.db")
+    ingest_all(str(runs_dir), db_path=db_path)
+    sqlite_conn = sqlite3.connect(db_path)
+    duck = connect(runs_dir)
+
+    for name in ("compare_variants.sql", "aggregate_by_parameter.sql", "param_rollups.sql"):
+        with open(os.path.join(SQL_DIR, name)) as f:
+            query = f.read()
+        expected = sqlite_conn.execute(query).fetchall()
+        # pandas reads NULLs of numeric columns back as NaN
+        actual = [tuple(None if isinstance(v, float) and v != v else v for v in row)
+                  for row in run_sql_file(duck, os.path.join(SQL_DIR, name)).itertuples(index=False)]
+        assert len(actual) == len(expected), name
+        for a, e in zip(sorted(actual, key=str), sorted(expected, key=str)):
+            assert list(a) == pytest.approx(list(e)), name
+    sqlite_conn.close()
+
+    # Timeseries are queryable across runs without loading them
+    rows = duck.execute("SELECT run_id, COUNT(*) FROM timeseries GROUP BY run_id").fetchall()
+    assert len(rows) == len(params_list)
+
+def test_duckdb_connect_empty_results_dir(tmp_path):
+    """A results root without run folders is a FileNotFoundError, not a DuckDB IOException."""
+    with pytest.raises(FileNotFoundError, match="metadata.json"):
+        connect(tmp_path)
+    with pytest.raises(FileNotFoundError, match="not found"):
+        connect(tmp_path / "missing")
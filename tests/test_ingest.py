@@ -0,0 +1,316 @@
+import pytest
+import json
+import os
+import sys
+import sqlite3
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.ingest_data import ingest_all, init_db, ingest_bulk
+
+def _make_run(runs_dir, i, alpha=0.1):
+    run_dir = runs_dir / f"run_{i:04d}"
+    run_dir.mkdir(parents=True)
+    metadata = {
+        "run_id": run_dir.name, "alpha": alpha, "nx": 20 + i, "dt": None, "L": 1.0,
+        "t_max": 0.1, "save_interval": 5, "actual_dt": 1e-4, "steps": 1000,
+        "platform": "Linux", "python_version": "3.11", "created_at": "2025-01-01T12:00:00",
+    }
+    metrics = {
+        "max_temperature": 0.5 + i, "min_temperature": 0.0, "mean_temperature": 0.1,
+        "energy_like_metric": 0.01 * i, "stability_ratio": 0.3,
+    }
+    with open(run_dir / "metadata.json", "w") as f:
+        json.dump(metadata, f)
+    with open(run_dir / "metrics.json", "w") as f:
+        json.dump(metrics, f)
+    return run_dir
+
+def _dump(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            "runs": sorted(conn.execute("SELECT run_id, timestamp, status, platform FROM runs").fetchall()),
+            "parameters": sorted(conn.execute("SELECT run_id, param_name, param_value FROM parameters").fetchall()),
+            "metrics": sorted(conn.execute("SELECT * FROM metrics").fetchall()),
+        }
+    finally:
+        conn.close()
+
+def test_bulk_ingest_matches_per_run_ingest(tmp_path):
+    runs_dir = tmp_path / "runs"
+    for i in range(23):
+        _make_run(runs_dir, i)
+
+    ingest_all(str(runs_dir), db_path=str(tmp_path / "serial.db"))
+    ingest_all(str(runs_dir), db_path=str(tmp_path / "bulk.db"), bulk=True, batch_size=5)
+
+    serial = _dump(str(tmp_path / "serial.db"))
+    assert len(serial["runs"]) == 23
+    assert _dump(str(tmp_path / "bulk.db")) == serial
+
+def test_bulk_ingest_isolates_failing_runs(tmp_path):
+    """A corrupt, malformed or database-rejected run only loses itself."""
+    runs_dir = tmp_path / "runs"
+    run_dirs = [_make_run(runs_dir, i) for i in range(7)]
+    (run_dirs[1] / "metrics.json").write_text("{not json")
+    # Loads fine but cannot be bound (OverflowError, not a sqlite3.Error)
+    metadata = json.loads((run_dirs[6] / "metadata.json").read_text())
+    metadata["nx"] = 2 ** 70
+    (run_dirs[6] / "metadata.json").write_text(json.dumps(metadata))
+
+    db_path = str(tmp_path / "bulk.db")
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TRIGGER reject_run BEFORE INSERT ON metrics WHEN NEW.run_id = 'run_0004'
+        BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    """)
+    conn.commit()
+    conn.close()
+
+    assert ingest_bulk(run_dirs, db_path, batch_size=10) == 4
+    ingested = {row[0] for row in _dump(db_path)["runs"]}
+    assert ingested == {"run_0000", "run_0002", "run_0003", "run_0005"}
+
+    # The batch transaction was closed: the database is writable again
+    init_db(db_path)
+    ingest_all(str(runs_dir), db_path=db_path, bulk=True)
+    assert len(_dump(db_path)["runs"]) == 4
+
+def test_per_run_ingest_isolates_failing_runs(tmp_path):
+    """Non-numeric metrics are stored as NULL; a rejected run releases its write lock."""
+    runs_dir = tmp_path / "runs"
+    run_dirs = [_make_run(runs_dir, i) for i in range(5)]
+    metrics = json.loads((run_dirs[1] / "metrics.json").read_text())
+    metrics["stability_ratio"] = "n/a"
+    (run_dirs[1] / "metrics.json").write_text(json.dumps(metrics))
+
+    db_path = str(tmp_path / "serial.db")
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TRIGGER reject_run BEFORE INSERT ON metrics WHEN NEW.run_id = 'run_0003'
+        BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    """)
+    conn.commit()
+    conn.close()
+
+    ingest_all(str(runs_dir), db_path=db_path)
+    dump = _dump(db_path)
+    assert {row[0] for row in dump["runs"]} == {"run_0000", "run_0001", "run_0002", "run_0004"}
+    assert ("run_0001", 1.5, 0.0, 0.1, 0.01, None) in dump["metrics"]
+
+def test_incremental_ingest_uses_ledger(tmp_path, monkeypatch):
+    """Repeat ingests only touch new or changed runs; --prune drops deleted ones."""
+    import shutil
+    import scripts.ingest_data as ingest_data
+
+    runs_dir = tmp_path / "runs"
+    run_dirs = [_make_run(runs_dir, i) for i in range(5)]
+    db_path = str(tmp_path / "analytics.db")
+    ingest_all(str(runs_dir), db_path=db_path, bulk=True)
+
+    ingested = []
+    real_load = ingest_data.load_run_rows
+
+    def recording_load(run_path, fingerprint=None):
+        ingested.append(run_path.name)
+        return real_load(run_path, fingerprint)
+
+    monkeypatch.setattr(ingest_data, "load_run_rows", recording_load)
+
+    ingest_all(str(runs_dir), db_path=db_path, bulk=True)
+    assert ingested == []
+
+    # Changed and new runs are picked up, in both ingest modes
+    metrics_path = run_dirs[2] / "metrics.json"
+    metrics = json.loads(metrics_path.read_text())
+    metrics["max_temperature"] = 99.0
+    metrics_path.write_text(json.dumps(metrics, indent=2))
+    _make_run(runs_dir, 7)
+    ingest_all(str(runs_dir), db_path=db_path)
+    assert sorted(ingested) == ["run_0002", "run_0007"]
+    assert ("run_0002", 99.0, 0.0, 0.1, 0.02, 0.3) in _dump(db_path)["metrics"]
+
+    ingested.clear()
+    ingest_all(str(runs_dir), db_path=db_path, overwrite=True, bulk=True)
+    assert len(ingested) == 6
+
+    shutil.rmtree(run_dirs[0])
+    ingest_all(str(runs_dir), db_path=db_path, prune=True)
+    assert "run_0000" not in {row[0] for row in _dump(db_path)["runs"]}
+    assert not any(row[0] == "run_0000" for row in _dump(db_path)["parameters"])
+
+def test_typed_parameters_synced_and_backfilled(tmp_path):
+    """run_parameters mirrors the key-value parameters with typed columns, also for older databases."""
+    runs_dir = tmp_path / "runs"
+    for i in range(4):
+        _make_run(runs_dir, i, alpha=0.05 * (i + 1))
+    db_path = str(tmp_path / "analytics.db")
+    ingest_all(str(runs_dir), db_path=db_path, bulk=True)
+
+    conn = sqlite3.connect(db_path)
+    typed = conn.execute("SELECT run_id, alpha, nx, dt, actual_dt, L, t_max, save_interval, scheme "
+                         "FROM run_parameters ORDER BY run_id").fetchall()
+    assert typed[1] == ("run_0001", 0.1, 21, None, 1e-4, 1.0, 0.1, 5, "explicit")
+
+    # A database ingested before run_parameters existed is backfilled on init,
+    # actual_dt from the runs' metadata
+    conn.execute("DELETE FROM run_parameters")
+    conn.commit()
+    conn.close()
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    backfilled = conn.execute("SELECT run_id, alpha, nx, dt, actual_dt, L, t_max, save_interval, scheme "
+                              "FROM run_parameters ORDER BY run_id").fetchall()
+    assert backfilled == typed
+
+    # The bundled analytics queries run against the typed table
+    sql_dir = os.path.join(os.path.dirname(__file__), '..', 'sql')
+    with open(os.path.join(sql_dir, "compare_variants.sql")) as f:
+        top = conn.execute(f.read()).fetchall()
+    with open(os.path.join(sql_dir, "aggregate_by_parameter.sql")) as f:
+        groups = conn.execute(f.read()).fetchall()
+    conn.close()
+    assert [row[0] for row in top] == ["run_0003", "run_0002", "run_0001", "run_0000"]
+    assert ("alpha", 0.1, 1) in [row[:3] for row in groups]
+    # dt groups the requested step (all auto here), actual_dt the step used
+    assert [row[:3] for row in groups if row[0] == "dt"] == [("dt", None, 4)]
+    assert [row[:3] for row in groups if row[0] == "actual_dt"] == [("actual_dt", 1e-4, 4)]
+    assert ("actual_dt", 1e-4, 4) in [row[:3] for row in _rollups(db_path)]
+
+def _rollups(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT param_name, param_value, run_count, avg_max_temp, min_max_temp, max_max_temp, "
+                            "avg_stability, unstable_runs FROM param_rollup_stats "
+                            "ORDER BY param_name, param_value").fetchall()
+    finally:
+        conn.close()
+
+def test_param_rollups_maintained_incrementally(tmp_path):
+    """Rollups updated by inserts, replacements and prunes equal a full recompute."""
+    import shutil
+    from scripts.rollups import rebuild_rollups
+
+    runs_dir = tmp_path / "runs"
+    run_dirs = [_make_run(runs_dir, i, alpha=(0.1, 0.2)[i % 2]) for i in range(8)]
+    db_path = str(tmp_path / "analytics.db")
+    ingest_all(str(runs_dir), db_path=db_path, bulk=True, batch_size=3)
+
+    def assert_matches_rebuild():
+        incremental = _rollups(db_path)
+        conn = sqlite3.connect(db_path)
+        rebuild_rollups(conn)
+        conn.close()
+        assert incremental == pytest.approx(_rollups(db_path))
+        return incremental
+
+    rollups = assert_matches_rebuild()
+    alpha_rows = [row for row in rollups if row[0] == "alpha"]
+    assert [row[1:3] for row in alpha_rows] == [(0.1, 4), (0.2, 4)]
+    assert alpha_rows[1][5] == 7.5  # max_temperature of run_0007
+
+    # Replace the run holding the alpha=0.2 maximum, move another run to a new alpha
+    for run_dir, changes in ((run_dirs[7], {"max_temperature": 0.25}), (run_dirs[1], None)):
+        if changes:
+            metrics = json.loads((run_dir / "metrics.json").read_text())
+            metrics.update(changes)
+            (run_dir / "metrics.json").write_text(json.dumps(metrics, indent=2))
+        else:
+            metadata = json.loads((run_dir / "metadata.json").read_text())
+            metadata["alpha"] = 0.3
+            (run_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+    ingest_all(str(runs_dir), db_path=db_path)
+    rollups = assert_matches_rebuild()
+    assert [row[1:3] for row in rollups if row[0] == "alpha"] == [(0.1, 4), (0.2, 3), (0.3, 1)]
+
+    shutil.rmtree(run_dirs[1])
+    ingest_all(str(runs_dir), db_path=db_path, prune=True, bulk=True)
+    rollups = assert_matches_rebuild()
+    assert [row[1:3] for row in rollups if row[0] == "alpha"] == [(0.1, 4), (0.2, 3)]
+
+
+def test_sql_benchmark_covers_queries(tmp_path):
+    """The SQL benchmark generates a consistent database and times every query."""
+    from scripts.benchmark_sql import generate_db, run_benchmark
+    from scripts.rollups import rebuild_rollups
+
+    db_path = str(tmp_path / "bench_500_0.db")
+    generate_db(db_path, 500)
+    before = _rollups(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM parameters").fetchone()[0] == 500 * 6
+    rebuild_rollups(conn)
+    conn.close()
+    assert before == _rollups(db_path)
+
+    results = run_benchmark([500], repeats=1, db_dir=str(tmp_path))
+    queries = {r["query"] for r in results}
+    assert {"sql/aggregate_by_parameter.sql", "sql/compare_variants.sql", "api: list_runs_summary"} <= queries
+    assert all(r["plan"] and r["ms"] >= 0 for r in results)
+    details = next(r for r in results if r["query"] == "api: get_run_details")
+    assert details["rows"] == 1 and details["full_scans"] == []
+
+def test_ledger_keyed_per_results_root(tmp_path, monkeypatch):
+    """Roots with runs of the same name keep separate fingerprints; older ledgers are re-keyed."""
+    import shutil
+    import scripts.ingest_data as ingest_data
+
+    first, second = tmp_path / "runs_a", tmp_path / "runs_b"
+    for i in range(3):
+        _make_run(first, i)
+        _make_run(second, i, alpha=0.2)
+    db_path = str(tmp_path / "analytics.db")
+    ingest_all(str(first), db_path=db_path)
+    ingest_all(str(second), db_path=db_path, bulk=True)
+
+    ingested = []
+    real_load = ingest_data.load_run_rows
+
+    def recording_load(run_path, fingerprint=None):
+        ingested.append(run_path.name)
+        return real_load(run_path, fingerprint)
+
+    monkeypatch.setattr(ingest_data, "load_run_rows", recording_load)
+    # A symlink to a root is the same root
+    (tmp_path / "linked").symlink_to(first, target_is_directory=True)
+    ingest_all(str(tmp_path / "linked"), db_path=db_path)
+    ingest_all(str(second), db_path=db_path)
+    assert ingested == []
+
+    conn = sqlite3.connect(db_path)
+    roots = sorted(conn.execute("SELECT run_dir, COUNT(*) FROM ingest_ledger GROUP BY run_dir").fetchall())
+    conn.close()
+    assert roots == [(os.path.realpath(first), 3), (os.path.realpath(second), 3)]
+
+    # Pruning one root keeps the runs another root still holds
+    shutil.rmtree(first / "run_0000")
+    shutil.rmtree(second / "run_0001")
+    ingest_all(str(first), db_path=db_path, prune=True)
+    ingest_all(str(second), db_path=db_path, prune=True)
+    assert {row[0] for row in _dump(db_path)["runs"]} == {"run_0000", "run_0001", "run_0002"}
+    shutil.rmtree(second / "run_0000")
+    ingest_all(str(second), db_path=db_path, prune=True)
+    assert {row[0] for row in _dump(db_path)["runs"]} == {"run_0001", "run_0002"}
+
+    # A ledger keyed on run_id alone is migrated on init
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        DROP TABLE ingest_ledger;
+        CREATE TABLE ingest_ledger (run_id TEXT PRIMARY KEY, run_dir TEXT, fingerprint TEXT,
+                                    ingested_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+    """)
+    conn.execute("INSERT INTO ingest_ledger (run_id, run_dir, fingerprint) VALUES ('run_0002', ?, 'x')",
+                 (str(tmp_path / "linked"),))
+    conn.commit()
+    conn.close()
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT run_dir, run_id, fingerprint FROM ingest_ledger").fetchall() == [
+        (os.path.realpath(first), "run_0002", "x")]
+    conn.execute("INSERT INTO ingest_ledger (run_dir, run_id, fingerprint) VALUES (?, 'run_0002', 'y')",
+                 (os.path.realpath(second),))
+    conn.close()
@@ -98,3 +98,44 @@ def test_validation_stability_error():
     is_valid, errors = validate_run_metrics(payload)
     assert not is_valid
     assert any("stability_ratio" in e for e in errors)
+
+def test_validation_implicit_scheme_large_ratio(dummy_run):
+    """Implicit schemes may exceed stability_ratio 0.5 and still converge."""
+    meta_path = Path(dummy_run) / "metadata.json"
+    metrics_path = Path(dummy_run) / "metrics.json"
+    meta = json.loads(meta_path.read_text())
+    meta["scheme"] = "crank_nicolson"
+    meta_path.write_text(json.dumps(meta))
+    metrics = json.loads(metrics_path.read_text())
+    metrics["stability_ratio"] = 2.5
+    metrics_path.write_text(json.dumps(metrics))
+
+    payload = extract_run_metrics(dummy_run)
+    assert payload["parameter_set"]["scheme"] == "crank_nicolson"
+    assert payload["quality_metrics"]["converged"] is True
+
+    is_valid, errors = validate_run_metrics(payload)
+    assert is_valid, f"Validation failed: {errors}"
+
+def test_validation_spectral_mode_large_ratio(dummy_run):
+    """Only exact-mode spectral runs are exempt from the stability_ratio check."""
+    meta_path = Path(dummy_run) / "metadata.json"
+    metrics_path = Path(dummy_run) / "metrics.json"
+    metrics = json.loads(metrics_path.read_text())
+    metrics["stability_ratio"] = 2.5
+    metrics_path.write_text(json.dumps(metrics))
+
+    for mode, stable in ((None, True), ("exact", True), ("explicit", False)):
+        meta = json.loads(meta_path.read_text())
+        meta["scheme"] = "spectral"
+        meta.pop("mode", None)
+        if mode:
+            meta["mode"] = mode
+        meta_path.write_text(json.dumps(meta))
+
+        payload = extract_run_metrics(dummy_run)
+        assert payload["quality_metrics"]["converged"] is stable
+        # An explicit spectral run claiming convergence is flagged
+        payload["quality_metrics"]["converged"] = True
+        is_valid, errors = validate_run_metrics(payload)
+        assert is_valid is stable, errors
@@ -6,7 +6,7 @@ import json
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from simulations.sweep import run_simulation
+from simulations.sweep import run_simulation, run_ensemble, run_prefix_group, execute_sweep, find_cached_run, main as sweep_main
 
 def test_pipeline_small_sweep(tmp_path):
     """
@@ -52,3 +52,219 @@ def test_pipeline_small_sweep(tmp_path):
         metrics = json.load(f)
         assert "energy_like_metric" in metrics
         assert "stability_ratio" in metrics
+
+def test_ensemble_sweep_matches_serial(tmp_path):
+    """
+    Ensemble mode must produce the same run folders and metrics as the
+    per-run path, and isolate invalid combinations.
+    """
+    base = {'L': 1.0, 'nx': 10, 't_max': 0.01, 'dt': None, 'save_interval': 5}
+    params_list = [dict(base, alpha=a) for a in (0.05, 0.1, 0.2)]
+    params_list.append(dict(base, alpha=1.0, dt=1.0))  # unstable -> fails alone
+
+    serial_dir = tmp_path / "serial"
+    ensemble_dir = tmp_path / "ensemble"
+    serial = [run_simulation(p, str(serial_dir)) for p in params_list]
+    ensemble = run_ensemble(params_list, str(ensemble_dir))
+
+    assert serial[-1] is None and ensemble[-1] is None
+    for s_dir, e_dir in zip(serial[:-1], ensemble[:-1]):
+        assert os.path.basename(s_dir) == os.path.basename(e_dir)
+        with open(os.path.join(s_dir, "metrics.json")) as f:
+            s_metrics = json.load(f)
+        with open(os.path.join(e_dir, "metrics.json")) as f:
+            e_metrics = json.load(f)
+        assert s_metrics == pytest.approx(e_metrics)
+
+def test_pipeline_spectral_scheme(tmp_path):
+    """Non-explicit schemes keep the same metrics.json contract."""
+    params = {'L': 1.0, 'nx': 10, 'alpha': 0.1, 't_max': 0.01, 'dt': None,
+              'save_interval': 5, 'scheme': 'spectral'}
+    run_dir = run_simulation(params, str(tmp_path))
+    assert run_dir is not None
+
+    with open(os.path.join(run_dir, "metrics.json")) as f:
+        metrics = json.load(f)
+    assert set(metrics) == {"max_temperature", "min_temperature", "mean_temperature",
+                            "energy_like_metric", "stability_ratio"}
+    with open(os.path.join(run_dir, "metadata.json")) as f:
+        meta = json.load(f)
+    assert meta["scheme"] == "spectral" and meta["mode"] == "exact"
+
+    # The mode parameter reaches the solver and is recorded
+    run_dir = run_simulation(dict(params, mode="explicit"), str(tmp_path))
+    with open(os.path.join(run_dir, "metadata.json")) as f:
+        assert json.load(f)["mode"] == "explicit"
+
+    # Other schemes ignore a mode inherited from the base config, in every path
+    inherited = [dict(params, scheme=scheme, mode="exact", alpha=alpha)
+                 for scheme in ("explicit", "crank_nicolson") for alpha in (0.1, 0.2)]
+    for options in ({}, {"ensemble": True}, {"share_prefixes": True}):
+        run_dirs = execute_sweep(inherited, str(tmp_path / "inherited"), **options)
+        assert all(run_dirs)
+        for run_dir, run_params in zip(run_dirs, inherited):
+            with open(os.path.join(run_dir, "metadata.json")) as f:
+                assert json.load(f)["scheme"] == run_params["scheme"]
+
+def test_parallel_sweep_is_ordered_and_isolated(tmp_path):
+    """
+    A process-pool sweep returns run folders in input order, matches the
+    serial sweep, and isolates failing combinations.
+    """
+    base = {'L': 1.0, 'nx': 10, 't_max': 0.01, 'dt': None, 'save_interval': 5}
+    params_list = [dict(base, alpha=a) for a in (0.05, 0.1, 0.2, 0.3)]
+    params_list.insert(1, dict(base, alpha=1.0, dt=1.0))  # unstable -> None
+
+    serial = execute_sweep(params_list, str(tmp_path / "serial"))
+    parallel = execute_sweep(params_list, str(tmp_path / "parallel"), workers=2, chunksize=2)
+    parallel_ensemble = execute_sweep(params_list, str(tmp_path / "ens"), ensemble=True, workers=2)
+
+    assert serial[1] is None and parallel[1] is None and parallel_ensemble[1] is None
+    for s_dir, p_dir, e_dir in zip(serial, parallel, parallel_ensemble):
+        if s_dir is None:
+            continue
+        assert os.path.basename(s_dir) == os.path.basename(p_dir) == os.path.basename(e_dir)
+        assert os.path.exists(os.path.join(p_dir, "metrics.json"))
+        assert os.path.exists(os.path.join(e_dir, "metrics.json"))
+
+def test_sweep_cache_skips_completed_runs(tmp_path, monkeypatch):
+    """
+    Re-running a sweep reuses complete run folders, recomputes incomplete
+    ones, and --force bypasses the cache.
+    """
+    sweep_cfg = tmp_path / "sweep.yaml"
+    sweep_cfg.write_text("sweep:\n  nx: [10]\n  alpha: [0.1, 0.2]\n  t_max: [0.01]\n")
+    out = tmp_path / "runs"
+    monkeypatch.setenv("SWEEP_CONFIG", str(sweep_cfg))
+    monkeypatch.setenv("OUTPUT_ROOT", str(out))
+
+    sweep_main([])
+    run_dirs = sorted(out.iterdir())
+    assert len(run_dirs) == 2
+    mtimes = {d.name: (d / "metadata.json").stat().st_mtime_ns for d in run_dirs}
+
+    # Incomplete run: missing metrics -> recomputed; complete run -> untouched
+    (run_dirs[0] / "metrics.json").unlink()
+    sweep_main([])
+    assert (run_dirs[0] / "metrics.json").exists()
+    assert (run_dirs[0] / "metadata.json").stat().st_mtime_ns != mtimes[run_dirs[0].name]
+    assert (run_dirs[1] / "metadata.json").stat().st_mtime_ns == mtimes[run_dirs[1].name]
+
+    sweep_main(["--force"])
+    assert (run_dirs[1] / "metadata.json").stat().st_mtime_ns != mtimes[run_dirs[1].name]
+
+    with open(run_dirs[1] / "metadata.json") as f:
+        meta = json.load(f)
+    params = {k: meta[k] for k in ('L', 'nx', 'alpha', 't_max', 'dt', 'save_interval')}
+    assert find_cached_run(params, str(out)) == str(run_dirs[1])
+    assert find_cached_run(dict(params, alpha=0.3), str(out)) is None
+
+    # An interrupted rewrite leaves no metadata.json, so it is never a cache hit
+    import simulations.sweep as sweep
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(sweep, "write_timeseries", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        sweep.save_run_artifacts(params, run_dirs[1].name, [], 0.1, 1e-4, 10, str(out))
+    assert not (run_dirs[1] / "metadata.json").exists()
+    assert find_cached_run(params, str(out)) is None
+    assert not list(run_dirs[1].glob("*.tmp"))
+
+def test_prefix_sharing_matches_independent_runs(tmp_path):
+    """
+    Runs differing only in t_max/save_interval are served from one
+    trajectory with byte-identical timeseries and metrics.
+    """
+    base = {'L': 1.0, 'nx': 12, 'alpha': 0.1, 'dt': None}
+    params_list = [dict(base, t_max=t, save_interval=si) for t in (0.005, 0.02, 0.01) for si in (3, 5)]
+
+    shared = run_prefix_group(params_list, str(tmp_path / "shared"))
+    independent = [run_simulation(p, str(tmp_path / "independent")) for p in params_list]
+
+    for s_dir, i_dir in zip(shared, independent):
+        assert os.path.basename(s_dir) == os.path.basename(i_dir)
+        for name in ("timeseries.csv", "metrics.json"):
+            with open(os.path.join(s_dir, name)) as f_s, open(os.path.join(i_dir, name)) as f_i:
+                assert f_s.read() == f_i.read(), name
+        with open(os.path.join(s_dir, "metadata.json")) as f_s, open(os.path.join(i_dir, "metadata.json")) as f_i:
+            assert json.load(f_s)["steps"] == json.load(f_i)["steps"]
+
+@pytest.mark.parametrize("fmt", ["parquet", "npy"])
+def test_binary_timeseries_formats_match_csv(tmp_path, fmt):
+    """
+    Binary timeseries formats hold exactly the CSV data, yield matching
+    metrics, satisfy the cache check and convert back losslessly.
+    """
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    from analysis.timeseries import read_timeseries, find_timeseries, convert_run
+
+    params = {'L': 1.0, 'nx': 12, 'alpha': 0.1, 't_max': 0.01, 'dt': None, 'save_interval': 5}
+    csv_dir = run_simulation(params, str(tmp_path / "csv"))
+    bin_dir = run_simulation(params, str(tmp_path / fmt), timeseries_format=fmt)
+
+    assert find_timeseries(bin_dir).name == f"timeseries.{fmt}"
+    assert not os.path.exists(os.path.join(bin_dir, "timeseries.csv"))
+    t_csv, u_csv = read_timeseries(csv_dir)
+    t_bin, u_bin = read_timeseries(bin_dir, mmap=True)
+    assert (t_csv == t_bin).all() and (u_csv == u_bin).all()
+
+    # pandas' default CSV float parser may differ from the stored values in the last ulp
+    with open(os.path.join(csv_dir, "metrics.json")) as f_c, open(os.path.join(bin_dir, "metrics.json")) as f_b:
+        assert json.load(f_b) == pytest.approx(json.load(f_c), rel=1e-12)
+
+    assert find_cached_run(params, str(tmp_path / fmt), fmt) == bin_dir
+    assert find_cached_run(params, str(tmp_path / fmt), "csv") is None
+
+    # Migrating back reproduces the original CSV byte for byte
+    convert_run(bin_dir, "csv")
+    assert find_timeseries(bin_dir).name == "timeseries.csv"
+    with open(os.path.join(csv_dir, "timeseries.csv")) as f_c, open(os.path.join(bin_dir, "timeseries.csv")) as f_b:
+        assert f_c.read() == f_b.read()
+
+def _trajectory_metrics(params, dx):
+    from analysis.accumulators import trajectory_accumulators
+    return trajectory_accumulators(dx, threshold=0.5)
+
+def test_step_accumulators_in_every_execution_path(tmp_path):
+    """Per-step metrics are identical whether a run is single, batched or prefix-shared."""
+    from analysis.accumulators import trajectory_accumulators, collect_results
+    from simulations.solver import HeatEquationSolver1D
+    from simulations.sweep import initial_peak
+
+    base = {'L': 1.0, 'nx': 15, 'alpha': 0.1, 'dt': None}
+    params_list = [dict(base, t_max=t, save_interval=si) for t, si in ((0.05, 7), (0.2, 5), (0.2, 9))]
+    modes = {
+        "serial": {"share_prefixes": False},
+        "ensemble": {"share_prefixes": False, "ensemble": True},
+        "prefix": {"share_prefixes": True},
+    }
+    stored = {}
+    for name, options in modes.items():
+        run_dirs = execute_sweep(params_list, str(tmp_path / name), step_accumulators=_trajectory_metrics, **options)
+        stored[name] = []
+        for run_dir in run_dirs:
+            with open(os.path.join(run_dir, "metrics.json")) as f:
+                stored[name].append(json.load(f))
+
+    for params, serial, ensemble, prefix in zip(params_list, stored["serial"], stored["ensemble"], stored["prefix"]):
+        solver = HeatEquationSolver1D(L=1.0, nx=15, alpha=0.1, t_max=params['t_max'])
+        solver.set_initial_condition(initial_peak)
+        accs = trajectory_accumulators(solver.dx, threshold=0.5)
+        solver.solve(save_interval=1, accumulators=accs)
+        expected = collect_results(accs)
+        assert {k: serial[k] for k in expected} == expected
+        assert {k: ensemble[k] for k in expected} == pytest.approx(expected)
+        assert {k: prefix[k] for k in expected} == expected
+
+@pytest.mark.parametrize("fmt", ["csv", "npy"])
+def test_streamed_metrics_match_stored_artifacts(tmp_path, fmt):
+    """Metrics accumulated during the sweep equal a recompute from the stored files."""
+    from analysis.compute_metrics import verify_all_runs
+
+    base = {'L': 1.0, 'nx': 15, 'dt': None, 'save_interval': 4}
+    params_list = [dict(base, alpha=a, t_max=t) for a in (0.05, 0.1) for t in (0.01, 0.03)]
+    run_dirs = execute_sweep(params_list, str(tmp_path), ensemble=True, timeseries_format=fmt)
+
+    assert all(run_dirs)
+    assert verify_all_runs(str(tmp_path)) == []
@@ -6,7 +6,10 @@ import sys
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from simulations.solver import HeatEquationSolver1D
+from simulations.solver import HeatEquationSolver1D, EnsembleHeatSolver1D, CrankNicolsonSolver1D, SpectralHeatSolver, create_solver
+
+def _gaussian_pulse(x):
+    return np.exp(-100 * (x - 0.5)**2)
 
 def test_solver_stability():
     """
@@ -87,3 +90,181 @@ def test_solver_determinism():
     # Floating point comparison
     np.testing.assert_allclose(u1, u2, err_msg="Solver output differs between identical runs")
     assert t1 == t2
+
+def test_ensemble_matches_individual_runs():
+    """
+    Verify the batched ensemble reproduces each independent run exactly,
+    including runs with different step counts and save intervals.
+    """
+    alphas = [0.01, 0.1, 0.5, 1.0]
+    t_maxs = [0.05, 0.02, 0.05, 0.01]
+    save_intervals = [5, 3, 10, 1]
+
+    ensemble = EnsembleHeatSolver1D(L=1.0, nx=21, alpha=alphas, t_max=t_maxs)
+    ensemble.set_initial_condition(_gaussian_pulse)
+    histories = ensemble.solve(save_interval=save_intervals)
+
+    for i, (alpha, t_max, si) in enumerate(zip(alphas, t_maxs, save_intervals)):
+        single = HeatEquationSolver1D(L=1.0, nx=21, alpha=alpha, t_max=t_max)
+        single.set_initial_condition(_gaussian_pulse)
+        expected = single.solve(save_interval=si)
+
+        assert ensemble.nt[i] == single.nt
+        assert len(histories[i]) == len(expected)
+        for (t_e, u_e), (t_s, u_s) in zip(histories[i], expected):
+            assert t_e == t_s  # both n * dt
+            np.testing.assert_allclose(u_e, u_s)
+
+def test_ensemble_stability_check():
+    """An unstable dt for any member is rejected."""
+    with pytest.raises(ValueError, match="Stability check failed"):
+        EnsembleHeatSolver1D(L=1.0, nx=11, alpha=[0.1, 1.0], t_max=0.01, dt=[0.004, 0.006])
+
+def test_implicit_solver_large_steps():
+    """
+    Implicit schemes accept dt far above the explicit limit and still
+    agree with the explicit reference solution.
+    """
+    ref = HeatEquationSolver1D(L=1.0, nx=51, alpha=0.1, t_max=0.1, dt=0.0004)
+    ref.set_initial_condition(_gaussian_pulse)
+    _, u_ref = ref.solve(save_interval=1000)[-1]
+
+    for scheme, tol in (("crank_nicolson", 1e-3), ("backward_euler", 1e-2)):
+        # r = 0.1 * 0.005 / 0.02^2 = 1.25 > 0.5
+        solver = create_solver(scheme, L=1.0, nx=51, alpha=0.1, t_max=0.1, dt=0.005)
+        solver.set_initial_condition(_gaussian_pulse)
+        t, u = solver.solve(save_interval=1000)[-1]
+
+        assert solver.nt == 20
+        assert t == pytest.approx(0.1)
+        assert np.max(np.abs(u - u_ref)) < tol
+
+def test_create_solver_unknown_scheme():
+    with pytest.raises(ValueError, match="Unknown scheme"):
+        create_solver("leapfrog", L=1.0, nx=11, alpha=0.1, t_max=0.01)
+    assert isinstance(create_solver("crank_nicolson", L=1.0, nx=11, alpha=0.1, t_max=0.01), CrankNicolsonSolver1D)
+
+def test_spectral_solver_matches_explicit():
+    """
+    The DST closed form reproduces the explicit scheme in "explicit" mode
+    and the fine-dt limit in "exact" mode, without time stepping.
+    """
+    explicit = HeatEquationSolver1D(L=1.0, nx=31, alpha=0.1, t_max=0.05)
+    explicit.set_initial_condition(_gaussian_pulse)
+    expected = explicit.solve(save_interval=7)
+
+    spectral = SpectralHeatSolver(L=1.0, nx=31, alpha=0.1, t_max=0.05, mode="explicit")
+    spectral.set_initial_condition(_gaussian_pulse)
+    history = spectral.solve(save_interval=7)
+
+    assert len(history) == len(expected)
+    for (t_s, u_s), (t_e, u_e) in zip(history, expected):
+        assert t_s == pytest.approx(t_e)
+        np.testing.assert_allclose(u_s, u_e, atol=1e-12)
+
+    fine = HeatEquationSolver1D(L=1.0, nx=31, alpha=0.1, t_max=0.05, dt=1e-5)
+    fine.set_initial_condition(_gaussian_pulse)
+    t_fine, u_fine = fine.solve(save_interval=10**6)[-1]
+    exact = SpectralHeatSolver(L=1.0, nx=31, alpha=0.1, t_max=0.05, dt=0.05)
+    exact.set_initial_condition(_gaussian_pulse)
+    u_exact = exact.evaluate([t_fine])[0]
+    assert np.max(np.abs(u_exact - u_fine)) < 1e-4
+
+def test_solver_history_modes():
+    """
+    "array", "final" and the streaming iterator agree with the default
+    list history.
+    """
+    params = dict(L=1.0, nx=21, alpha=0.1, t_max=0.05)
+
+    solver = HeatEquationSolver1D(**params)
+    solver.set_initial_condition(_gaussian_pulse)
+    history = solver.solve(save_interval=7)
+
+    times, values = solver.solve(save_interval=7, history="array")
+    assert values.shape == (len(history), 21)
+    np.testing.assert_allclose(times, [t for t, _ in history])
+    np.testing.assert_allclose(values, np.vstack([u for _, u in history]))
+
+    t_final, u_final = solver.solve(history="final")
+    assert t_final == history[-1][0]
+    np.testing.assert_allclose(u_final, history[-1][1])
+
+    streamed = [(t, u.copy()) for t, u in solver.iter_snapshots(save_interval=7)]
+    assert len(streamed) == len(history)
+
+    with pytest.raises(ValueError, match="Unknown history mode"):
+        solver.solve(history="dict")
+
+def test_kernel_backends_agree(monkeypatch):
+    """
+    All available stencil backends produce the same solution, and a
+    missing optional backend falls back cleanly.
+    """
+    from simulations import kernels
+
+    results = {}
+    for name in kernels.available_backends():
+        solver = HeatEquationSolver1D(L=1.0, nx=41, alpha=0.1, t_max=0.02, backend=name)
+        solver.set_initial_condition(_gaussian_pulse)
+        results[name] = solver.solve(save_interval=3, history="array")[1]
+    for name, values in results.items():
+        np.testing.assert_allclose(values, results["numpy"], atol=1e-14, err_msg=name)
+
+    monkeypatch.setitem(kernels.KERNEL_BACKENDS, "numba", None)
+    monkeypatch.setenv(kernels.KERNEL_ENV_VAR, "numba")
+    assert kernels.get_kernel() is kernels.advance_inplace
+
+    with pytest.raises(ValueError, match="Unknown kernel backend"):
+        kernels.get_kernel("fortran")
+
+def _posthoc_trajectory_metrics(history, dx, threshold):
+    """Trajectory metrics computed afterwards from a complete (every-step) history."""
+    times = np.array([t for t, _ in history])
+    peaks = np.array([u.max() for _, u in history])
+    energies = np.array([np.dot(u, u) * dx for _, u in history])
+    below = np.flatnonzero(peaks <= threshold)
+    return {
+        "peak_temperature": peaks.max(), "peak_time": times[np.argmax(peaks)],
+        "initial_energy": energies[0], "energy_decay_ratio": energies[-1] / energies[0],
+        "time_to_threshold": times[below[0]] if below.size else None,
+    }
+
+@pytest.mark.parametrize("scheme,kwargs", [("explicit", {}), ("crank_nicolson", {"dt": 0.004}),
+                                           ("spectral", {"mode": "explicit"})])
+def test_step_accumulators_match_full_history(scheme, kwargs):
+    """Accumulators see every time step, not only the saved snapshots."""
+    from analysis.accumulators import trajectory_accumulators, collect_results
+
+    def make():
+        solver = create_solver(scheme, L=1.0, nx=30, alpha=0.1, t_max=0.2, **kwargs)
+        solver.set_initial_condition(lambda x: np.exp(-100 * (x - 0.5)**2) + 0.2 * x)
+        return solver
+
+    full = make().solve(save_interval=1)
+    solver = make()
+    accs = trajectory_accumulators(solver.dx, threshold=0.5)
+    saved = solver.solve(save_interval=7, accumulators=accs)
+    metrics = collect_results(accs)
+
+    assert len(saved) < len(full)
+    expected = _posthoc_trajectory_metrics(full, solver.dx, 0.5)
+    assert metrics == pytest.approx(expected)
+    # A threshold between saved snapshots is found at the exact step
+    assert expected["time_to_threshold"] is not None
+    assert expected["time_to_threshold"] not in [t for t, _ in saved]
+
+def test_ensemble_step_accumulators_match_full_history():
+    """Each run's accumulators see all of its own steps in the batched loop."""
+    from analysis.accumulators import trajectory_accumulators, collect_results
+
+    alphas, t_maxs = [0.05, 0.1, 0.5], [0.05, 0.02, 0.01]
+    ensemble = EnsembleHeatSolver1D(L=1.0, nx=21, alpha=alphas, t_max=t_maxs)
+    ensemble.set_initial_condition(lambda x: np.exp(-100 * (x - 0.5)**2))
+    full = ensemble.solve(save_interval=1)
+
+    accs = [trajectory_accumulators(dx, threshold=0.6) for dx in ensemble.dx]
+    ensemble.solve(save_interval=5, accumulators=accs)
+    for i in range(len(alphas)):
+        expected = _posthoc_trajectory_metrics(full[i], ensemble.dx[i], 0.6)
+        assert collect_results(accs[i]) == pytest.approx(expected)
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import httpx
 import time
 from datetime import datetime
@@ -151,27 +152,123 @@ def get_api_status():
     try:
         r = httpx.get(f"{API_URL}/health", timeout=2)
         return r.status_code == 200
-    except:
+    except httpx.HTTPError:
         return False
 
-def get_runs():
+def _api_error(action, exc):
+    """Show a failed API call (transport error or malformed response) in the page."""
+    st.error(f"Could not {action}: {exc}")
+
+RUNS_PAGE_SIZE = 50
+
+def get_runs(after=None, limit=RUNS_PAGE_SIZE):
+    """One page of runs: (runs, next_cursor, total, total_capped)."""
+    try:
+        params = {"limit": limit}
+        if after:
+            params["after"] = after
+        r = httpx.get(f"{API_URL}/runs", params=params)
+        if r.status_code == 200:
+            body = r.json()
+            return body.get("runs", []), body.get("next_cursor"), body.get("total", 0), body.get("total_capped", False)
+        return [], None, 0, False
+    except (httpx.HTTPError, ValueError) as exc:
+        _api_error("load runs", exc)
+        return [], None, 0, False
+
+def get_rollups(param=None):
     try:
-        r = httpx.get(f"{API_URL}/runs")
+        r = httpx.get(f"{API_URL}/rollups", params={"param": param} if param else None)
         if r.status_code == 200:
-            return r.json().get("runs", [])
+            return r.json().get("rollups", [])
         return []
-    except:
+    except (httpx.HTTPError, ValueError) as exc:
+        _api_error("load rollups", exc)
         return []
 
-def get_run_details(run_id, endpoint):
+def get_runs_batch(run_ids, include=("metrics", "insights")):
+    """Metrics/insights of several runs in one request: {run_id: entry}."""
+    try:
+        r = httpx.post(f"{API_URL}/runs/batch", json={"run_ids": list(run_ids), "include": list(include)})
+        if r.status_code == 200:
+            return r.json().get("runs", {})
+        return {}
+    except (httpx.HTTPError, ValueError) as exc:
+        _api_error("load run details", exc)
+        return {}
+
+def get_comparison(baseline, candidates):
+    """Server-side comparison (metric deltas and profile differences) of candidates against baseline."""
     try:
-        r = httpx.get(f"{API_URL}/runs/{run_id}/{endpoint}")
+        r = httpx.get(f"{API_URL}/compare", params={"baseline": baseline, "candidate": list(candidates)})
         if r.status_code == 200:
             return r.json()
         return None
-    except:
+    except (httpx.HTTPError, ValueError) as exc:
+        _api_error("compare runs", exc)
         return None
 
+@st.cache_resource
+def _http_cache():
+    """(url, params) -> (etag, response) of conditional GETs, shared across reruns."""
+    return {}
+
+def _cached_get(path, params=None):
+    """
+    GET that revalidates with If-None-Match and reuses the cached response on
+    304, so reruns of the dashboard don't re-download unchanged artifacts.
+    """
+    cache = _http_cache()
+    key = (path, tuple(sorted((params or {}).items())))
+    entry = cache.get(key)
+    headers = {"If-None-Match": entry[0]} if entry else None
+    r = httpx.get(f"{API_URL}{path}", params=params, headers=headers)
+    if r.status_code == 304 and entry:
+        return entry[1]
+    if r.status_code == 200 and "ETag" in r.headers:
+        cache[key] = (r.headers["ETag"], r)
+    return r
+
+def get_timeseries(run_id, max_snapshots=200, x_stride=1):
+    """LTTB-downsampled temperature field as (times, x, values), fetched as raw float32."""
+    try:
+        r = _cached_get(f"/runs/{run_id}/timeseries",
+                        params={"max_snapshots": max_snapshots, "x_stride": x_stride, "format": "f32"})
+        if r.status_code != 200:
+            return None
+        n, m = (int(v) for v in r.headers["X-Timeseries-Shape"].split(","))
+        raw = np.frombuffer(r.content, dtype="<f4")
+        return raw[:n], raw[n:n + m], raw[n + m:].reshape(n, m)
+    except (httpx.HTTPError, KeyError, ValueError) as exc:
+        _api_error("load the timeseries", exc)
+        return None
+
+def submit_job(sweep):
+    """Start a simulation job (POST /jobs); returns its status or None."""
+    try:
+        r = httpx.post(f"{API_URL}/jobs", json={"sweep": sweep})
+        return r.json() if r.status_code == 202 else None
+    except (httpx.HTTPError, ValueError) as exc:
+        _api_error("submit the job", exc)
+        return None
+
+def get_job(job_id):
+    try:
+        r = httpx.get(f"{API_URL}/jobs/{job_id}")
+        return r.json() if r.status_code == 200 else None
+    except (httpx.HTTPError, ValueError) as exc:
+        _api_error("fetch the job", exc)
+        return None
+
+def wait_for_job(job_id, timeout=5.0):
+    """Poll a job until it finishes or timeout seconds pass; returns its last status."""
+    deadline = time.monotonic() + timeout
+    job = get_job(job_id)
+    while job and job["finished_at"] is None and time.monotonic() < deadline:
+        time.sleep(0.1)
+        job = get_job(job_id)
+    return job
+
 # --- SIDEBAR NAV ---
 st.sidebar.markdown("<h2 style='color:white; margin-bottom:2rem;'>⚡ SimPlatform</h2>", unsafe_allow_html=True)
 api_up = get_api_status()
@@ -182,10 +279,46 @@ else:
     st.sidebar.error("System Offline")
 
 # View Mode
-view_mode = st.sidebar.radio("Navigation", ["Dashboard", "Comparison"], label_visibility="collapsed")
+view_mode = st.sidebar.radio("Navigation", ["Dashboard", "Comparison", "Parameters"], label_visibility="collapsed")
+
+# Runs List (one keyset page at a time; the cursors of earlier pages are kept for "Prev")
+if "runs_page_cursors" not in st.session_state:
+    st.session_state.runs_page_cursors = [None]
+runs, next_cursor, runs_total, runs_total_capped = get_runs(after=st.session_state.runs_page_cursors[-1])
+
+page_number = len(st.session_state.runs_page_cursors)
+if runs:
+    first = (page_number - 1) * RUNS_PAGE_SIZE + 1
+    total_label = f"{runs_total}+" if runs_total_capped else str(runs_total)
+    st.sidebar.caption(f"Runs {first}–{first + len(runs) - 1} of {total_label}")
+prev_col, next_col = st.sidebar.columns(2)
+if prev_col.button("‹ Prev", disabled=page_number == 1, use_container_width=True):
+    st.session_state.runs_page_cursors.pop()
+    st.rerun()
+if next_col.button("Next ›", disabled=next_cursor is None, use_container_width=True):
+    st.session_state.runs_page_cursors.append(next_cursor)
+    st.rerun()
 
-# Runs List
-runs = get_runs()
+# What-if runs go to the API's warm worker pool and are ingested when done
+with st.sidebar.expander("What-if run"):
+    whatif_alpha = st.number_input("alpha", min_value=0.0001, value=0.1, format="%.4f")
+    whatif_nx = st.number_input("nx", min_value=3, value=50, step=1)
+    whatif_t_max = st.number_input("t_max", min_value=0.001, value=0.5, format="%.3f")
+    if st.button("Run", use_container_width=True, disabled=not api_up):
+        job = submit_job({"alpha": [whatif_alpha], "nx": [int(whatif_nx)], "t_max": [whatif_t_max]})
+        st.session_state.whatif_job = job["job_id"] if job else None
+        if not job:
+            st.error("Could not start the job.")
+    if st.session_state.get("whatif_job"):
+        job = wait_for_job(st.session_state.whatif_job)
+        if job is None:
+            st.warning("Job not found.")
+        elif job["finished_at"] is None:
+            st.caption(f"Running ({job['progress']:.0%})…")
+        elif job["run_ids"]:
+            st.success(f"{job['run_ids'][0]} ready ({job['status']})")
+        else:
+            st.error(f"Job {job['status']}")
 
 def render_charts(runs_data):
     """Renders global charts (Trend across runs)."""
@@ -211,13 +344,16 @@ else:
         selected_label = st.sidebar.selectbox("Select Run", list(run_options.keys()))
         current_run = run_options[selected_label]
         comparison_run = None
-    else:
+    elif view_mode == "Comparison":
         st.sidebar.markdown("### Comparison")
         baseline_label = st.sidebar.selectbox("Baseline", list(run_options.keys()), index=0)
         candidate_label = st.sidebar.selectbox("Candidate", list(run_options.keys()), index=min(1, len(run_options)-1))
         
         current_run = run_options[baseline_label]
         comparison_run = run_options[candidate_label]
+    else:
+        current_run = None
+        comparison_run = None
 
 # --- MAIN CONTENT ---
 
@@ -229,8 +365,9 @@ if view_mode == "Dashboard" and current_run:
     with c1:
         st.markdown(f"<h1>Analytics Dashboard</h1>", unsafe_allow_html=True)
         
-        # Run Metadata Strip (Credibility)
-        metrics_data = get_run_details(current_run, "metrics")
+        # Run Metadata Strip (Credibility); metrics and insights in one request
+        run_entry = get_runs_batch([current_run]).get(current_run, {})
+        metrics_data = run_entry.get("metrics")
         params = metrics_data.get("parameter_set", {}) if metrics_data else {}
         exec_meta = metrics_data.get("execution_metrics", {}) if metrics_data else {}
         
@@ -253,7 +390,7 @@ if view_mode == "Dashboard" and current_run:
         
     with c2:
         # Trust Indicators (Pills)
-        insights = get_run_details(current_run, "insights")
+        insights = run_entry.get("insights")
         
         st.markdown(f"""
         <div style="display:flex; justify-content: flex-end; gap: 10px; margin-top: 1rem;">
@@ -324,6 +461,15 @@ if view_mode == "Dashboard" and current_run:
         }).set_index("Metric")
         st.bar_chart(chart_data, color="#111c44", height=200)
 
+        # Temperature profiles at a few snapshot times (served downsampled by the API)
+        timeseries = get_timeseries(current_run)
+        if timeseries is not None and len(timeseries[0]):
+            times, x, values = timeseries
+            st.markdown("<h3>Temperature Profiles</h3>", unsafe_allow_html=True)
+            picks = sorted(set(np.linspace(0, len(times) - 1, min(5, len(times))).astype(int)))
+            profiles = pd.DataFrame({f"t={times[i]:.3g}": values[i] for i in picks}, index=pd.Index(x, name="x"))
+            st.line_chart(profiles, height=260)
+
     # AI Assessment Card (Compact Empty State)
     st.markdown("<h3>Engineering Assessment</h3>", unsafe_allow_html=True)
     
@@ -413,13 +559,13 @@ elif view_mode == "Comparison" and current_run and comparison_run:
         </div>
         """, unsafe_allow_html=True)
     
-    # Fetch Both
-    m1 = get_run_details(current_run, "metrics")
-    m2 = get_run_details(comparison_run, "metrics")
+    # One request: both runs' metrics plus profile differences computed server-side
+    comparison = get_comparison(current_run, [comparison_run])
+    candidate = comparison["comparisons"][0] if comparison else {}
     
-    if m1 and m2:
-        p1 = m1.get("performance_metrics", {})
-        p2 = m2.get("performance_metrics", {})
+    if comparison and candidate.get("performance_metrics"):
+        p1 = comparison["baseline_metrics"]
+        p2 = candidate["performance_metrics"]
         
         # Decision Summary Logic
         s1, s2 = p1.get('stability_ratio', 1.0), p2.get('stability_ratio', 1.0)
@@ -486,5 +632,23 @@ elif view_mode == "Comparison" and current_run and comparison_run:
             with c3:
                 st.markdown(diff_card("Stability", p1.get('stability_ratio', 1), p2.get('stability_ratio', 1)), unsafe_allow_html=True)
 
+        profile_diff = candidate.get("profile_diff")
+        if profile_diff and profile_diff["times"]:
+            st.markdown("<h3>Profile Difference Over Time</h3>", unsafe_allow_html=True)
+            st.line_chart(pd.DataFrame({"L2": profile_diff["l2"], "L∞": profile_diff["linf"]},
+                                       index=pd.Index(profile_diff["times"], name="t")), height=260)
+
+# 3. PARAMETER ROLLUPS VIEW (pre-aggregated, independent of run selection)
+elif view_mode == "Parameters":
+    st.markdown("<h1>Parameter Sensitivity</h1>", unsafe_allow_html=True)
+    param = st.selectbox("Parameter", ["alpha", "nx", "dt", "actual_dt"])
+    rollups = get_rollups(param)
+    if not rollups:
+        st.info("No rollups yet. Ingest runs with `python scripts/ingest_data.py`.")
+    else:
+        df = pd.DataFrame(rollups).set_index("param_value")
+        st.line_chart(df[["avg_max_temp", "min_max_temp", "max_max_temp"]])
+        st.dataframe(df.drop(columns=["param_name"]), use_container_width=True)
+
 else:
     st.markdown("<div style='text-align:center; padding: 4rem; color: #a3aed0;'>Please select runs from the sidebar.</div>", unsafe_allow_html=True)